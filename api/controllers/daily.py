@@ -10,12 +10,12 @@ def controller(text: str) -> list[SendMessage]:
     """
     parts = text.strip().split()
 
-    stock_no = parts[1]
+    stock_no = TaiwanStockExchangeCrawler.resolve(parts[1])
     start_date = parts[2] if len(parts) > 2 else utils.date.last_month()
     end_date = parts[3] if len(parts) > 3 else utils.date.today()
 
     # 查詢每日資料
-    stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=(start_date, end_date), only_fetch=["daily", "real_time"])
+    stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=(start_date, end_date), only_fetch=["daily"])
     daily_data: list[dict[DAILY_DATA_KEYS, str]] = stock.get("每日交易資料", date_range=(start_date, end_date))[0]
 
     if not daily_data:
@@ -23,7 +23,7 @@ def controller(text: str) -> list[SendMessage]:
 
     # 整理文字內容
     result: list[SendMessage] = []
-    header = f"📊 股票代碼: {stock_no}-{stock.get('股票簡稱')[0]}\n（{start_date} ~ {end_date})\n每日交易資訊如下：\n"
+    header = f"📊 股票代碼: {stock_no}-{TaiwanStockExchangeCrawler.name(stock_no)}\n（{start_date} ~ {end_date})\n每日交易資訊如下：\n"
     result.append(TextSendMessage(text=header))
     group_text = ""
     for i, day_data in enumerate(daily_data, start=1):
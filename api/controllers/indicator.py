@@ -0,0 +1,80 @@
+import math
+
+from linebot.models import SendMessage, ImageSendMessage, TextSendMessage
+from crawler import TaiwanStockExchangeCrawler
+import utils
+from visualize import SERIES
+
+
+def series(values) -> list[float | None]:
+    """將指標陣列轉為可壓縮的列表，NaN 轉為 None 並四捨五入至小數第二位。"""
+    return [None if math.isnan(value) else round(value, 2) for value in values.tolist()]
+
+
+def controller(text: str) -> list[SendMessage]:
+    """
+    處理 /indicator 指令，以本地每日交易資料計算技術指標並疊加於K線圖或收盤價趨勢圖
+    """
+    # 解析使用者輸入的文字，取得股票代號與指標名稱
+    part = text.split()
+    stock_no = TaiwanStockExchangeCrawler.resolve(part[1])
+    name = part[2]
+    start_date = part[3] if len(part) > 3 else utils.date.last_month()
+    end_date = part[4] if len(part) > 4 else utils.date.today()
+
+    indicator, bars, outputs = TaiwanStockExchangeCrawler.indicator(stock_no, name, (start_date, end_date))
+    if len(bars) == 0:
+        return [TextSendMessage(text="⚠️ 本地資料庫查無該期間的每日資料\n請確認日期或先匯入每日收盤行情")]
+
+    dates = [str(date) for date in bars["date"].tolist()]
+    lines = {key: series(values) for key, values in outputs.items()}
+    title = stock_no + '-' + TaiwanStockExchangeCrawler.name(stock_no) + '-' + indicator.label
+
+    if indicator.PRICE_OVERLAY:
+        # 均線、布林通道與價格同軸，疊加於K線圖
+        data = [
+            {"date": date, "open": open, "high": high, "low": low, "close": close}
+            for date, open, high, low, close in zip(
+                dates,
+                bars["open"].tolist(),
+                bars["high"].tolist(),
+                bars["low"].tolist(),
+                bars["close"].tolist(),
+            )
+        ]
+        chart_data = {"data": data, "overlays": lines}
+        url = utils.url.generate_plot_url(
+            type="kline",
+            title=title,
+            series=SERIES.put(chart_data),
+            data=chart_data,
+            )
+    else:
+        # RSI、MACD 畫在收盤價趨勢圖的副軸
+        chart_data = {"data": [[date, close] for date, close in zip(dates, bars["close"].tolist())], "secondary": lines}
+        url = utils.url.generate_plot_url(
+            type="trend",
+            title=title,
+            x_label='日期',
+            y_label='收盤價',
+            series=SERIES.put(chart_data),
+            data=chart_data,
+            )
+
+    latest = "、".join(f"{key} {values[-1]:.2f}" for key, values in lines.items() if values[-1] is not None)
+    return [
+    TextSendMessage(
+        text=(
+            f"📈 指定股票技術指標查詢\n"
+            f"📌 股票代號：{stock_no}\n"
+            f"📐 指標：{indicator.label}\n"
+            f"📅 日期區間：{start_date} ~ {end_date}\n"
+            f"🔢 最新數值：{latest or '資料不足'}\n"
+            f"🔗 圖表連結：{utils.url.shorten_url(url)}"
+        )
+    ),
+    ImageSendMessage(
+        original_content_url=url,
+        preview_image_url=utils.url.preview_url(url)
+    )
+]
@@ -0,0 +1,58 @@
+from crawler import TaiwanStockExchangeCrawler
+from crawler.ingest import pending_report_days, report_series
+import utils
+from linebot.models import SendMessage, TextSendMessage
+
+
+def lots(shares: int) -> str:
+    """將股數轉為張數（1 張 = 1000 股）並加上正負號。"""
+    return f"{round(shares / 1000):+,} 張"
+
+
+def controller(text: str) -> list[SendMessage]:
+    """
+    處理 /institution 指令，查詢期間內三大法人每日買賣超（由本地資料庫回覆，缺少的日期才整批匯入）
+    """
+    parts = text.strip().split()
+
+    stock_no = TaiwanStockExchangeCrawler.resolve(parts[1])
+    start_date = parts[2] if len(parts) > 2 else utils.date.days_ago(14)
+    end_date = parts[3] if len(parts) > 3 else utils.date.today()
+    start_date, end_date = utils.date.check_date_range((start_date, end_date))
+
+    flows = report_series("T86", stock_no, start_date, end_date)
+    pending = pending_report_days("T86", start_date, end_date)
+    if len(flows["date"]) == 0 and pending:
+        return [TextSendMessage(text=f"⏳ 期間內 {len(pending)} 個交易日的資料匯入中，請稍後再查詢")]
+    if len(flows["date"]) == 0:
+        return [TextSendMessage(text="查無三大法人買賣超資料，請確認股票代號與日期是否正確⚠️")]
+
+    # 整理文字內容
+    result: list[SendMessage] = []
+    header = (
+        f"🏦 股票代碼: {stock_no}-{TaiwanStockExchangeCrawler.name(stock_no)}\n"
+        f"（{start_date} ~ {end_date})\n"
+        f"三大法人買賣超如下：\n"
+        f"🧮 期間合計：{lots(int(flows['total_net'].sum()))}"
+        f"（外資 {lots(int(flows['foreign_net'].sum()))}、投信 {lots(int(flows['trust_net'].sum()))}、自營商 {lots(int(flows['dealer_net'].sum()))}）"
+    )
+    if pending:
+        header += f"\n⏳ 尚有 {len(pending)} 個交易日的資料匯入中，請稍後再查詢完整期間"
+    result.append(TextSendMessage(text=header))
+    group_text = ""
+    count = len(flows["date"])
+    for i in range(count):
+        group_text += (
+            f"📅 日期：{utils.date.datetime.strptime(str(flows['date'][i]), '%Y%m%d').strftime('%Y/%m/%d')}\n"
+            f"🌏 外資：{lots(int(flows['foreign_net'][i]))}\n"
+            f"🏢 投信：{lots(int(flows['trust_net'][i]))}\n"
+            f"🏪 自營商：{lots(int(flows['dealer_net'][i]))}\n"
+            f"🧮 合計：{lots(int(flows['total_net'][i]))}\n"
+            "———————————————\n\n"
+        )
+
+        if (i + 1) % 10 == 0 or i + 1 == count:
+            result.append(TextSendMessage(text=group_text))
+            group_text = ""
+
+    return result
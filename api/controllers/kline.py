@@ -1,30 +1,31 @@
 from linebot.models import SendMessage, ImageSendMessage, TextSendMessage
 from crawler import TaiwanStockExchangeCrawler
 import utils
+from visualize import SERIES
 def controller(text: str) -> list[SendMessage]:
     """
     處理 /kline 指令，獲取期間內指定股票之K線圖
     """
     # 解析使用者輸入的文字，取得股票代號
     part = text.split(" ")
-    stock_no = part[1]
+    stock_no = TaiwanStockExchangeCrawler.resolve(part[1])
     start_date = part[2] if len(part) > 2 else utils.date.last_month()
     end_date = part[3] if len(part) > 3 else utils.date.today()
+    interval = part[4] if len(part) > 4 else "day"
     
-    stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=(start_date, end_date), only_fetch=["real_time","daily"])
+    stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=(start_date, end_date), only_fetch=["daily"])
     stock_data = stock.kline(
         date_range=(start_date, end_date),
+        interval=interval,
         )
      
     url = utils.url.generate_plot_url(
         type="kline",
-        title=stock_no + '-' + stock.get('股票簡稱')[0] + '-K線圖',
-        token= utils.data.compress_data(stock_data)
+        title=stock_no + '-' + TaiwanStockExchangeCrawler.name(stock_no) + '-K線圖',
+        series=SERIES.put(stock_data),
+        data=stock_data,
         )
         
-    if len(url) > 2000:
-        raise ValueError("❗資料量過大，超過圖表產生限制，請縮短日期範圍或區間方式再試一次 🙏")
-        
     return [
     TextSendMessage(
         text=(
@@ -36,6 +37,6 @@ def controller(text: str) -> list[SendMessage]:
     ),
     ImageSendMessage(
         original_content_url=url,
-        preview_image_url=url
+        preview_image_url=utils.url.preview_url(url)
     )
 ]
\ No newline at end of file
@@ -0,0 +1,55 @@
+from crawler import TaiwanStockExchangeCrawler
+from crawler.ingest import pending_report_days, report_series
+import utils
+from linebot.models import SendMessage, TextSendMessage
+
+
+def controller(text: str) -> list[SendMessage]:
+    """
+    處理 /margin 指令，查詢期間內每日融資融券餘額（由本地資料庫回覆，缺少的日期才整批匯入）
+    """
+    parts = text.strip().split()
+
+    stock_no = TaiwanStockExchangeCrawler.resolve(parts[1])
+    start_date = parts[2] if len(parts) > 2 else utils.date.days_ago(14)
+    end_date = parts[3] if len(parts) > 3 else utils.date.today()
+    start_date, end_date = utils.date.check_date_range((start_date, end_date))
+
+    margin = report_series("MI_MARGN", stock_no, start_date, end_date)
+    pending = pending_report_days("MI_MARGN", start_date, end_date)
+    if len(margin["date"]) == 0 and pending:
+        return [TextSendMessage(text=f"⏳ 期間內 {len(pending)} 個交易日的資料匯入中，請稍後再查詢")]
+    if len(margin["date"]) == 0:
+        return [TextSendMessage(text="查無融資融券資料，請確認股票代號與日期是否正確⚠️")]
+
+    # 整理文字內容（MI_MARGN 的單位為張）
+    result: list[SendMessage] = []
+    header = (
+        f"💳 股票代碼: {stock_no}-{TaiwanStockExchangeCrawler.name(stock_no)}\n"
+        f"（{start_date} ~ {end_date})\n"
+        f"融資融券餘額如下："
+    )
+    if pending:
+        header += f"\n⏳ 尚有 {len(pending)} 個交易日的資料匯入中，請稍後再查詢完整期間"
+    result.append(TextSendMessage(text=header))
+    group_text = ""
+    count = len(margin["date"])
+    for i in range(count):
+        margin_balance = int(margin["margin_balance"][i])
+        short_balance = int(margin["short_balance"][i])
+        margin_change = int(margin["margin_buy"][i] - margin["margin_sell"][i] - margin["margin_redeem"][i])
+        short_change = int(margin["short_sell"][i] - margin["short_buy"][i] - margin["short_redeem"][i])
+        ratio = f"{short_balance / margin_balance:.2%}" if margin_balance else "--"
+        group_text += (
+            f"📅 日期：{utils.date.datetime.strptime(str(margin['date'][i]), '%Y%m%d').strftime('%Y/%m/%d')}\n"
+            f"📈 融資餘額：{margin_balance:,} 張（{margin_change:+,}）\n"
+            f"📉 融券餘額：{short_balance:,} 張（{short_change:+,}）\n"
+            f"⚖️ 券資比：{ratio}\n"
+            "———————————————\n\n"
+        )
+
+        if (i + 1) % 10 == 0 or i + 1 == count:
+            result.append(TextSendMessage(text=group_text))
+            group_text = ""
+
+    return result
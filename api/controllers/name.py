@@ -5,15 +5,19 @@ def controller(text: str) -> list[SendMessage]:
     """
     處理 /name 指令，查詢股票名稱
     """
-    # 解析使用者輸入的文字，取得股票代號
+    # 解析使用者輸入的文字，取得股票代號（也可輸入名稱）
     part = text.split(" ")
-    stock_no = part[1]
+    stock_no = TaiwanStockExchangeCrawler.resolve(part[1])
     
-    stock = TaiwanStockExchangeCrawler.no(stock_no, only_fetch=["real_time"])
-
-    # 查詢股票名稱
-    stock_full_name = stock.get("股票全名")[0]
-    stock_short_name = stock.get("股票簡稱")[0] if stock.get("股票簡稱") else "無資料"
+    # 優先由本地代號目錄查詢，目錄沒有股票全名時才查詢即時資訊
+    symbol = TaiwanStockExchangeCrawler.DIRECTORY.get(stock_no) or {}
+    if symbol.get("full_name"):
+        stock_full_name = symbol["full_name"]
+        stock_short_name = symbol.get("name") or "無資料"
+    else:
+        real_time_data = TaiwanStockExchangeCrawler.real_time(stock_no)
+        stock_full_name = real_time_data.get("nf") or symbol.get("name") or "無資料"
+        stock_short_name = real_time_data.get("n") or symbol.get("name") or "無資料"
     
     # 回覆訊息列表
     return [
@@ -26,4 +30,4 @@ def controller(text: str) -> list[SendMessage]:
                 )
             )
         ]
-    
\ No newline at end of file
+    
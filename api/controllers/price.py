@@ -3,29 +3,50 @@ from linebot.models import SendMessage, TextSendMessage
 
 def controller(text: str) -> list[SendMessage]:
     """
-    處理 /price 指令，查詢股票即時價格
+    處理 /price 指令，查詢一檔或多檔股票即時價格
     """
-    # 解析使用者輸入的文字，取得股票代號
-    part = text.split(" ")
-    stock_no = part[1]
+    # 解析使用者輸入的文字，取得股票代號（可一次輸入多個，也可輸入名稱）
+    part = text.split()
+    stock_nos = list(dict.fromkeys(TaiwanStockExchangeCrawler.resolve(query) for query in part[1:]))
+    if not stock_nos:
+        raise IndexError("缺少股票代號")
 
-    # 查詢即時價格
-    try:
-        stock_price = round(float(TaiwanStockExchangeCrawler.no(stock_no, only_fetch=["real_time"]).get("目前成交價")[0]), 2)
-    except ValueError as e:
-        if "-" in str(e):
+    # 一次請求查詢所有股票的即時價格
+    real_time_data = TaiwanStockExchangeCrawler.real_time_many(stock_nos)
+
+    stock_prices: dict[str, float | None] = {}
+    for stock_no in stock_nos:
+        try:
+            stock_prices[stock_no] = round(float(real_time_data[stock_no]["z"]), 2)
+        except (KeyError, ValueError):
+            # 查無代號，或成交價為 "-"（尚未成交）
+            stock_prices[stock_no] = None
+
+    if len(stock_nos) == 1:
+        stock_no, stock_price = next(iter(stock_prices.items()))
+        if stock_price is None:
             return [
                 TextSendMessage(text="⚠️ 無法取得即時股價，可能是輸入錯誤、未開盤或今日無交易。")
                 ]
-        else:
-            raise ValueError(e)
-    # 回覆訊息列表
+        # 回覆訊息列表
+        return [
+                TextSendMessage(
+                        text=(
+                            f"📈 即時股價查詢\n"
+                            f"📌 股票代號：{stock_no}\n"
+                            f"💰 目前成交價：{stock_price:.2f}"
+                        )
+                    )
+                ]
+
+    lines = [
+        f"📌 {stock_no}-{real_time_data[stock_no].get('n', '')}：💰 {stock_price:.2f}"
+        if stock_price is not None else
+        f"📌 {stock_no}：⚠️ 無法取得即時股價"
+        for stock_no, stock_price in stock_prices.items()
+    ]
     return [
             TextSendMessage(
-                    text=(
-                        f"📈 即時股價查詢\n"
-                        f"📌 股票代號：{stock_no}\n"
-                        f"💰 目前成交價：{stock_price:.2f}"
-                    )
+                    text="📈 即時股價查詢\n" + "\n".join(lines)
                 )
-            ]
\ No newline at end of file
+            ]
@@ -1,18 +1,19 @@
 from linebot.models import SendMessage, ImageSendMessage, TextSendMessage
 from crawler import TaiwanStockExchangeCrawler
 import utils
+from visualize import SERIES
 def controller(text: str) -> list[SendMessage]:
     """
     處理 /volumebar 指令，獲取期間內收盤價趨勢圖
     """
     # 解析使用者輸入的文字，取得股票代號
     part = text.split(" ")
-    stock_no = part[1]
+    stock_no = TaiwanStockExchangeCrawler.resolve(part[1])
     start_date = part[2] if len(part) > 2 else utils.date.last_month()
     end_date = part[3] if len(part) > 3 else utils.date.today()
     interval = part[4] if len(part) > 4 else "day"
     
-    stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=(start_date, end_date), only_fetch=["real_time", "daily" if interval == "day" else "month_avg"])
+    stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=(start_date, end_date), only_fetch=["month_avg" if interval == "month" else "daily"])
     stock_data = stock.daily_field_transform(
         field="收盤價",
         interval=interval,
@@ -24,15 +25,13 @@ def controller(text: str) -> list[SendMessage]:
   
     url = utils.url.generate_plot_url(
         type="trend",
-        title=stock_no + '-' + stock.get('股票簡稱')[0] + '-收盤價趨勢圖',
+        title=stock_no + '-' + TaiwanStockExchangeCrawler.name(stock_no) + '-收盤價趨勢圖',
         x_label='日期',
         y_label='收盤價',
-        token= utils.data.compress_data(stock_data)
+        series=SERIES.put(stock_data),
+        data=stock_data,
         )
         
-    if len(url) > 2000:
-        raise ValueError("❗資料量過大，超過圖表產生限制，請縮短日期範圍或區間方式再試一次 🙏")
-        
     return [
     TextSendMessage(
         text=(
@@ -44,6 +43,6 @@ def controller(text: str) -> list[SendMessage]:
     ),
     ImageSendMessage(
         original_content_url=url,
-        preview_image_url=url
+        preview_image_url=utils.url.preview_url(url)
     )
 ]
\ No newline at end of file
@@ -0,0 +1,74 @@
+from crawler import TaiwanStockExchangeCrawler
+from crawler.ingest import start_backfill
+from crawler.screen import FIELD_LABELS, FIELD_WINDOWS, HISTORY_DAYS, Condition, history_needed, resolve_field, screen
+from linebot.models import SendMessage, TextSendMessage
+
+# 回覆的最多股票數
+MAX_TOP = 20
+
+
+def controller(text: str) -> list[SendMessage]:
+    """
+    處理 /screen 指令，以全市場快照篩選並排序股票
+
+    例：/screen change%>5 volume>1000 sort=volume top=10
+    """
+    parts = text.strip().split()[1:]
+    if not parts:
+        raise IndexError("缺少選股條件")
+
+    conditions: list[Condition] = []
+    sort_by = "change_pct"
+    top = 10
+    descending = True
+    for part in parts:
+        key, _, value = part.partition("=")
+        if key.lower() == "sort" and value:
+            sort_by = resolve_field(value)
+        elif key.lower() == "top" and value:
+            top = max(1, min(MAX_TOP, int(value)))
+        elif part.lower() == "asc":
+            descending = False
+        else:
+            conditions.append(Condition.parse(part))
+
+    # 只讀本地快照，收盤行情由背景的收盤後更新（crawler.prefetch）與補齊工作匯入，不佔用回覆時間
+    snapshot = TaiwanStockExchangeCrawler.SNAPSHOTS.get()
+    if snapshot is None:
+        start_backfill(HISTORY_DAYS)
+        return [TextSendMessage(text="⏳ 資料更新中，本地資料庫尚無收盤行情，已開始在背景匯入，請稍後再試")]
+
+    # 均線、均量需要足夠的歷史資料，不足時全部為缺值，不能當作「沒有股票符合」
+    fields = [field for condition in conditions for field in condition.fields] + [sort_by]
+    needed = history_needed(fields)
+    if snapshot.history < needed:
+        start_backfill(HISTORY_DAYS)
+        short = "、".join(dict.fromkeys(FIELD_LABELS[field] for field in fields if FIELD_WINDOWS.get(field, 1) > snapshot.history))
+        return [TextSendMessage(text=(
+            f"⚠️ 本地資料庫目前只有 {snapshot.history} 個交易日的收盤行情，"
+            f"{short} 需要 {needed} 個交易日\n"
+            f"已開始在背景補齊歷史資料，請稍後再試"
+        ))]
+
+    matched, rows = screen(snapshot, conditions, sort_by=sort_by, k=top, descending=descending)
+    header = (
+        f"🔎 全市場選股（{snapshot.date}，共 {len(snapshot)} 檔）\n"
+        f"📋 條件：{'、'.join(str(condition) for condition in conditions) or '無'}\n"
+        f"📊 排序：{FIELD_LABELS[sort_by]}（{'由大到小' if descending else '由小到大'}）\n"
+        f"✅ 符合：{matched} 檔"
+    )
+    if not rows:
+        return [TextSendMessage(text=header + "\n\n查無符合條件的股票⚠️")]
+
+    lines = []
+    for rank, (stock_no, values) in enumerate(rows, start=1):
+        name = TaiwanStockExchangeCrawler.DIRECTORY.name(stock_no) or ""
+        line = f"{rank}. {stock_no} {name}｜💰 {values['close']:.2f}｜{values['change_pct']:+.2f}%｜📦 {values['volume']:,.0f} 張"
+        if sort_by not in ("close", "change_pct", "volume"):
+            line += f"｜{FIELD_LABELS[sort_by]} {values[sort_by]:,.2f}"
+        lines.append(line)
+
+    return [
+        TextSendMessage(text=header),
+        TextSendMessage(text="\n".join(lines)),
+    ]
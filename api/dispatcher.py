@@ -0,0 +1,276 @@
+"""
+LINE 訊息事件的非同步處理
+
+webhook 只負責驗證簽章並將事件放入佇列，立即回應 200，避免查詢 TWSE 等耗時工作讓 LINE 逾時而重送事件。
+背景的執行緒池取出事件、產生回覆並以 reply token 回覆；處理超過 loading_delay 秒時顯示 LINE 的載入動畫。
+不同來源的事件同時處理，同一來源的事件依序處理。
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import requests
+from linebot import LineBotApi
+from linebot.exceptions import LineBotApiError
+from linebot.models import MessageEvent, SendMessage, TextSendMessage
+
+import utils
+
+logger = logging.getLogger(__name__)
+
+# LINE 顯示載入動畫的端點（僅支援一對一聊天）
+LOADING_URL = "https://api.line.me/v2/bot/chat/loading/start"
+
+
+def source_key(event: MessageEvent) -> str:
+    """事件來源的鍵（群組、聊天室或使用者），同一來源的事件需依序回覆。"""
+    source = event.source
+    for attr in ("group_id", "room_id", "user_id"):
+        value = getattr(source, attr, None)
+        if value:
+            return f"{attr}:{value}"
+    return f"event:{id(event)}"
+
+
+class PayloadTiming:
+    """
+    單一 webhook 內容的處理計時
+
+    記錄從收到到所有事件回覆完成的時間（wall），以及各事件處理時間的總和（busy）；
+    busy / wall 即為平行處理帶來的加速倍數。
+    """
+
+    def __init__(self, events: int):
+        self.events = events
+        self.remaining = events
+        self.busy_seconds = 0.0
+        self.received_at = time.time()
+        self.started = time.perf_counter()
+        self.done = threading.Event()
+        if not events:
+            self.done.set()
+
+    def to_dict(self, wall_seconds: float) -> dict[str, float | int]:
+        return {
+            "received_at": self.received_at,
+            "events": self.events,
+            "wall_seconds": round(wall_seconds, 4),
+            "busy_seconds": round(self.busy_seconds, 4),
+            "speedup": round(self.busy_seconds / wall_seconds, 2) if wall_seconds else 1.0,
+        }
+
+
+class ReplyDispatcher:
+    """
+    以固定數量的執行緒處理訊息事件的回覆
+
+    同一個 webhook 內容中的多個事件會同時處理；同一來源（使用者、群組或聊天室）的事件則依收到的順序逐一處理，
+    回覆順序與訊息順序一致。等待中的事件數達到上限時直接回覆忙碌訊息，不會讓 webhook 等待。
+    reply token 只能在收到事件後的一段時間內使用，超過 reply_window 秒才完成的回覆會放棄並記錄。
+    """
+
+    BUSY_MESSAGE = "🙇 目前查詢的人有點多，請稍後再試一次！"
+
+    def __init__(
+        self,
+        line_bot: LineBotApi,
+        handler: Callable[[str], list[SendMessage]],
+        access_token: Optional[str] = None,
+        workers: int = 4,
+        max_queue: int = 100,
+        loading_delay: float = 1.0,
+        loading_seconds: int = 20,
+        reply_window: float = 50.0,
+    ):
+        """
+        建立 ReplyDispatcher 物件。
+
+        參數:
+            line_bot (LineBotApi): 用於回覆訊息的 LINE Bot API。
+            handler (Callable[[str], list[SendMessage]]): 由訊息文字產生回覆的函式。
+            access_token (Optional[str]): 呼叫載入動畫端點的 channel access token，未設定時不顯示載入動畫。
+            workers (int): 處理事件的執行緒數。
+            max_queue (int): 等待處理的事件數上限。
+            loading_delay (float): 處理超過此秒數時顯示載入動畫。
+            loading_seconds (int): 載入動畫的顯示秒數（LINE 限定 5 ~ 60 之間 5 的倍數）。
+            reply_window (float): 收到事件後仍可使用 reply token 的秒數。
+        """
+        self.line_bot = line_bot
+        self.handler = handler
+        self.access_token = access_token
+        self.workers = workers
+        self.max_queue = max_queue
+        self.loading_delay = loading_delay
+        self.loading_seconds = max(5, min(60, loading_seconds // 5 * 5))
+        self.reply_window = reply_window
+        self.processed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.failed = 0
+        self.__pending: dict[str, deque[tuple[MessageEvent, PayloadTiming]]] = {}  # 來源 -> 等待中的事件
+        self.__queued = 0
+        self.__ready: queue.Queue[str] = queue.Queue()  # 可以處理下一個事件的來源
+        self.__payloads: deque[dict] = deque(maxlen=100)
+        self.__lock = threading.Lock()
+        self.__threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """啟動處理事件的執行緒（重複呼叫不會啟動第二組）。"""
+        with self.__lock:
+            if self.__threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self.__run, name=f"line-reply-{i}", daemon=True)
+                thread.start()
+                self.__threads.append(thread)
+
+    def dispatch(self, events: list[MessageEvent]) -> PayloadTiming:
+        """
+        將一個 webhook 內容中的文字訊息事件放入佇列。
+
+        參數:
+            events (list[MessageEvent]): 文字訊息事件，依收到的順序排列。
+
+        回傳:
+            PayloadTiming: 此內容的計時，可用 `done.wait()` 等待所有事件處理完成。
+        """
+        self.start()
+        payload = PayloadTiming(len(events))
+        busy: list[MessageEvent] = []
+        with self.__lock:
+            for event in events:
+                if self.__queued >= self.max_queue:
+                    busy.append(event)
+                    continue
+                key = source_key(event)
+                if key not in self.__pending:
+                    # 此來源目前沒有事件在處理，可立即交給執行緒
+                    self.__pending[key] = deque()
+                    self.__ready.put(key)
+                self.__pending[key].append((event, payload))
+                self.__queued += 1
+            self.rejected += len(busy)
+
+        for event in busy:
+            self.__reply(event, [TextSendMessage(text=self.BUSY_MESSAGE)])
+            self.__finish(payload, 0.0)
+        return payload
+
+    def submit(self, event: MessageEvent) -> bool:
+        """
+        將單一文字訊息事件放入佇列。
+
+        回傳:
+            bool: 是否成功放入佇列；佇列已滿時回覆忙碌訊息並回傳 False。
+        """
+        rejected = self.rejected
+        self.dispatch([event])
+        return self.rejected == rejected
+
+    def __run(self) -> None:
+        while True:
+            key = self.__ready.get()
+            with self.__lock:
+                event, payload = self.__pending[key].popleft()
+            start = time.perf_counter()
+            try:
+                self.process(event, payload.received_at)
+            except Exception as e:
+                with self.__lock:
+                    self.failed += 1
+                logger.exception("訊息處理失敗：%s", e)
+            finally:
+                with self.__lock:
+                    self.__queued -= 1
+                    if self.__pending[key]:
+                        self.__ready.put(key)  # 同一來源的下一個事件排到最後，讓其他來源也能輪到
+                    else:
+                        del self.__pending[key]
+                self.__finish(payload, time.perf_counter() - start)
+
+    def __finish(self, payload: PayloadTiming, seconds: float) -> None:
+        with self.__lock:
+            payload.busy_seconds += seconds
+            payload.remaining -= 1
+            if payload.remaining:
+                return
+            self.__payloads.append(payload.to_dict(time.perf_counter() - payload.started))
+        payload.done.set()
+
+    def process(self, event: MessageEvent, received_at: Optional[float] = None) -> None:
+        """
+        產生並送出單一事件的回覆，處理時間較長時顯示載入動畫。
+
+        參數:
+            event (MessageEvent): 文字訊息事件。
+            received_at (Optional[float]): 收到事件的時間，用於判斷 reply token 是否仍有效。
+        """
+        received_at = received_at or time.time()
+        timer = threading.Timer(self.loading_delay, self.show_loading, args=(event,))
+        timer.daemon = True
+        timer.start()
+        try:
+            messages = self.handler(event.message.text.strip())
+        finally:
+            timer.cancel()
+
+        if time.time() - received_at > self.reply_window:
+            with self.__lock:
+                self.expired += 1
+            logger.warning("回覆逾時，已超過 reply token 的有效時間：%r", event.message.text)
+            return
+        self.__reply(event, messages)
+        with self.__lock:
+            self.processed += 1
+
+    def __reply(self, event: MessageEvent, messages: list[SendMessage]) -> None:
+        try:
+            with utils.metrics.span("reply"):
+                self.line_bot.reply_message(event.reply_token, messages)
+        except LineBotApiError as e:
+            with self.__lock:
+                self.failed += 1
+            logger.error("回覆訊息失敗：%s", e)
+
+    def show_loading(self, event: MessageEvent) -> None:
+        """在一對一聊天中顯示載入動畫（群組與聊天室不支援，直接略過）。"""
+        if not self.access_token or getattr(event.source, "type", None) != "user":
+            return
+        try:
+            requests.post(
+                LOADING_URL,
+                headers={"Authorization": f"Bearer {self.access_token}"},
+                json={"chatId": event.source.user_id, "loadingSeconds": self.loading_seconds},
+                timeout=5,
+            )
+        except requests.exceptions.RequestException as e:
+            logger.warning("載入動畫顯示失敗：%s", e)
+
+    def stats(self) -> dict:
+        """
+        取得處理統計資料。
+
+        回傳:
+            dict: 包含 queued/sources/processed/rejected/expired/failed，以及最近的 webhook 內容計時（payloads）
+                與多事件內容的平均加速倍數（multi_event_speedup）。
+        """
+        with self.__lock:
+            payloads = list(self.__payloads)
+            result = {
+                "queued": self.__queued,
+                "sources": len(self.__pending),
+                "processed": self.processed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "failed": self.failed,
+            }
+        multi = [payload for payload in payloads if payload["events"] > 1]
+        result["multi_event_speedup"] = (
+            round(sum(p["busy_seconds"] for p in multi) / sum(p["wall_seconds"] for p in multi), 2)
+            if multi and sum(p["wall_seconds"] for p in multi) else None
+        )
+        result["payloads"] = payloads[::-1][:20]
+        return result
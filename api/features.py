@@ -5,7 +5,7 @@ from linebot.models import (
 
 from typing import Callable, Literal
 
-from .controllers import name, price, daily, kline, volumebar, pricetrend
+from .controllers import name, price, daily, kline, volumebar, pricetrend, indicator, institution, margin, screen
 
 
 FeatureHandler = Callable[[str], list[SendMessage]]
@@ -28,8 +28,9 @@ features: dict[str, dict[Literal["description", "format", "controller"], str | F
                 "2️⃣`?` 代表 可選參數 ，不一定要填寫唷！😘\n"
                 "3️⃣ 日期格式為 `YYYYMMDD`，例如：20250417\n"
                 "4️⃣ 日期沒給的話預設為今天喔💙\n"
-                "5️⃣ 間隔單位 分為 day、month 預設為 day\n"
+                "5️⃣ 間隔單位 分為 day、week、month、quarter、year 預設為 day\n"
                 "6️⃣ 若圖表無法顯示，請確認網路狀況或將網址貼到瀏覽器開啟試試看～\n"
+                "7️⃣ 股票代號也可以直接輸入名稱，例如：/price 台積電\n"
             )
         )
         ]
@@ -49,8 +50,8 @@ features: dict[str, dict[Literal["description", "format", "controller"], str | F
         "controller": name.controller
     },
     "/price": {
-        "description": "查詢即時股價",
-        "format": "/price <股票代號>",
+        "description": "查詢即時股價（可一次查詢多檔）",
+        "format": "/price <股票代號> <股票代號?> ...",
         "controller": price.controller
     },
     # 加入 features 中：
@@ -66,7 +67,7 @@ features: dict[str, dict[Literal["description", "format", "controller"], str | F
     },
     "/kline": {
         "description": "獲取期間內指定股票之K線圖",
-        "format": "/kline <股票代號> <起始日期?> <結束日期?>",
+        "format": "/kline <股票代號> <起始日期?> <結束日期?> <間隔單位?>",
         "controller": kline.controller
     },
     "/volumebar": {
@@ -74,4 +75,24 @@ features: dict[str, dict[Literal["description", "format", "controller"], str | F
         "format": "/volumebar <股票代號> <起始日期?> <結束日期?> <間隔單位?>",
         "controller": volumebar.controller
     },
+    "/indicator": {
+        "description": "獲取期間內指定股票之技術指標圖（ma、ema、rsi、macd、bb，可加週期如 ma20）",
+        "format": "/indicator <股票代號> <指標名稱> <起始日期?> <結束日期?>",
+        "controller": indicator.controller
+    },
+    "/institution": {
+        "description": "查詢期間內三大法人買賣超（預設近兩週）",
+        "format": "/institution <股票代號> <起始日期?> <結束日期?>",
+        "controller": institution.controller
+    },
+    "/margin": {
+        "description": "查詢期間內融資融券餘額（預設近兩週）",
+        "format": "/margin <股票代號> <起始日期?> <結束日期?>",
+        "controller": margin.controller
+    },
+    "/screen": {
+        "description": "全市場選股，可用欄位：close、change%、volume(張)、ma5/10/20/60、vol_ratio 等",
+        "format": "/screen <條件> <條件?> ... <sort=欄位?> <top=數量?> <asc?>\n例：/screen change%>5 volume>1000 close>ma20",
+        "controller": screen.controller
+    },
 }
\ No newline at end of file
@@ -7,8 +7,32 @@ from linebot.models import (
     MessageAction
 )
 
+import utils
+from crawler import TaiwanStockExchangeCrawler
+from crawler.prefetch import PREFETCHER
 from .features import features
 
+# 第二個參數為股票代號或名稱的指令，查詢後記錄到預先載入排程
+STOCK_COMMANDS = {"/name", "/daily", "/kline", "/pricetrend", "/volumebar", "/indicator", "/institution", "/margin"}
+
+
+def record_queries(cmd: str, text: str) -> None:
+    """
+    將指令查詢的股票記錄到預先載入排程，無法辨識的代號或名稱直接略過。
+    """
+    parts = text.split()
+    if cmd == "/price":
+        queries = parts[1:]
+    elif cmd in STOCK_COMMANDS:
+        queries = parts[1:2]
+    else:
+        return
+    for query in queries:
+        try:
+            PREFETCHER.record(TaiwanStockExchangeCrawler.resolve(query))
+        except ValueError:
+            continue
+
 def reply_handler(text: str) -> list[SendMessage]:
     """
     根據傳入的文字，取得對應的 LINE 回覆訊息。
@@ -20,7 +44,9 @@ def reply_handler(text: str) -> list[SendMessage]:
         if cmd in features:
             feature = features[cmd]
             try:
-                messages = feature["controller"](text)
+                with utils.metrics.command_context(cmd):
+                    messages = feature["controller"](text)
+                record_queries(cmd, text)
                 if len(messages) > 5:
                     return messages[:4] + [
                         TextSendMessage(text=(
@@ -1,107 +1,274 @@
 import io
+import logging
+import random
+import time
 from linebot import LineBotApi, WebhookHandler
 from linebot.exceptions import InvalidSignatureError
 from linebot.models import MessageEvent, TextMessage, TextSendMessage
-from flask import Flask, abort, request, send_file
+from flask import Flask, Response, abort, g, jsonify, request, send_file
 
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 import utils
-from visualize import Chart
+from crawler import TaiwanStockExchangeCrawler
+from crawler.prefetch import PREFETCHER
+from visualize import RENDERS, SERIES, Chart
+from .dispatcher import ReplyDispatcher
 from .reply_handler import reply_handler
 
 # 讀取 .env 環境變數
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# 請求內容只抽樣記錄（0 ~ 1 的比例，預設不記錄），並截斷至指定長度
+LOG_BODY_SAMPLE_RATE = float(os.getenv("LOG_BODY_SAMPLE_RATE", "0"))
+LOG_BODY_MAX_CHARS = int(os.getenv("LOG_BODY_MAX_CHARS", "2000"))
+
 # 初始化 LINE Bot API 與 Webhook Handler
 LINE_BOT = LineBotApi(os.getenv("LINE_CHANNEL_ACCESS_TOKEN"))
 WEBHOOK = WebhookHandler(os.getenv("LINE_CHANNEL_SECRET"))
 
+# 背景回覆訊息的執行緒池，數量與等待上限可透過環境變數調整
+DISPATCHER = ReplyDispatcher(
+    LINE_BOT,
+    reply_handler,
+    access_token=os.getenv("LINE_CHANNEL_ACCESS_TOKEN"),
+    workers=int(os.getenv("LINE_REPLY_WORKERS", "4")),
+    max_queue=int(os.getenv("LINE_REPLY_QUEUE", "100")),
+    loading_delay=float(os.getenv("LINE_LOADING_DELAY", "1")),
+    loading_seconds=int(os.getenv("LINE_LOADING_SECONDS", "20")),
+)
+# 無常駐程序的部署環境（如 Vercel，回應後函式即被凍結、背景執行緒不會繼續執行）預設等待回覆完成才回應，
+# 並且不啟動背景預先載入；可分別以 LINE_ASYNC_REPLY 與 TWSE_PREFETCH_ENABLED 覆寫
+SERVERLESS = bool(os.getenv("VERCEL"))
+ASYNC_REPLY = os.getenv("LINE_ASYNC_REPLY", "0" if SERVERLESS else "1") != "0"
+
 app = Flask(__name__) 
 
+# 背景預先載入熱門股票
+if os.getenv("TWSE_PREFETCH_ENABLED", "0" if SERVERLESS else "1") != "0":
+    PREFETCHER.start()
+
 @app.route("/", methods=["GET"])
 def index():
     return "The server is running!"
 
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_request(response: Response) -> Response:
+    if "started" in g:
+        utils.metrics.HTTP_SECONDS.observe(
+            time.perf_counter() - g.started,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method,
+            status=str(response.status_code),
+        )
+    return response
+
 @app.route("/webhook", methods=["POST"])
 def webhook():
-    header = request.headers
-    signature = header.get("X-Line-Signature")
+    signature = request.headers.get("X-Line-Signature")
     body = request.get_data(as_text=True)
-    
-    print("Received signature:", signature)
-    print("Request headers:", header)
-    print("Request body:", body)
+    if LOG_BODY_SAMPLE_RATE and random.random() < LOG_BODY_SAMPLE_RATE:
+        logger.info("Webhook body (%d chars): %s", len(body), body[:LOG_BODY_MAX_CHARS])
 
     try:
-        WEBHOOK.handle(body, signature)
+        with utils.metrics.span("signature"):
+            events = WEBHOOK.parser.parse(body, signature)
     except InvalidSignatureError:
-        print("❌ Signature verification failed")
+        logger.warning("❌ Signature verification failed")
         abort(400)
+
+    # 文字訊息事件整批交給背景執行緒：不同來源同時處理、同一來源依序處理，放入佇列後立即返回
+    with utils.metrics.span("dispatch"):
+        payload = DISPATCHER.dispatch([
+            event for event in events
+            if isinstance(event, MessageEvent) and isinstance(event.message, TextMessage)
+        ])
+    if not ASYNC_REPLY:
+        payload.done.wait()
     return "OK"
 
-# 處理文字訊息事件
-@WEBHOOK.add(MessageEvent, message=TextMessage)
-def handle_text_message(event: MessageEvent):
-    LINE_BOT.reply_message(
-        event.reply_token,
-        reply_handler(event.message.text.strip())
-    )
+def check_status_token():
+    # 設定 STATUS_TOKEN（或舊的 TWSE_PREFETCH_STATUS_TOKEN）時需以 ?token= 帶入相同的值
+    token = os.getenv("STATUS_TOKEN") or os.getenv("TWSE_PREFETCH_STATUS_TOKEN")
+    if token and request.args.get("token") != token:
+        abort(403)
+
+@app.route("/prefetch/status", methods=["GET"])
+def prefetch_status():
+    check_status_token()
+    return jsonify(PREFETCHER.status())
+
+@app.route("/webhook/status", methods=["GET"])
+def webhook_status():
+    check_status_token()
+    return jsonify(DISPATCHER.stats())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    check_status_token()
+    return Response(utils.metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@utils.metrics.REGISTRY.collector
+def collect_stats() -> list:
+    """輸出時才讀取各快取與回覆佇列的統計資料。"""
+    crawler = TaiwanStockExchangeCrawler
+    caches = {
+        "quote": crawler.QUOTES.stats(),
+        "report": crawler.CACHE.stats(),
+        "indicator": crawler.INDICATORS.stats(),
+        "plot": RENDERS.stats(),
+        "series": SERIES.stats(),
+    }
+    dispatcher = DISPATCHER.stats()
+    return [
+        ("dobujio_cache_hits_total", "counter", "各快取的命中次數",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("dobujio_cache_misses_total", "counter", "各快取的未命中次數",
+         # 技術指標快取的未命中分為整段重算（full）與只重算尾端（incremental）
+         [({"cache": name}, stats["misses"] if "misses" in stats else stats["full"] + stats["incremental"])
+          for name, stats in caches.items()]),
+        ("dobujio_cache_entries", "gauge", "各快取目前的項目數",
+         [({"cache": name}, stats["entries"]) for name, stats in caches.items() if "entries" in stats]),
+        ("dobujio_reply_events_total", "counter", "回覆佇列處理的事件數",
+         [({"result": key}, dispatcher[key]) for key in ("processed", "rejected", "expired", "failed")]),
+        ("dobujio_reply_queued", "gauge", "回覆佇列中等待處理的事件數", [({}, dispatcher["queued"])]),
+    ]
+
+def unpack_overlays(data: dict | list) -> tuple[list, Optional[dict], Optional[dict]]:
+    """
+    拆解圖表資料：一般為資料列表；帶有指標線時為 {"data": ..., "overlays": ..., "secondary": ...}。
+    """
+    if isinstance(data, dict):
+        return data.get("data", []), data.get("overlays"), data.get("secondary")
+    return data, None, None
+
+# 相同參數一定畫出相同的圖片，允許用戶端與 CDN 長期快取
+PLOT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PLOT_TYPES = ("trend", "kline", "bar")
+# 圖片版本：full 為完整圖表，preview 為 LINE 縮圖用的低解析度版本
+PLOT_VARIANTS = ("full", "preview")
 
 @app.route('/plot', methods=['GET'])
 def plot():
     # 取得查詢參數
     type = request.args.get('type')
+    title = request.args.get('title')
+    x_label = request.args.get('x_label')
+    y_label = request.args.get('y_label')
+    token = request.args.get('token')
+    series = request.args.get('series')
+    variant = request.args.get('variant', 'full')
+    if type not in PLOT_TYPES:
+        return "不支援的圖表類型", 400
+    if variant not in PLOT_VARIANTS:
+        return "不支援的圖片版本", 400
+
+    # 以參數的雜湊作為 ETag：用戶端已有相同的圖片時直接回應 304，快取中有圖片時不必重新繪圖
+    etag = RENDERS.key(type, variant, title, x_label, y_label, series, token)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        img_data = RENDERS.get(etag)
+        if img_data is None:
+            with utils.metrics.command_context(f"plot:{type}:{variant}"):
+                data = plot_data(series, token)
+                if data is None:
+                    return "圖表資料已過期，請重新查詢", 404
+                img_data = render_plot(type, title, x_label, y_label, data, preview=variant == "preview")
+            if img_data is None:
+                return "資料不足，無法繪圖", 400
+            RENDERS.put(etag, img_data)
+
+        response = send_file(
+            io.BytesIO(img_data),
+            mimetype='image/jpeg',
+            as_attachment=False,
+            download_name=f"{title}.jpg",
+            etag=False,
+            conditional=False,
+        )
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PLOT_CACHE_CONTROL
+    return response
+
+def plot_data(series: Optional[str], token: Optional[str]) -> Optional[dict | list]:
+    """
+    取得圖表資料：優先使用伺服器端保存的資料（series handle），已過期時改為解壓縮網址中的 token。
+
+    回傳:
+        Optional[dict | list]: 圖表資料，兩者皆無法取得時回傳 None。
+    """
+    if series:
+        data = SERIES.get(series)
+        if data is not None:
+            return data
+    if token:
+        return utils.data.decompress_data(token)
+    return None
+
+def render_plot(
+    type: str,
+    title: Optional[str],
+    x_label: Optional[str],
+    y_label: Optional[str],
+    data: dict | list,
+    preview: bool = False,
+) -> Optional[bytes]:
+    """
+    依圖表類型繪圖（preview 為 True 時繪製縮圖）。
+
+    回傳:
+        Optional[bytes]: 圖片的位元資料（JPEG 格式），若資料無效則回傳 None。
+    """
     match type:
         case "trend":
-            title = request.args.get('title')
-            x_label = request.args.get('x_label')
-            y_label = request.args.get('y_label')
-            token = request.args.get('token')
-            data = utils.data.decompress_data(token)
+            data, overlays, secondary = unpack_overlays(data)
             x_data = [d[0] for d in data]
             y_data = [d[1] for d in data]
 
-            img_data = Chart.trend(
-                title=title,
-                x_label=x_label,
-                y_label=y_label,
-                x_data=x_data,
-                y_data=y_data,
-            )
+            with utils.metrics.span("render"):
+                return Chart.trend(
+                    title=title,
+                    x_label=x_label,
+                    y_label=y_label,
+                    x_data=x_data,
+                    y_data=y_data,
+                    overlays=overlays,
+                    secondary=secondary,
+                    preview=preview,
+                )
         case "kline":
-            title = request.args.get('title')
-            token = request.args.get('token')
-            data = utils.data.decompress_data(token)
-            img_data = Chart.kline(
-                title=title,
-                data=data,
-            )
+            data, overlays, secondary = unpack_overlays(data)
+            with utils.metrics.span("render"):
+                return Chart.kline(
+                    title=title,
+                    data=data,
+                    overlays=overlays,
+                    secondary=secondary,
+                    preview=preview,
+                )
         case "bar":
-            title = request.args.get('title')
-            x_label = request.args.get('x_label')
-            y_label = request.args.get('y_label')
-            token = request.args.get('token')
-            data = utils.data.decompress_data(token)
             x_data = [d[0] for d in data]
             y_data = [d[1] for d in data]
-            img_data = Chart.bar(
-                title=title,
-                x_label=x_label,
-                y_label=y_label,
-                x_data=x_data,
-                y_data=y_data,
-            )
-        case _:
-            return "不支援的圖表類型", 400
-    
-    if img_data is None:
-        return "資料不足，無法繪圖", 400
-
-    return send_file(
-        io.BytesIO(img_data),
-        mimetype='image/jpeg',
-        as_attachment=False,
-        download_name=f"{title}.jpg"
-    )
\ No newline at end of file
+            with utils.metrics.span("render"):
+                return Chart.bar(
+                    title=title,
+                    x_label=x_label,
+                    y_label=y_label,
+                    x_data=x_data,
+                    y_data=y_data,
+                    preview=preview,
+                )
+    return None
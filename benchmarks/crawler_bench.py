@@ -0,0 +1,93 @@
+"""
+比較同步爬蟲與 asyncio 爬蟲在本地模擬伺服器上的效能。
+
+執行方式:
+    python -m benchmarks.crawler_bench --symbols 10 --start 20250101 --end 20250630 --latency 0.1
+    python -m benchmarks.crawler_bench --latency 0.05 --jitter 0.05 --error-rate 0.05 --seed 1
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Callable
+
+from crawler import TaiwanStockExchangeCrawler
+from crawler.aio import AsyncTaiwanStockExchangeCrawler
+from crawler.backend import MemoryBackend, SQLiteBackend, TieredBackend
+from crawler.cache import ReportCache
+from crawler.quotes import QuoteCache
+from crawler.throttle import RateLimiter
+
+from .stub_server import StubTWSEServer
+
+SAMPLE_SYMBOLS = ["2330", "2317", "2454", "2308", "2382", "2412", "2881", "2882", "2891", "1301",
+                  "1303", "2002", "2303", "3711", "2886", "2884", "1216", "2603", "3008", "5880"]
+
+
+def reset_crawler(server: StubTWSEServer, tmp_dir: str) -> None:
+    """將爬蟲指向模擬伺服器，並換上全新的快取後端與速率限制，確保每次測試條件相同。"""
+    backend = TieredBackend(
+        MemoryBackend(),
+        SQLiteBackend(os.path.join(tempfile.mkdtemp(dir=tmp_dir), "cache.sqlite3")),
+    )
+    TaiwanStockExchangeCrawler.URLS = server.urls()
+    TaiwanStockExchangeCrawler.CACHE = ReportCache(backend)
+    TaiwanStockExchangeCrawler.QUOTES = QuoteCache(backend=backend)
+    TaiwanStockExchangeCrawler.RATE_LIMITER = RateLimiter(rate=1_000_000, burst=1_000_000)
+
+
+def run_sync(symbols: list[str], date_range: tuple[str, str]) -> None:
+    for stock_no in symbols:
+        stock = TaiwanStockExchangeCrawler.no(stock_no, date_range=date_range, only_fetch=["daily", "real_time"])
+        # Stock 為延遲載入，需等待資料群組載入完成才是完整的抓取時間
+        stock.load("daily")
+        stock.load("real_time")
+
+
+def run_async(symbols: list[str], date_range: tuple[str, str], concurrency: int) -> None:
+    async def main():
+        async with AsyncTaiwanStockExchangeCrawler(concurrency=concurrency) as crawler:
+            await asyncio.gather(*(
+                crawler.no(stock_no, date_range=date_range, only_fetch=["daily", "real_time"])
+                for stock_no in symbols
+            ))
+    asyncio.run(main())
+
+
+def measure(name: str, func: Callable[[], None], server: StubTWSEServer, tmp_dir: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        reset_crawler(server, tmp_dir)
+        requests_before = server.requests
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+    print(f"{name:<8} best {best:8.3f}s  ({server.requests - requests_before} requests/run)")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="同步與 asyncio 爬蟲效能比較")
+    parser.add_argument("--symbols", type=int, default=10, help="股票檔數（最多 20）")
+    parser.add_argument("--start", default="20250101")
+    parser.add_argument("--end", default="20250630")
+    parser.add_argument("--latency", type=float, default=0.05, help="模擬伺服器每個請求的延遲秒數")
+    parser.add_argument("--jitter", type=float, default=0.0, help="模擬伺服器額外隨機延遲的上限秒數")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模擬伺服器回傳 5xx 錯誤的請求比例")
+    parser.add_argument("--seed", type=int, default=0, help="延遲與錯誤注入的亂數種子")
+    parser.add_argument("--concurrency", type=int, default=16, help="asyncio 爬蟲同時進行的請求上限")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    symbols = SAMPLE_SYMBOLS[:args.symbols]
+    date_range = (args.start, args.end)
+
+    with tempfile.TemporaryDirectory() as tmp_dir, StubTWSEServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed,
+    ) as server:
+        print(f"{len(symbols)} symbols, {date_range[0]} ~ {date_range[1]}, latency {args.latency}s")
+        sync_time = measure("sync", lambda: run_sync(symbols, date_range), server, tmp_dir, args.repeat)
+        async_time = measure("async", lambda: run_async(symbols, date_range, args.concurrency), server, tmp_dir, args.repeat)
+        print(f"speedup  {sync_time / async_time:.2f}x")
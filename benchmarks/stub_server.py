@@ -0,0 +1,280 @@
+"""
+模擬 TWSE 的本地測試伺服器，以 `json/example/` 中的範例資料回應，供效能測試離線使用。
+
+執行方式:
+    python -m benchmarks.stub_server --port 8000 --latency 0.1 --jitter 0.05 --error-rate 0.1
+
+搭配 `TWSE_CASSETTE_MODE=record` 可將模擬伺服器（或實際 TWSE）的回應錄製為 cassette，之後以 replay 模式離線重播。
+"""
+import argparse
+import copy
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+EXAMPLE_DIR = "json/example"
+
+
+def load_example(name: str) -> dict:
+    with open(f"{EXAMPLE_DIR}/{name}", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class StubTWSEServer:
+    """
+    模擬 TWSE 的本地 HTTP 伺服器
+
+    支援 `exchangeReport/STOCK_DAY`、`exchangeReport/STOCK_DAY_AVG`、`exchangeReport/MI_INDEX` 與 `getStockInfo.jsp`。
+    每個請求會先等待 latency 秒（加上 0 ~ jitter 秒的隨機延遲），以模擬實際的網路往返時間；
+    並可依比例注入 HTTP 錯誤（error_rate）或 TWSE 的查無資料回應（api_error_rate），測試重試與錯誤處理。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        api_error_rate: float = 0.0,
+        market_size: int = 1000,
+        seed: Optional[int] = None,
+    ):
+        """
+        建立 StubTWSEServer 物件。
+
+        參數:
+            host (str): 監聽位址。
+            port (int): 監聽埠號，0 表示自動選擇。
+            latency (float): 每個請求的模擬延遲秒數。
+            jitter (float): 額外隨機延遲的上限秒數。
+            error_rate (float): 回傳 HTTP 錯誤（error_status）的請求比例。
+            error_status (int): 注入錯誤時的 HTTP 狀態碼，5xx 會觸發爬蟲重試。
+            api_error_rate (float): 回傳 TWSE 查無資料（stat 不是 OK）的請求比例。
+            market_size (int): MI_INDEX 每日收盤行情的股票數。
+            seed (Optional[int]): 延遲與錯誤注入的亂數種子，設定後每次執行的結果相同。
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.api_error_rate = api_error_rate
+        self.market_size = market_size
+        self.requests = 0
+        self.injected_errors = 0
+        self.paths: dict[str, int] = {}
+        self.daily = load_example("daily_success.json")
+        self.daily_error = load_example("daily_err.json")
+        self.month_avg = load_example("month_avg.json")
+        self.real_time = load_example("rtm_success.json")
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self) -> dict[str, str]:
+        """
+        回傳可直接取代 `TaiwanStockExchangeCrawler.URLS` 的網址表。
+        """
+        return {
+            "交易報表": f"{self.base_url}/exchangeReport",
+            "法人報表": f"{self.base_url}/fund",
+            "即時資訊": f"{self.base_url}/stock/api/getStockInfo.jsp",
+            "股票代號": f"{self.base_url}/isin/C_public.jsp",
+        }
+
+    def start(self) -> "StubTWSEServer":
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> "StubTWSEServer":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def stock_day(self, date: str, stock_no: str) -> dict:
+        """以範例資料產生指定月份的 STOCK_DAY 回應（日期為民國格式）。"""
+        data = copy.deepcopy(self.daily)
+        year, month = int(date[:4]), int(date[4:6])
+        for row in data["data"]:
+            row[0] = f"{year - 1911}/{month:02}/{row[0][-2:]}"
+        data["date"] = date
+        data["title"] = f"{year - 1911}年{month:02}月 {stock_no} 各日成交資訊"
+        return data
+
+    def stock_day_avg(self, date: str, stock_no: str) -> dict:
+        """以範例資料產生指定月份的 STOCK_DAY_AVG 回應。"""
+        data = copy.deepcopy(self.month_avg)
+        year, month = int(date[:4]), int(date[4:6])
+        for row in data["data"][:-1]:
+            row[0] = f"{year - 1911}/{month:02}/{row[0][-2:]}"
+        data["date"] = date
+        return data
+
+    def stock_info(self, ex_ch: str) -> dict:
+        """以範例資料產生多檔股票的即時資訊回應。"""
+        data = copy.deepcopy(self.real_time)
+        template = data["msgArray"][0]
+        data["msgArray"] = []
+        for channel in filter(None, ex_ch.split("|")):
+            stock_no = channel.split("_", 1)[-1].rsplit(".", 1)[0]
+            item = dict(template)
+            item.update({"c": stock_no, "ch": f"{stock_no}.tw", "@": f"{stock_no}.tw"})
+            data["msgArray"].append(item)
+        return data
+
+    @staticmethod
+    def market_close(stock_no: str, day: datetime) -> float:
+        """模擬股票在某日的收盤價：以代號決定基準價，隨日期平滑起伏，同一天的結果固定。"""
+        base = 10 + int(stock_no) % 990
+        phase = int(stock_no) % 97
+        return round(base * (1 + 0.1 * math.sin(day.toordinal() / 15 + phase)), 2)
+
+    def market_index(self, date: str) -> dict:
+        """
+        產生指定日期全市場的 MI_INDEX 收盤行情（新版 "tables" 格式），週末回傳查無資料。
+        """
+        try:
+            day = datetime.strptime(date, "%Y%m%d")
+        except ValueError:
+            return copy.deepcopy(self.daily_error)
+        if day.weekday() >= 5:
+            return copy.deepcopy(self.daily_error)
+
+        previous = datetime.fromordinal(day.toordinal() - (3 if day.weekday() == 0 else 1))
+        fields = ["證券代號", "證券名稱", "成交股數", "成交筆數", "成交金額", "開盤價", "最高價",
+                  "最低價", "收盤價", "漲跌(+/-)", "漲跌價差", "最後揭示買價", "最後揭示賣價", "本益比"]
+        rows = []
+        for i in range(self.market_size):
+            stock_no = str(1101 + i)
+            close = self.market_close(stock_no, day)
+            change = round(close - self.market_close(stock_no, previous), 2)
+            volume = 1000 * (100 + (int(stock_no) * 7919 + day.toordinal()) % 20000)
+            sign = "<p style= color:red>+</p>" if change > 0 else "<p style= color:green>-</p>" if change < 0 else ""
+            rows.append([
+                stock_no, f"模擬{stock_no}", f"{volume:,}", f"{volume // 2000:,}", f"{round(volume * close):,}",
+                f"{close - change:.2f}", f"{max(close, close - change) * 1.01:.2f}", f"{min(close, close - change) * 0.99:.2f}",
+                f"{close:.2f}", sign, f"{abs(change):.2f}", f"{close - 0.05:.2f}", f"{close:.2f}", "15.00",
+            ])
+        return {
+            "stat": "OK",
+            "date": date,
+            "tables": [
+                {"title": f"{day.year - 1911}年{day.month:02}月{day.day:02}日 大盤統計資訊", "fields": ["指數", "收盤指數"], "data": []},
+                {"title": f"{day.year - 1911}年{day.month:02}月{day.day:02}日 每日收盤行情(全部(不含權證、牛熊證))", "fields": fields, "data": rows},
+            ],
+        }
+
+    def inject(self) -> Optional[tuple[int, dict]]:
+        """依設定的比例決定是否注入錯誤，回傳錯誤回應或 None。"""
+        with self.__lock:
+            roll = self.__random.random()
+            if roll < self.error_rate:
+                self.injected_errors += 1
+                return self.error_status, {"stat": "Service Unavailable"}
+            if roll < self.error_rate + self.api_error_rate:
+                self.injected_errors += 1
+                return 200, copy.deepcopy(self.daily_error)
+        return None
+
+    def count(self, path: str) -> None:
+        with self.__lock:
+            self.requests += 1
+            self.paths[path] = self.paths.get(path, 0) + 1
+
+    def delay(self) -> float:
+        with self.__lock:
+            return self.latency + (self.__random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        """取得請求統計：總請求數、注入的錯誤數與各路徑的請求數。"""
+        with self.__lock:
+            return {"requests": self.requests, "injected_errors": self.injected_errors, "paths": dict(self.paths)}
+
+    def route(self, path: str, query: dict[str, str]) -> tuple[int, dict]:
+        """依路徑產生 (HTTP 狀態碼, 回應 JSON)。"""
+        if path.endswith("/MI_INDEX"):
+            return 200, self.market_index(query.get("date", ""))
+        if path.endswith("/STOCK_DAY"):
+            return 200, self.stock_day(query.get("date", ""), query.get("stockNo", ""))
+        if path.endswith("/STOCK_DAY_AVG"):
+            return 200, self.stock_day_avg(query.get("date", ""), query.get("stockNo", ""))
+        if path.endswith("/getStockInfo.jsp"):
+            return 200, self.stock_info(query.get("ex_ch", ""))
+        return 404, {"stat": "Not Found"}
+
+    def __handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                stub.count(parts.path)
+                delay = stub.delay()
+                if delay:
+                    time.sleep(delay)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                status, data = stub.inject() or stub.route(parts.path, query)
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模擬 TWSE 的本地測試伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="每個請求的模擬延遲秒數")
+    parser.add_argument("--jitter", type=float, default=0.0, help="額外隨機延遲的上限秒數")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="回傳 HTTP 錯誤的請求比例")
+    parser.add_argument("--error-status", type=int, default=503, help="注入錯誤時的 HTTP 狀態碼")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="回傳查無資料的請求比例")
+    parser.add_argument("--market-size", type=int, default=1000, help="MI_INDEX 每日收盤行情的股票數")
+    parser.add_argument("--seed", type=int, default=None, help="延遲與錯誤注入的亂數種子")
+    args = parser.parse_args()
+
+    server = StubTWSEServer(
+        args.host, args.port, args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        api_error_rate=args.api_error_rate,
+        market_size=args.market_size,
+        seed=args.seed,
+    )
+    print(f"Stub TWSE server running at {server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
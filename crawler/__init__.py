@@ -1,5 +1,15 @@
+from .errors import APIError, CrawlerError, NoDataError, RequestFailedError, RequestTimeoutError, ResponseFormatError
 from .stock import Stock
 from .twse import TaiwanStockExchangeCrawler
 
 
-__all__ = ["Stock", "TaiwanStockExchangeCrawler"]
+__all__ = [
+    "Stock",
+    "TaiwanStockExchangeCrawler",
+    "CrawlerError",
+    "RequestTimeoutError",
+    "RequestFailedError",
+    "ResponseFormatError",
+    "APIError",
+    "NoDataError",
+]
@@ -0,0 +1,301 @@
+import asyncio
+import os
+import time
+from typing import Literal, Optional
+
+import aiohttp
+
+import utils
+from .errors import APIError, RequestFailedError, RequestTimeoutError, ResponseFormatError
+from .models import DAILY_DATA, MONTH_AVG, REAL_TIME
+from .session import SESSIONS
+from .stock import Stock
+from .twse import TaiwanStockExchangeCrawler
+
+
+class AsyncTaiwanStockExchangeCrawler:
+    """
+    台灣證券交易所資料爬蟲（asyncio 版本）
+
+    與 `TaiwanStockExchangeCrawler` 共用網址與請求參數、報表與報價快取、本地資料庫與請求速率限制，
+    回傳相同的 `Stock` 物件，但以 aiohttp 的連線池非同步發送請求，可在單一執行緒中同時抓取多檔股票與多個月份。
+    快取與資料庫（SQLite）的存取以 `asyncio.to_thread` 在執行緒中進行，不會阻塞事件迴圈。
+
+    使用方式:
+        async with AsyncTaiwanStockExchangeCrawler() as crawler:
+            stocks = await asyncio.gather(crawler.no("2330"), crawler.no("2317"))
+    """
+
+    SYNC = TaiwanStockExchangeCrawler
+
+    def __init__(self, pool_size: Optional[int] = None, concurrency: Optional[int] = None):
+        """
+        建立 AsyncTaiwanStockExchangeCrawler 物件。
+
+        參數:
+            pool_size (Optional[int]): 每個主機的最大連線數，預設同 TWSE_POOL_SIZE。
+            concurrency (Optional[int]): 同時進行的請求上限，預設同 TWSE_MAX_WORKERS。
+        """
+        self.pool_size = pool_size or int(os.getenv("TWSE_POOL_SIZE", "10"))
+        self.concurrency = concurrency or int(os.getenv("TWSE_MAX_WORKERS", "4"))
+        self.__semaphore = asyncio.Semaphore(self.concurrency)
+        self.__session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncTaiwanStockExchangeCrawler":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.SYNC.TIMEOUT),
+                headers=self.SYNC.headers,
+            )
+        return self.__session
+
+    async def close(self) -> None:
+        """關閉連線池。"""
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    async def fetch(self, url: str, params: Optional[dict] = None) -> dict:
+        """
+        非同步發送請求並解析 JSON，逾時、連線失敗或 5xx 時以抖動退避重試。
+
+        參數：
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+
+        回傳：
+            dict: 解析後的 JSON 資料。
+
+        拋出：
+            - RequestTimeoutError: 若 TIMEOUT 秒內（包含重試與等待請求配額）仍無法完成。
+            - RequestFailedError: 若連線失敗或 HTTP 狀態碼非成功。
+            - ResponseFormatError: 若回傳內容無法解析為 JSON 或格式不符。
+            - APIError: 若 API 回傳狀態不是 OK。
+        """
+        # cassette 的讀寫為檔案 I/O，於執行緒中進行
+        cassettes = self.SYNC.CASSETTES
+        cassette = await asyncio.to_thread(cassettes.play, url, params)
+        if cassette is not None:
+            if "json" not in cassette:
+                raise ResponseFormatError(f"無法解析 JSON：{cassette.get('text', '')[:200]}")
+            return self.SYNC.check_response(cassette["json"], params)
+
+        deadline = time.monotonic() + self.SYNC.TIMEOUT
+        session = self.__get_session()
+        error: Optional[Exception] = None
+        async with self.__semaphore:
+            for attempt in range(SESSIONS.max_retries + 1):
+                if attempt:
+                    delay = SESSIONS.backoff(attempt - 1)
+                    if time.monotonic() + delay >= deadline:
+                        break
+                    await asyncio.sleep(delay)
+                # 與同步版相同：每次嘗試（包含重試）都取得請求配額，合計不超過 TIMEOUT 秒
+                try:
+                    await self.SYNC.RATE_LIMITER.acquire_async(timeout=max(0.0, deadline - time.monotonic()))
+                except TimeoutError:
+                    raise RequestTimeoutError("請求過於頻繁，請稍後再試")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=remaining)) as response:
+                        if response.status >= 500:
+                            error = RequestFailedError(f"伺服器錯誤：{url} 回傳 {response.status}", response.status)
+                            continue
+                        if response.status >= 400:
+                            raise RequestFailedError(f"請求失敗：{url} 回傳 {response.status}", response.status)
+                        text = await response.text()
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            await asyncio.to_thread(cassettes.record, url, params, text=text)
+                            raise ResponseFormatError(f"無法解析 JSON：{text[:200]}")
+                        await asyncio.to_thread(cassettes.record, url, params, data=data)
+                        return self.SYNC.check_response(data, params)
+                except asyncio.TimeoutError as e:
+                    error = RequestTimeoutError(f"請求逾時：{url}（{e}）")
+                except aiohttp.ClientError as e:
+                    error = RequestFailedError(f"連線失敗：{url}（{e}）")
+            raise error or RequestTimeoutError(f"請求逾時：{url}（超過 {self.SYNC.TIMEOUT} 秒）")
+
+    async def month_report(
+        self,
+        report_code: Literal["STOCK_DAY", "STOCK_DAY_AVG"],
+        date: str,
+        stock_no: str,
+        response_format: str = "json"
+    ) -> DAILY_DATA:
+        """
+        取得單一股票單一月份的報表，已結束的月份優先由本地快取讀取。
+
+        參數：
+            report_code (str): 報表代號，"STOCK_DAY" 或 "STOCK_DAY_AVG"。
+            date (str): 查詢月份中的任一日期，格式為 'YYYYMMDD'。
+            stock_no (str): 股票代號。
+            response_format (str): 回傳資料格式，預設為 "json"。
+
+        回傳：
+            DAILY_DATA: 該月份的欄位與資料列（日期已轉為西元）。
+        """
+        cached = await asyncio.to_thread(self.SYNC.CACHE.get, report_code, stock_no, date)
+        if cached is not None:
+            return cached
+
+        if report_code == "STOCK_DAY" and not self.SYNC.CACHE.is_closed(date):
+            stored = await asyncio.to_thread(self.SYNC.stored_month, date, stock_no)
+            if stored is not None:
+                return stored
+
+        data = await self.fetch(*self.SYNC.month_request(report_code, date, stock_no, response_format))
+        result = self.SYNC.parse_month_report(data)
+        await asyncio.to_thread(self.store_month, report_code, date, stock_no, result)
+        return result
+
+    def store_month(self, report_code: str, date: str, stock_no: str, result: DAILY_DATA) -> None:
+        """寫入報表快取，並與同步版本相同地以 STOCK_DAY 回補本地資料庫（於執行緒中執行）。"""
+        self.SYNC.CACHE.put(report_code, stock_no, date, result)
+        if report_code == "STOCK_DAY":
+            self.SYNC.STORE.put_daily_data(stock_no, result)
+
+    async def report(
+        self,
+        report_name: TaiwanStockExchangeCrawler.REPORTS_KEYS,
+        date_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+        stock_no: Optional[str] = None,
+        response_format: str = "json"
+    ) -> DAILY_DATA | MONTH_AVG:
+        """
+        非同步抓取指定報表，各月份同時發送並依月份順序合併。參數與回傳同 `TaiwanStockExchangeCrawler.report`。
+
+        拋出：
+            - ValueError: 若報表名稱無效。
+            - RequestTimeoutError: 若超過 `TIMEOUT` 秒仍未全部完成。
+        """
+        if report_name not in self.SYNC.REPORTS:
+            raise ValueError(f"找不到報表名稱：{report_name}")
+
+        report_code: str = self.SYNC.REPORTS[report_name]
+
+        match report_code:
+            case "STOCK_DAY" | "STOCK_DAY_AVG":
+                date_range = utils.date.check_date_range(date_range)
+                months = utils.date.month_range(*date_range)
+                try:
+                    reports = await asyncio.wait_for(
+                        asyncio.gather(*(
+                            self.month_report(report_code, date, stock_no, response_format)
+                            for date in months
+                        )),
+                        timeout=self.SYNC.TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    raise RequestTimeoutError("請求時間過長，請減少查詢範圍")
+                return self.SYNC.merge_month_reports(report_code, months, reports)
+
+            case "MI_INDEX" | "T86" | "MI_MARGN" | "MI_INDEX20":
+                return await self.fetch(*self.SYNC.daily_report_request(report_code, date_range, response_format))
+
+            case _:
+                raise RuntimeError(f"不應該運行至這段：{report_code}")
+
+    async def month_averages(
+        self,
+        stock_no: str,
+        date_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+    ) -> MONTH_AVG:
+        """
+        非同步取得期間內各月份的平均收盤價。與同步版本相同，本地已有完整每日資料的月份直接計算（於執行緒中進行），
+        只有缺少的月份才同時向 TWSE 請求 STOCK_DAY_AVG。參數與回傳同 `TaiwanStockExchangeCrawler.month_averages`。
+
+        拋出：
+            - RequestTimeoutError: 若超過 `TIMEOUT` 秒仍未全部完成。
+        """
+        months = utils.date.month_range(*utils.date.check_date_range(date_range))
+        result, missing = await asyncio.to_thread(self.SYNC.local_month_averages, stock_no, months)
+        if missing:
+            try:
+                reports = await asyncio.wait_for(
+                    asyncio.gather(*(self.month_report("STOCK_DAY_AVG", month, stock_no) for month in missing)),
+                    timeout=self.SYNC.TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                raise RequestTimeoutError("請求時間過長，請減少查詢範圍")
+            result.update(self.SYNC.merge_month_reports("STOCK_DAY_AVG", missing, reports))
+        return dict(sorted(result.items()))
+
+    async def real_time_many(self, stock_nos: list[str]) -> dict[str, REAL_TIME]:
+        """
+        非同步批次取得多檔股票的即時資料，與同步版本共用短效報價快取。
+
+        參數：
+            stock_nos (list[str]): 股票代號清單。
+
+        回傳：
+            dict[str, REAL_TIME]: 股票代號 -> 即時資料，查無資料的代號不會出現在結果中。
+        """
+        stock_nos = list(dict.fromkeys(stock_nos))
+        result = await self.SYNC.QUOTES.get_many_async(stock_nos, self.fetch_real_time, timeout=self.SYNC.TIMEOUT)
+        await asyncio.to_thread(self.SYNC.remember_names, result)
+        return result
+
+    async def fetch_real_time(self, stock_nos: list[str]) -> dict[str, REAL_TIME]:
+        """
+        不經快取，直接向 MIS 非同步批次抓取多檔股票的即時資料。
+
+        參數：
+            stock_nos (list[str]): 股票代號清單。
+
+        回傳：
+            dict[str, REAL_TIME]: 股票代號 -> 即時資料，查無資料的代號不會出現在結果中。
+        """
+        responses = await asyncio.gather(*(
+            self.fetch(self.SYNC.URLS["即時資訊"], params)
+            for params in self.SYNC.real_time_params(stock_nos)
+        ))
+        return self.SYNC.merge_real_time(responses)
+
+    async def real_time(self, stock_no: str) -> REAL_TIME:
+        """
+        非同步取得指定股票代號即時資料。
+
+        拋出：
+            - APIError: 若查無該股票的即時資料。
+        """
+        result = await self.real_time_many([stock_no])
+        if stock_no not in result:
+            raise APIError(f"查無即時資料：{stock_no}")
+        return result[stock_no]
+
+    async def no(
+        self,
+        stock_no: str,
+        date_range: Optional[tuple[str, str]] = None,
+        only_fetch: Optional[list[Literal["daily", "real_time", "month_avg"]]] = None
+    ) -> Stock:
+        """
+        非同步取得指定股票代號的資料，各資料來源同時抓取。參數與回傳同 `TaiwanStockExchangeCrawler.no`。
+        """
+        async def nothing() -> None:
+            return None
+
+        real_time_data, daily_data, month_avg_data = await asyncio.gather(
+            self.real_time(stock_no) if not only_fetch or "real_time" in only_fetch else nothing(),
+            self.report("個股每日歷史交易資料", date_range, stock_no) if not only_fetch or "daily" in only_fetch else nothing(),
+            self.month_averages(stock_no, date_range) if not only_fetch or "month_avg" in only_fetch else nothing(),
+        )
+
+        stock = Stock(stock_no)
+        stock.set_data(
+            real_time_data=real_time_data,
+            daily_data=daily_data,
+            month_avg_data=month_avg_data,
+        )
+        return stock
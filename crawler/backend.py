@@ -0,0 +1,467 @@
+"""
+爬蟲資料的快取後端
+
+以 (資料種類, 鍵) 保存任意可 JSON 序列化的值，每個種類可設定存活秒數（TTL）。
+- MemoryBackend：單一行程內的 LRU 快取。
+- SQLiteBackend：同一台主機上所有行程（如 gunicorn 的多個 worker）共用的 SQLite 資料庫（WAL 模式）。
+- TieredBackend：先查記憶體，未命中再查 SQLite，並將結果回填記憶體。
+- LazyBackend：第一次使用時才建立實際的後端，建立失敗（如唯讀的檔案系統）時改用備援的後端。
+
+批次讀寫（get_many / put_many）在 SQLite 中只使用一個交易，查詢整段期間時不會逐筆存取資料庫。
+快取中的值應視為唯讀，呼叫端需要修改時請先複製。
+"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 鍵 -> (值, 過期時間)；過期時間為 None 表示永久有效
+ENTRY = tuple[Any, Optional[float]]
+
+# SQLite 單一查詢可使用的參數數量有限，批次查詢時分段
+SQLITE_BATCH_SIZE = 500
+
+# 本地資料庫的預設資料夾：無伺服器環境（如 Vercel）只有暫存資料夾可寫入，可透過 DOBUJIO_DATA_DIR 指定
+DATA_DIR = os.getenv("DOBUJIO_DATA_DIR") or os.path.join(tempfile.gettempdir(), "dobujio")
+
+
+def data_path(name: str) -> str:
+    """本地資料庫檔案的預設路徑。"""
+    return os.path.join(DATA_DIR, name)
+
+
+class CacheBackend:
+    """
+    快取後端的共用介面
+
+    子類別實作 `get_entries`、`put_entries`、`delete_many`、`clear`、`count` 與 `stats`，
+    其餘方法（get_many、put_many、get、put）建構在這些方法之上。
+    """
+
+    # 寫入的資料是否能被同一台主機上的其他行程讀取
+    cross_process = False
+
+    def __init__(self, ttls: Optional[dict[str, Optional[float]]] = None):
+        """
+        參數:
+            ttls (Optional[dict[str, Optional[float]]]): 各資料種類預設的存活秒數，None 或未設定表示永久有效。
+        """
+        self.ttls = dict(ttls or {})
+
+    def expires_at(self, kind: str, ttl: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        """依 ttl（未指定時使用種類的預設值）計算過期時間。"""
+        ttl = self.ttls.get(kind) if ttl is None else ttl
+        if ttl is None:
+            return None
+        return (now or time.time()) + ttl
+
+    def get_entries(self, kind: str, keys: Iterable[str]) -> dict[str, ENTRY]:
+        """讀取多個未過期的項目，回傳 鍵 -> (值, 過期時間)，未命中的鍵不會出現在結果中。"""
+        raise NotImplementedError
+
+    def put_entries(self, kind: str, entries: dict[str, ENTRY]) -> None:
+        """寫入多個項目，鍵 -> (值, 過期時間)。"""
+        raise NotImplementedError
+
+    def delete_many(self, kind: str, keys: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        """清除指定種類（None 表示全部）的項目。"""
+        raise NotImplementedError
+
+    def count(self, kind: str) -> int:
+        """指定種類未過期的項目數。"""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    def get_many(self, kind: str, keys: Iterable[str], min_ttl: float = 0.0) -> dict[str, Any]:
+        """
+        批次讀取。
+
+        參數:
+            kind (str): 資料種類，如 "report"、"quote"。
+            keys (Iterable[str]): 鍵。
+            min_ttl (float): 剩餘存活秒數少於此值的項目視為未命中（供預先更新使用）。
+
+        回傳:
+            dict[str, Any]: 鍵 -> 值，未命中的鍵不會出現在結果中。
+        """
+        deadline = time.time() + min_ttl
+        return {
+            key: value
+            for key, (value, expires_at) in self.get_entries(kind, keys).items()
+            if expires_at is None or expires_at > deadline
+        }
+
+    def put_many(self, kind: str, items: dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        批次寫入。
+
+        參數:
+            kind (str): 資料種類。
+            items (dict[str, Any]): 鍵 -> 值，值需可序列化為 JSON。
+            ttl (Optional[float]): 存活秒數，未指定時使用種類的預設值。
+        """
+        if not items:
+            return
+        expires_at = self.expires_at(kind, ttl)
+        self.put_entries(kind, {key: (value, expires_at) for key, value in items.items()})
+
+    def get(self, kind: str, key: str, min_ttl: float = 0.0) -> Optional[Any]:
+        return self.get_many(kind, [key], min_ttl).get(key)
+
+    def put(self, kind: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.put_many(kind, {key: value}, ttl)
+
+
+class MemoryBackend(CacheBackend):
+    """
+    行程內的 LRU 快取
+
+    所有種類共用 max_entries 的容量，超過時淘汰最久未使用的項目。
+    """
+
+    def __init__(self, max_entries: int = 5000, ttls: Optional[dict[str, Optional[float]]] = None):
+        """
+        建立 MemoryBackend 物件。
+
+        參數:
+            max_entries (int): 最多保存的項目數。
+            ttls (Optional[dict[str, Optional[float]]]): 各資料種類預設的存活秒數。
+        """
+        super().__init__(ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries: OrderedDict[tuple[str, str], ENTRY] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get_entries(self, kind: str, keys: Iterable[str]) -> dict[str, ENTRY]:
+        now = time.time()
+        result: dict[str, ENTRY] = {}
+        with self.__lock:
+            for key in keys:
+                entry = self.__entries.get((kind, key))
+                if entry is None or (entry[1] is not None and entry[1] <= now):
+                    self.misses += 1
+                    continue
+                self.__entries.move_to_end((kind, key))
+                result[key] = entry
+                self.hits += 1
+        return result
+
+    def put_entries(self, kind: str, entries: dict[str, ENTRY]) -> None:
+        with self.__lock:
+            for key, entry in entries.items():
+                self.__entries[(kind, key)] = entry
+                self.__entries.move_to_end((kind, key))
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete_many(self, kind: str, keys: Iterable[str]) -> None:
+        with self.__lock:
+            for key in keys:
+                self.__entries.pop((kind, key), None)
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        with self.__lock:
+            if kind is None:
+                self.__entries.clear()
+            else:
+                for entry_key in [k for k in self.__entries if k[0] == kind]:
+                    del self.__entries[entry_key]
+
+    def count(self, kind: str) -> int:
+        now = time.time()
+        with self.__lock:
+            return sum(
+                1 for (entry_kind, _), (_, expires_at) in self.__entries.items()
+                if entry_kind == kind and (expires_at is None or expires_at > now)
+            )
+
+    def stats(self) -> dict:
+        with self.__lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.__entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    同一台主機上所有行程共用的 SQLite 快取（WAL 模式，讀取不會被寫入阻擋）
+
+    值以 JSON 保存。設定 limits 的種類超過上限時，淘汰最久未讀取的項目；過期的項目於寫入同種類時清除。
+    """
+
+    cross_process = True
+
+    def __init__(
+        self,
+        path: str,
+        ttls: Optional[dict[str, Optional[float]]] = None,
+        limits: Optional[dict[str, int]] = None,
+    ):
+        """
+        建立 SQLiteBackend 物件。
+
+        參數:
+            path (str): SQLite 資料庫檔案路徑。
+            ttls (Optional[dict[str, Optional[float]]]): 各資料種類預設的存活秒數。
+            limits (Optional[dict[str, int]]): 各資料種類最多保存的項目數，未設定表示不限制。
+        """
+        super().__init__(ttls)
+        self.path = path
+        self.limits = dict(limits or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (kind, key)
+                ) WITHOUT ROWID
+            """)
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        取得目前執行緒的資料庫連線（sqlite3 連線不能跨執行緒共用）。
+        """
+        conn: Optional[sqlite3.Connection] = getattr(self.__local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+        return conn
+
+    def get_entries(self, kind: str, keys: Iterable[str]) -> dict[str, ENTRY]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        result: dict[str, ENTRY] = {}
+        with self.connection() as conn:
+            for i in range(0, len(keys), SQLITE_BATCH_SIZE):
+                batch = keys[i:i + SQLITE_BATCH_SIZE]
+                rows = conn.execute(
+                    f"SELECT key, value, expires_at FROM cache_entries "
+                    f"WHERE kind = ? AND key IN ({','.join('?' * len(batch))}) "
+                    f"AND (expires_at IS NULL OR expires_at > ?)",
+                    (kind, *batch, now),
+                ).fetchall()
+                for key, value, expires_at in rows:
+                    result[key] = (json.loads(value), expires_at)
+            if result and kind in self.limits:
+                # 只有需要淘汰的種類才記錄讀取時間，避免每次讀取都寫入
+                conn.executemany(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE kind = ? AND key = ?",
+                    [(now, kind, key) for key in result],
+                )
+        with self.__lock:
+            self.hits += len(result)
+            self.misses += len(keys) - len(result)
+        return result
+
+    def put_entries(self, kind: str, entries: dict[str, ENTRY]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        rows = [
+            (kind, key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            for key, (value, expires_at) in entries.items()
+        ]
+        evicted = 0
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_entries (kind, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("DELETE FROM cache_entries WHERE kind = ? AND expires_at <= ?", (kind, now))
+            limit = self.limits.get(kind)
+            if limit is not None:
+                evicted = conn.execute(
+                    """
+                    DELETE FROM cache_entries WHERE kind = ? AND key IN (
+                        SELECT key FROM cache_entries WHERE kind = ?
+                        ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (kind, kind, limit),
+                ).rowcount
+        if evicted:
+            with self.__lock:
+                self.evictions += evicted
+
+    def delete_many(self, kind: str, keys: Iterable[str]) -> None:
+        with self.connection() as conn:
+            conn.executemany("DELETE FROM cache_entries WHERE kind = ? AND key = ?", [(kind, key) for key in keys])
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        with self.connection() as conn:
+            if kind is None:
+                conn.execute("DELETE FROM cache_entries")
+            else:
+                conn.execute("DELETE FROM cache_entries WHERE kind = ?", (kind,))
+
+    def count(self, kind: str) -> int:
+        row = self.connection().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE kind = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (kind, time.time()),
+        ).fetchone()
+        return row[0]
+
+    def stats(self) -> dict:
+        kinds = dict(self.connection().execute("SELECT kind, COUNT(*) FROM cache_entries GROUP BY kind").fetchall())
+        with self.__lock:
+            total = self.hits + self.misses
+            return {
+                "entries": kinds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class TieredBackend(CacheBackend):
+    """
+    兩層快取：記憶體 LRU 在前，跨行程共用的 SQLite 在後
+
+    讀取時先查記憶體，未命中的鍵再以一次批次查詢向 SQLite 讀取，並回填記憶體（保留原本的過期時間）；
+    寫入時同時寫入兩層，其他行程因此可以直接使用。
+    """
+
+    def __init__(self, memory: MemoryBackend, shared: CacheBackend):
+        super().__init__()
+        self.memory = memory
+        self.shared = shared
+        # 兩層共用相同的預設存活秒數
+        self.ttls = shared.ttls
+        memory.ttls = shared.ttls
+
+    @property
+    def cross_process(self) -> bool:
+        return self.shared.cross_process
+
+    def get_entries(self, kind: str, keys: Iterable[str]) -> dict[str, ENTRY]:
+        keys = list(keys)
+        result = self.memory.get_entries(kind, keys)
+        missing = [key for key in keys if key not in result]
+        if missing:
+            found = self.shared.get_entries(kind, missing)
+            if found:
+                self.memory.put_entries(kind, found)
+                result.update(found)
+        return result
+
+    def put_entries(self, kind: str, entries: dict[str, ENTRY]) -> None:
+        self.shared.put_entries(kind, entries)
+        self.memory.put_entries(kind, entries)
+
+    def delete_many(self, kind: str, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self.shared.delete_many(kind, keys)
+        self.memory.delete_many(kind, keys)
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        self.shared.clear(kind)
+        self.memory.clear(kind)
+
+    def count(self, kind: str) -> int:
+        return self.shared.count(kind)
+
+    def stats(self) -> dict:
+        return {"memory": self.memory.stats(), "shared": self.shared.stats()}
+
+
+class LazyBackend(CacheBackend):
+    """
+    第一次使用時才建立的快取後端
+
+    匯入模組時不會接觸檔案系統；建立失敗（如唯讀的檔案系統或損毀的資料庫）時記錄警告並改用 fallback，
+    快取的問題不會讓服務無法啟動。
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], CacheBackend],
+        fallback: Callable[[], CacheBackend],
+        ttls: Optional[dict[str, Optional[float]]] = None,
+    ):
+        """
+        建立 LazyBackend 物件。
+
+        參數:
+            factory (Callable[[], CacheBackend]): 建立實際後端的函式，如 SQLiteBackend。
+            fallback (Callable[[], CacheBackend]): factory 引發 OSError 或 sqlite3.Error 時建立備援後端的函式。
+            ttls (Optional[dict[str, Optional[float]]]): 各資料種類預設的存活秒數（套用至建立的後端）。
+        """
+        super().__init__(ttls)
+        self.factory = factory
+        self.fallback = fallback
+        self.__backend: Optional[CacheBackend] = None
+        self.__lock = threading.Lock()
+
+    @property
+    def backend(self) -> CacheBackend:
+        """實際的後端（第一次存取時建立）。"""
+        if self.__backend is None:
+            with self.__lock:
+                if self.__backend is None:
+                    try:
+                        backend = self.factory()
+                    except (OSError, sqlite3.Error) as e:
+                        logger.warning("無法開啟快取資料庫（%s），改用行程內的記憶體快取", e)
+                        backend = self.fallback()
+                    backend.ttls = self.ttls
+                    self.__backend = backend
+        return self.__backend
+
+    @property
+    def cross_process(self) -> bool:
+        return self.backend.cross_process
+
+    def get_entries(self, kind: str, keys: Iterable[str]) -> dict[str, ENTRY]:
+        return self.backend.get_entries(kind, keys)
+
+    def put_entries(self, kind: str, entries: dict[str, ENTRY]) -> None:
+        self.backend.put_entries(kind, entries)
+
+    def delete_many(self, kind: str, keys: Iterable[str]) -> None:
+        self.backend.delete_many(kind, keys)
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        self.backend.clear(kind)
+
+    def count(self, kind: str) -> int:
+        return self.backend.count(kind)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
@@ -0,0 +1,289 @@
+from collections.abc import Sequence
+from typing import Optional
+
+import numpy as np
+
+from .models import DAILY_DATA, DAILY_DATA_KEYS
+
+# 每日交易資料的欄位順序，與 STOCK_DAY 回傳的 fields 相同
+DAILY_FIELDS: list[DAILY_DATA_KEYS] = [
+    "日期",
+    "成交股數",
+    "成交金額",
+    "開盤價",
+    "最高價",
+    "最低價",
+    "收盤價",
+    "漲跌價差",
+    "成交筆數",
+]
+
+# 資料表欄位，順序對應 DAILY_FIELDS
+BAR_COLUMNS = ["date", "volume", "turnover", "open", "high", "low", "close", "change", "transactions"]
+
+BarRow = tuple[int, Optional[int], Optional[int], Optional[float], Optional[float], Optional[float], Optional[float], Optional[float], Optional[int]]
+
+
+def to_number(value: str) -> Optional[float]:
+    """
+    將 TWSE 的數字字串（如 "1,234.50"、"+3.00"、"--"）轉為 float，無法轉換時回傳 None。
+    """
+    try:
+        return float(value.replace(",", "").replace("X", "").strip())
+    except (ValueError, AttributeError):
+        return None
+
+
+def to_int(value: str) -> Optional[int]:
+    """將 TWSE 的整數字串（如 "33,673,400"）轉為 int，無法轉換時回傳 None。"""
+    number = to_number(value)
+    return None if number is None else int(number)
+
+
+def parse_daily_row(fields: list[str], row: list[str]) -> Optional[BarRow]:
+    """
+    將一列 STOCK_DAY 格式的資料轉為資料表的一列。
+
+    參數:
+        fields (list[str]): 欄位名稱。
+        row (list[str]): 資料列，日期需已轉為西元 YYYYMMDD。
+
+    回傳:
+        Optional[BarRow]: 轉換後的資料，日期無效時回傳 None。
+    """
+    record = dict(zip(fields, row))
+    try:
+        date = int(record["日期"])
+    except (KeyError, ValueError):
+        return None
+    return (
+        date,
+        to_int(record.get("成交股數", "")),
+        to_int(record.get("成交金額", "")),
+        to_number(record.get("開盤價", "")),
+        to_number(record.get("最高價", "")),
+        to_number(record.get("最低價", "")),
+        to_number(record.get("收盤價", "")),
+        to_number(record.get("漲跌價差", "")),
+        to_int(record.get("成交筆數", "")),
+    )
+
+
+def format_daily_row(row: BarRow) -> list[str]:
+    """將資料表的一列轉回 STOCK_DAY 格式的字串資料列。"""
+    date, volume, turnover, open, high, low, close, change, transactions = row
+
+    def integer(value: Optional[int]) -> str:
+        return "--" if value is None else f"{value:,}"
+
+    def price(value: Optional[float]) -> str:
+        return "--" if value is None else f"{value:,.2f}"
+
+    return [
+        str(date),
+        integer(volume),
+        integer(turnover),
+        price(open),
+        price(high),
+        price(low),
+        price(close),
+        "--" if change is None else (f"{change:+.2f}" if change else " 0.00"),
+        integer(transactions),
+    ]
+
+
+# 中文欄位名稱 -> DailyBars 欄位
+FIELD_COLUMNS: dict[DAILY_DATA_KEYS, str] = dict(zip(DAILY_FIELDS, BAR_COLUMNS))
+
+# 各欄位的型別：日期以 YYYYMMDD 整數保存，股數、金額、筆數為整數，價格為浮點數（缺值為 NaN）
+COLUMN_TYPES: dict[str, type] = {
+    "date": np.int64,
+    "volume": np.int64,
+    "turnover": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "change": np.float64,
+    "transactions": np.int64,
+}
+
+
+class DailyRecords(Sequence):
+    """
+    DailyBars 的唯讀相容檢視
+
+    以 `dict[DAILY_DATA_KEYS, str]` 的形式逐筆呈現每日資料（與 STOCK_DAY 的字串格式相同），
+    只有在被讀取時才轉換，供仍以舊格式存取資料的程式使用。
+    """
+
+    def __init__(self, bars: "DailyBars"):
+        self.__bars = bars
+
+    def __len__(self) -> int:
+        return len(self.__bars)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return dict(zip(DAILY_FIELDS, format_daily_row(self.__bars.row(index))))
+
+
+class DailyBars:
+    """
+    欄位式（columnar）的每日交易資料
+
+    每個欄位為一個 NumPy 陣列，於匯入時一次完成字串解析並依日期排序，之後的轉換與計算都直接使用數值。
+    整數欄位沒有 NaN，缺值以 0 參與計算，另以 `missing` 記錄缺值的位置，轉回舊格式時仍顯示為 "--"。
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, np.ndarray],
+        is_sorted: bool = False,
+        missing: Optional[dict[str, np.ndarray]] = None,
+    ):
+        """
+        建立 DailyBars 物件。資料會依日期排序並去除重複日期（保留較晚出現者），
+        之後的區間查詢都以二分搜尋取得切片。
+
+        參數:
+            columns (dict[str, np.ndarray]): 欄位名稱 -> 陣列，需包含 `BAR_COLUMNS` 所有欄位且長度相同。
+            is_sorted (bool): 呼叫端已保證日期嚴格遞增時設為 True，可略過檢查。
+            missing (Optional[dict[str, np.ndarray]]): 整數欄位名稱 -> 缺值的布林遮罩，只需包含有缺值的欄位。
+        """
+        missing = missing or {}
+        dates = columns["date"]
+        if not is_sorted and len(dates) > 1 and not np.all(dates[1:] > dates[:-1]):
+            # 穩定排序後，同一日期取最後一筆
+            order = np.argsort(dates, kind="stable")
+            sorted_dates = dates[order]
+            keep = np.append(sorted_dates[1:] != sorted_dates[:-1], True)
+            columns = {column: values[order][keep] for column, values in columns.items()}
+            missing = {column: mask[order][keep] for column, mask in missing.items()}
+        self.columns = columns
+        self.missing = missing
+
+    @classmethod
+    def empty(cls) -> "DailyBars":
+        return cls({column: np.empty(0, dtype=dtype) for column, dtype in COLUMN_TYPES.items()}, is_sorted=True)
+
+    @classmethod
+    def from_rows(cls, rows: list[BarRow]) -> "DailyBars":
+        """
+        由資料列建立 DailyBars，缺值的價格為 NaN、缺值的整數為 0（並記錄於 `missing`）。
+
+        參數:
+            rows (list[BarRow]): 每日資料列。
+
+        回傳:
+            DailyBars: 欄位式的每日資料。
+        """
+        if not rows:
+            return cls.empty()
+        columns: dict[str, np.ndarray] = {}
+        missing: dict[str, np.ndarray] = {}
+        for i, (column, dtype) in enumerate(COLUMN_TYPES.items()):
+            if dtype is np.float64:
+                columns[column] = np.array([np.nan if row[i] is None else row[i] for row in rows], dtype=dtype)
+                continue
+            mask = np.array([row[i] is None for row in rows])
+            columns[column] = np.array([0 if row[i] is None else row[i] for row in rows], dtype=dtype)
+            if mask.any():
+                missing[column] = mask
+        return cls(columns, missing=missing)
+
+    @classmethod
+    def from_daily_data(cls, daily_data: DAILY_DATA) -> "DailyBars":
+        """
+        由 STOCK_DAY 格式的每日資料建立 DailyBars。
+
+        參數:
+            daily_data (DAILY_DATA): 欄位與字串資料列。
+
+        回傳:
+            DailyBars: 欄位式的每日資料。
+        """
+        rows = [parse_daily_row(daily_data["fields"], row) for row in daily_data.get("data", [])]
+        return cls.from_rows([row for row in rows if row is not None])
+
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def field(self, field: DAILY_DATA_KEYS) -> np.ndarray:
+        """
+        以中文欄位名稱取得欄位陣列。
+
+        引發:
+            KeyError: 若欄位名稱不存在。
+        """
+        if field not in FIELD_COLUMNS:
+            raise KeyError(f"無此欄位：{field}")
+        return self.columns[FIELD_COLUMNS[field]]
+
+    def row(self, index: int) -> BarRow:
+        """取得第 index 筆資料，NaN 與整數欄位的缺值轉為 None。"""
+        values = []
+        for column in BAR_COLUMNS:
+            if column in self.missing and self.missing[column][index]:
+                values.append(None)
+                continue
+            value = self.columns[column][index].item()
+            values.append(None if isinstance(value, float) and np.isnan(value) else value)
+        return tuple(values)
+
+    def take(self, selector: np.ndarray | slice) -> "DailyBars":
+        """
+        依遞增的索引、布林遮罩或切片取出部分資料（切片不會複製資料）。
+
+        參數:
+            selector (np.ndarray | slice): 選取條件，需維持日期順序。
+
+        回傳:
+            DailyBars: 選取後的資料。
+        """
+        return DailyBars(
+            {column: values[selector] for column, values in self.columns.items()},
+            is_sorted=True,
+            missing={column: mask[selector] for column, mask in self.missing.items()},
+        )
+
+    def index_range(self, start: Optional[str] = None, end: Optional[str] = None) -> slice:
+        """
+        以二分搜尋取得日期區間對應的索引範圍，O(log n)。
+
+        參數:
+            start (Optional[str]): 起始日期，格式為 YYYYMMDD。
+            end (Optional[str]): 結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            slice: 區間內資料的索引範圍。
+        """
+        dates = self.columns["date"]
+        lo = 0 if start is None else int(np.searchsorted(dates, int(start), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, int(end), side="right"))
+        return slice(lo, max(lo, hi))
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> "DailyBars":
+        """
+        取出日期區間內的資料，回傳的欄位為原陣列的切片檢視，不複製資料。
+
+        參數:
+            start (Optional[str]): 起始日期，格式為 YYYYMMDD。
+            end (Optional[str]): 結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            DailyBars: 區間內的資料。
+        """
+        return self.take(self.index_range(start, end))
+
+    def records(self) -> DailyRecords:
+        """取得舊格式（list of dict）的相容檢視。"""
+        return DailyRecords(self)
+
+    def nbytes(self) -> int:
+        """所有欄位陣列（含缺值遮罩）佔用的位元組數。"""
+        return sum(values.nbytes for values in self.columns.values()) + sum(mask.nbytes for mask in self.missing.values())
@@ -0,0 +1,121 @@
+import threading
+from typing import Optional
+
+import utils
+from .backend import CacheBackend
+
+
+class ReportCache:
+    """
+    已結束月份報表的快取
+
+    以 (報表代號, 股票代號, 月份) 為鍵，將 TWSE 回傳的月報表保存於快取後端（見 crawler.backend）。
+    已結束的月份資料不會再變動，因此可以永久重複使用；使用 SQLite 後端時同一台主機上的所有行程共用同一份快取，
+    容量上限與 LRU 淘汰由後端的 limits 設定。
+    """
+
+    # 快取後端中的資料種類
+    KIND = "report"
+
+    def __init__(self, backend: CacheBackend):
+        """
+        建立 ReportCache 物件。
+
+        參數:
+            backend (CacheBackend): 快取後端。
+        """
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def is_closed(month: str) -> bool:
+        """
+        判斷月份是否已經結束（早於台北時間的本月，與伺服器所在時區無關）。
+
+        參數:
+            month (str): 月份，格式為 YYYYMM 或 YYYYMMDD。
+
+        回傳:
+            bool: 已結束的月份回傳 True。
+        """
+        return month[:6] < utils.date.taipei_now().strftime("%Y%m")
+
+    @staticmethod
+    def key(report_code: str, stock_no: str, month: str) -> str:
+        return f"{report_code}/{stock_no}/{month[:6]}"
+
+    def get(self, report_code: str, stock_no: str, month: str) -> Optional[dict]:
+        """
+        讀取快取的月報表。
+
+        參數:
+            report_code (str): 報表代號，如 "STOCK_DAY"。
+            stock_no (str): 股票代號。
+            month (str): 月份，格式為 YYYYMM 或 YYYYMMDD。
+
+        回傳:
+            Optional[dict]: 快取的報表內容（唯讀），未命中則回傳 None。
+        """
+        return self.get_many(report_code, stock_no, [month]).get(month)
+
+    def get_many(self, report_code: str, stock_no: str, months: list[str]) -> dict[str, dict]:
+        """
+        一次讀取多個月份的月報表（後端只進行一次批次查詢）。
+
+        參數:
+            report_code (str): 報表代號，如 "STOCK_DAY"。
+            stock_no (str): 股票代號。
+            months (list[str]): 月份，格式為 YYYYMM 或 YYYYMMDD。
+
+        回傳:
+            dict[str, dict]: 傳入的月份 -> 報表內容（唯讀），未命中的月份不會出現在結果中。
+        """
+        keys = {self.key(report_code, stock_no, month): month for month in months if self.is_closed(month)}
+        found = self.backend.get_many(self.KIND, keys) if keys else {}
+        result = {keys[key]: data for key, data in found.items()}
+        with self.__lock:
+            self.hits += len(result)
+            self.misses += len(months) - len(result)
+        return result
+
+    def put(self, report_code: str, stock_no: str, month: str, data: dict) -> None:
+        """
+        寫入月報表至快取。僅接受已結束的月份，本月資料仍會變動因此不快取。
+
+        參數:
+            report_code (str): 報表代號，如 "STOCK_DAY"。
+            stock_no (str): 股票代號。
+            month (str): 月份，格式為 YYYYMM 或 YYYYMMDD。
+            data (dict): 欲保存的報表內容。
+        """
+        if not self.is_closed(month):
+            return
+        self.backend.put(self.KIND, self.key(report_code, stock_no, month), data)
+
+    def clear(self) -> None:
+        """清除所有快取項目與統計數字。"""
+        self.backend.clear(self.KIND)
+        with self.__lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        取得快取統計資料。
+
+        回傳:
+            dict: 包含 hits/misses/entries/hit_rate。
+        """
+        with self.__lock:
+            total = self.hits + self.misses
+            hits, misses = self.hits, self.misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "entries": len(self),
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return self.backend.count(self.KIND)
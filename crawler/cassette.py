@@ -0,0 +1,155 @@
+"""
+TWSE 回應的錄製與重播
+
+將 `fetch()` 收到的回應以 JSON 檔案（cassette）保存，之後可不連網重播相同的請求，
+用於離線執行機器人、可重現的效能測試與回歸測試。
+
+模式（環境變數 `TWSE_CASSETTE_MODE`）：
+- off：不錄製也不重播（預設）。
+- record：一律實際發送請求，並保存回應。
+- replay：只由 cassette 回應，沒有錄製過的請求會引發 CassetteNotFoundError。
+- auto：有 cassette 時重播，否則實際發送請求並保存。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Literal, Optional
+from urllib.parse import urlsplit
+
+from .errors import RequestFailedError
+
+CASSETTE_MODE = Literal["off", "record", "replay", "auto"]
+CASSETTE_MODES: tuple[CASSETTE_MODE, ...] = ("off", "record", "replay", "auto")
+
+
+class CassetteNotFoundError(RequestFailedError):
+    """重播模式下找不到對應請求的 cassette"""
+
+
+class CassetteLibrary:
+    """
+    cassette 檔案庫
+
+    以網址路徑與排序後的查詢參數為鍵（不含主機），因此向 TWSE 錄製的回應可直接於本地模擬伺服器或離線環境重播。
+    每個 cassette 保存解析後的 JSON（`json`）或原始文字（`text`），重播時仍會經過相同的格式與狀態檢查。
+    """
+
+    def __init__(self, directory: str, mode: CASSETTE_MODE = "off"):
+        """
+        建立 CassetteLibrary 物件。
+
+        參數:
+            directory (str): cassette 存放的資料夾。
+            mode (CASSETTE_MODE): 錄製或重播模式。
+
+        引發:
+            ValueError: 若模式不支援。
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"不支援的 cassette 模式：{mode}，可用模式：{', '.join(CASSETTE_MODES)}")
+        self.directory = directory
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ("replay", "auto")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode in ("record", "auto")
+
+    @staticmethod
+    def key(url: str, params: Optional[dict] = None) -> str:
+        """
+        產生請求的鍵，如 "exchangeReport/STOCK_DAY?date=20250401&stockNo=2330"。
+        """
+        path = urlsplit(url).path.strip("/")
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return f"{path}?{query}"
+
+    def path(self, url: str, params: Optional[dict] = None) -> str:
+        """cassette 的檔案路徑：以網址最後一段為前綴，加上鍵的雜湊。"""
+        key = self.key(url, params)
+        name = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1] or "root"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{name}-{digest}.json")
+
+    def play(self, url: str, params: Optional[dict] = None) -> Optional[dict]:
+        """
+        讀取請求的 cassette。
+
+        參數:
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+
+        回傳:
+            Optional[dict]: 包含 `json` 或 `text` 的 cassette；未啟用重播或 auto 模式下未錄製時回傳 None。
+
+        引發:
+            CassetteNotFoundError: replay 模式下沒有錄製過此請求。
+        """
+        if not self.replaying:
+            return None
+        try:
+            with open(self.path(url, params), "r", encoding="utf-8") as f:
+                cassette = json.load(f)
+        except (OSError, ValueError):
+            with self.__lock:
+                self.misses += 1
+            if self.mode == "replay":
+                raise CassetteNotFoundError(f"沒有錄製的回應：{self.key(url, params)}")
+            return None
+
+        with self.__lock:
+            self.hits += 1
+        return cassette
+
+    def record(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        data: Optional[dict] = None,
+        text: Optional[str] = None,
+    ) -> None:
+        """
+        保存請求的回應（未啟用錄製時不做任何事）。
+
+        參數:
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+            data (Optional[dict]): 解析後的 JSON 回應。
+            text (Optional[str]): 無法解析為 JSON 或非 JSON 頁面的原始文字。
+        """
+        if not self.recording:
+            return
+        cassette: dict = {"key": self.key(url, params), "recorded_at": time.time()}
+        if data is not None:
+            cassette["json"] = data
+        else:
+            cassette["text"] = text or ""
+
+        path = self.path(url, params)
+        os.makedirs(self.directory, exist_ok=True)
+        # 先寫入暫存檔再取代，避免重播時讀到寫到一半的檔案
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cassette, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self.__lock:
+            self.recorded += 1
+
+    def stats(self) -> dict[str, int | str]:
+        """
+        取得錄製與重播統計資料。
+
+        回傳:
+            dict: 包含 mode/hits/misses/recorded。
+        """
+        with self.__lock:
+            return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
@@ -0,0 +1,271 @@
+import bisect
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, TypedDict
+
+from .backend import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SYMBOL(TypedDict, total=False):
+    code: str          # 股票代號
+    name: str          # 股票簡稱
+    full_name: str     # 股票全名（ISIN 清單沒有，由即時資訊補上）
+    isin: str          # 國際證券辨識號碼
+    listed: str        # 上市日
+    market: str        # 市場別
+    industry: str      # 產業別
+    category: str      # 有價證券別，如「股票」、「ETF」
+
+
+ROW_PATTERN = re.compile(r"<tr>(.*?)</tr>", re.S | re.I)
+CELL_PATTERN = re.compile(r"<td[^>]*>(.*?)</td>", re.S | re.I)
+TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def parse_isin_listing(html: str) -> list[SYMBOL]:
+    """
+    解析 ISIN 有價證券代號表（C_public.jsp）的 HTML。
+
+    每列依序為「代號　名稱」、ISIN、上市日、市場別、產業別、CFICode、備註；
+    只有一格的列為分類標題（如「股票」、「ETF」）。
+
+    參數:
+        html (str): 已解碼的 HTML。
+
+    回傳:
+        list[SYMBOL]: 所有有價證券。
+    """
+    symbols: list[SYMBOL] = []
+    category = ""
+    for row in ROW_PATTERN.findall(html):
+        cells = [TAG_PATTERN.sub("", cell).strip() for cell in CELL_PATTERN.findall(row)]
+        if len(cells) == 1:
+            category = cells[0]
+            continue
+        if len(cells) < 5 or "　" not in cells[0]:
+            continue  # 表頭或格式不符的列
+        code, _, name = cells[0].partition("　")
+        symbols.append({
+            "code": code.strip(),
+            "name": name.strip(),
+            "isin": cells[1],
+            "listed": cells[2],
+            "market": cells[3],
+            "industry": cells[4],
+            "category": category,
+        })
+    return symbols
+
+
+class SymbolDirectory:
+    """
+    本地股票代號目錄
+
+    由 ISIN 有價證券代號表建立並保存於快取後端，提供代號 -> 名稱、名稱（或前綴）-> 代號的查詢，
+    讓顯示名稱與以名稱查詢股票都不需要額外的網路請求。資料超過 max_age 秒時於背景重新整理；
+    使用共用的 SQLite 後端時，其他行程已更新的清單會直接沿用，不會重複下載。
+    """
+
+    # 尚無資料且下載失敗時，重新嘗試前的等待秒數
+    RETRY_INTERVAL = 300
+
+    # 快取後端中的資料種類與鍵
+    KIND = "symbols"
+    KEY = "directory"
+
+    def __init__(self, backend: CacheBackend, loader: Callable[[], list[SYMBOL]], max_age: float = 86400):
+        """
+        建立 SymbolDirectory 物件。
+
+        參數:
+            backend (CacheBackend): 保存清單的快取後端（目錄本身已有記憶體索引，建議直接使用共用的 SQLite 後端）。
+            loader (Callable[[], list[SYMBOL]]): 下載最新清單的函式。
+            max_age (float): 清單的有效秒數，過期後於背景重新整理。
+        """
+        self.backend = backend
+        self.loader = loader
+        self.max_age = max_age
+        self.updated_at = 0.0
+        self.__failed_at = 0.0
+        self.__symbols: dict[str, SYMBOL] = {}
+        self.__names: dict[str, list[str]] = {}
+        self.__sorted_names: list[str] = []
+        self.__lock = threading.Lock()
+        self.__refreshing = threading.Lock()
+        # 清單於第一次查詢時才由快取後端讀取（見 ensure_fresh），匯入模組時不開啟資料庫
+
+    def __load(self) -> None:
+        """由快取後端讀取清單（僅在比目前的清單新時更新索引）。"""
+        data = self.backend.get(self.KIND, self.KEY)
+        if data and data.get("updated_at", 0.0) > self.updated_at:
+            self.__index(data.get("symbols", []), data["updated_at"])
+
+    def __save(self) -> None:
+        with self.__lock:
+            data = {"updated_at": self.updated_at, "symbols": list(self.__symbols.values())}
+        self.backend.put(self.KIND, self.KEY, data)
+
+    def __index(self, symbols: list[SYMBOL], updated_at: float) -> None:
+        """重建代號與名稱索引，保留先前已知的股票全名。"""
+        by_code: dict[str, SYMBOL] = {}
+        names: dict[str, list[str]] = {}
+        with self.__lock:
+            for symbol in symbols:
+                symbol = dict(symbol)
+                old = self.__symbols.get(symbol["code"])
+                if old and old.get("full_name") and not symbol.get("full_name"):
+                    symbol["full_name"] = old["full_name"]
+                by_code[symbol["code"]] = symbol
+                names.setdefault(symbol["name"], []).append(symbol["code"])
+            self.__symbols = by_code
+            self.__names = names
+            self.__sorted_names = sorted(names)
+            self.updated_at = updated_at
+
+    def is_stale(self) -> bool:
+        return time.time() - self.updated_at > self.max_age
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        下載最新清單並保存至快取後端。
+
+        參數:
+            force (bool): 即使未過期也重新整理。
+
+        回傳:
+            bool: 是否有重新整理。
+        """
+        if not force and not self.is_stale():
+            return False
+        if not self.__refreshing.acquire(blocking=False):
+            return False  # 其他執行緒正在重新整理
+        try:
+            if not force:
+                self.__load()  # 其他行程可能已經更新過
+                if not self.is_stale():
+                    return False
+            self.__index(self.loader(), time.time())
+            self.__save()
+            return True
+        finally:
+            self.__refreshing.release()
+
+    def ensure_fresh(self) -> None:
+        """
+        確保目錄可用：尚無資料時同步下載；資料過期時於背景重新整理，期間繼續使用舊資料。
+        """
+        if not self.__symbols:
+            self.__load()  # 其他行程可能已經下載過
+            if self.__symbols:
+                return
+            # 下載失敗後冷卻一段時間，避免每次查詢都重試
+            if time.time() - self.__failed_at < self.RETRY_INTERVAL:
+                return
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                self.__failed_at = time.time()
+                logger.warning("股票代號目錄下載失敗：%s", e)
+        elif self.is_stale() and not self.__refreshing.locked() and time.time() - self.__failed_at >= self.RETRY_INTERVAL:
+            threading.Thread(target=self.__refresh_quietly, daemon=True).start()
+
+    def __refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            self.__failed_at = time.time()
+            logger.warning("股票代號目錄更新失敗：%s", e)
+
+    def get(self, code: str) -> Optional[SYMBOL]:
+        """
+        以代號取得股票資料。
+
+        參數:
+            code (str): 股票代號。
+
+        回傳:
+            Optional[SYMBOL]: 股票資料，查無時回傳 None。
+        """
+        self.ensure_fresh()
+        with self.__lock:
+            return self.__symbols.get(code)
+
+    def name(self, code: str) -> Optional[str]:
+        """取得股票簡稱，查無時回傳 None。"""
+        symbol = self.get(code)
+        return symbol["name"] if symbol else None
+
+    def lookup(self, query: str) -> list[str]:
+        """
+        以代號、完整名稱或名稱前綴查詢股票代號。
+
+        參數:
+            query (str): 代號或名稱。
+
+        回傳:
+            list[str]: 符合的代號，依精確度排序（代號 > 完整名稱 > 名稱前綴）。
+        """
+        self.ensure_fresh()
+        query = query.strip()
+        with self.__lock:
+            if query in self.__symbols:
+                return [query]
+            if query in self.__names:
+                return list(self.__names[query])
+
+            result: list[str] = []
+            start = bisect.bisect_left(self.__sorted_names, query)
+            for name in self.__sorted_names[start:]:
+                if not name.startswith(query):
+                    break
+                result.extend(self.__names[name])
+            return result
+
+    def resolve(self, query: str) -> str:
+        """
+        將使用者輸入的代號或名稱轉為股票代號。
+
+        參數:
+            query (str): 代號或名稱，如 "2330" 或 "台積電"。
+
+        回傳:
+            str: 股票代號；目錄中查無資料時，若輸入本身像代號則原樣回傳。
+
+        引發:
+            ValueError: 若名稱查無對應的股票。
+        """
+        codes = self.lookup(query)
+        if codes:
+            return codes[0]
+        if query.isascii() and query.isalnum():
+            return query  # 目錄無法使用或尚未收錄，直接當作代號
+        raise ValueError(f"找不到名稱為「{query}」的股票")
+
+    def remember(self, code: str, name: Optional[str] = None, full_name: Optional[str] = None) -> None:
+        """
+        以即時資訊補充股票名稱（ISIN 清單沒有股票全名），有新資料時寫回快取後端。
+
+        參數:
+            code (str): 股票代號。
+            name (Optional[str]): 股票簡稱。
+            full_name (Optional[str]): 股票全名。
+        """
+        with self.__lock:
+            symbol = self.__symbols.get(code)
+            if symbol is None or not full_name or symbol.get("full_name") == full_name:
+                return
+            symbol["full_name"] = full_name
+            if name and not symbol.get("name"):
+                symbol["name"] = name
+        try:
+            self.__save()
+        except (OSError, sqlite3.Error):
+            pass
+
+    def __len__(self) -> int:
+        return len(self.__symbols)
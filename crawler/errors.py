@@ -0,0 +1,26 @@
+class CrawlerError(RuntimeError):
+    """爬蟲錯誤的基底類別"""
+
+
+class RequestTimeoutError(CrawlerError):
+    """請求在重試後仍然逾時"""
+
+
+class RequestFailedError(CrawlerError):
+    """連線失敗或伺服器回傳非成功的 HTTP 狀態碼"""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ResponseFormatError(CrawlerError):
+    """回傳內容無法解析或格式不符"""
+
+
+class APIError(CrawlerError):
+    """API 回傳的狀態不是 OK"""
+
+
+class NoDataError(APIError):
+    """API 明確回傳查無資料（如休市日的全市場報表）"""
@@ -0,0 +1,335 @@
+"""
+技術指標
+
+以收盤價陣列計算均線（MA）、指數均線（EMA）、RSI、MACD 與布林通道，全部以 NumPy 向量運算完成。
+每個指標計算時會一併回傳「延續狀態」（如最後的 EMA 值、最後幾筆收盤價），
+新的交易日資料進來時只需以狀態接續計算尾端，不必重算整段歷史。
+"""
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .bars import DailyBars
+
+# 指標輸出：名稱 -> 與收盤價等長的陣列（暖機期間為 NaN）
+OUTPUTS = dict[str, np.ndarray]
+
+
+def ema_filter(values: np.ndarray, alpha: float, initial: float = np.nan) -> np.ndarray:
+    """
+    計算指數移動平均 y[t] = alpha * x[t] + (1 - alpha) * y[t-1]。
+
+    以分段的累積和向量化遞迴式：每段內 y[k] = (1-alpha)^(k+1) * y[-1] + alpha * Σ (1-alpha)^(k-j) * x[j]，
+    分段長度依 alpha 決定，確保 (1-alpha)^-k 不會溢位。
+
+    參數:
+        values (np.ndarray): 輸入值，不可包含 NaN。
+        alpha (float): 平滑係數，0 < alpha <= 1。
+        initial (float): 前一個輸出值；NaN 表示沒有，以第一筆輸入作為起點。
+
+    回傳:
+        np.ndarray: 與輸入等長的指數移動平均。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.empty_like(values)
+    if len(values) == 0:
+        return result
+    if alpha >= 1:
+        result[:] = values
+        return result
+
+    start = 0
+    previous = initial
+    if np.isnan(previous):
+        result[0] = previous = values[0]
+        start = 1
+
+    decay = 1.0 - alpha
+    chunk = max(1, int(250 / -math.log10(decay)))
+    powers = decay ** np.arange(chunk + 1)
+    inverse = 1.0 / powers[:-1]
+    while start < len(values):
+        block = values[start:start + chunk]
+        n = len(block)
+        sums = np.cumsum(block * inverse[:n])
+        result[start:start + n] = powers[1:n + 1] * previous + alpha * powers[:n] * sums
+        previous = result[start + n - 1]
+        start += n
+    return result
+
+
+class Indicator:
+    """
+    技術指標基底類別
+
+    子類別實作 `compute(closes, state)`：state 為 None 時從頭計算，否則以上次回傳的狀態接續計算新的收盤價。
+    """
+
+    NAME = ""
+    DEFAULT_PARAMS: tuple[int, ...] = ()
+    # 畫在價格軸上的指標（均線、通道）；其餘（RSI、MACD）畫在副軸
+    PRICE_OVERLAY = True
+
+    def __init__(self, *params: int):
+        self.params = tuple(params) or self.DEFAULT_PARAMS
+        if any(param <= 0 for param in self.params):
+            raise ValueError("指標參數必須為正整數")
+
+    @property
+    def key(self) -> str:
+        return self.NAME + "_".join(str(param) for param in self.params)
+
+    @property
+    def label(self) -> str:
+        return f"{self.NAME.upper()}({','.join(str(param) for param in self.params)})"
+
+    def compute(self, closes: np.ndarray, state: Optional[dict] = None) -> tuple[OUTPUTS, dict]:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return self.label
+
+
+class SMA(Indicator):
+    """簡單移動平均"""
+
+    NAME = "ma"
+    DEFAULT_PARAMS = (20,)
+
+    def compute(self, closes, state=None):
+        window = self.params[0]
+        history = state["tail"] if state else np.empty(0)
+        values = np.concatenate((history, closes))
+        means = np.full(len(values), np.nan)
+        if len(values) >= window:
+            means[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+        return {self.label: means[len(history):]}, {"tail": values[-(window - 1):] if window > 1 else np.empty(0)}
+
+
+class EMA(Indicator):
+    """指數移動平均"""
+
+    NAME = "ema"
+    DEFAULT_PARAMS = (20,)
+
+    def compute(self, closes, state=None):
+        span = self.params[0]
+        ema = ema_filter(closes, 2 / (span + 1), state["ema"] if state else np.nan)
+        last = ema[-1] if len(ema) else (state["ema"] if state else np.nan)
+        return {self.label: ema}, {"ema": last}
+
+
+class RSI(Indicator):
+    """相對強弱指標（Wilder 平滑）"""
+
+    NAME = "rsi"
+    DEFAULT_PARAMS = (14,)
+    PRICE_OVERLAY = False
+
+    def compute(self, closes, state=None):
+        period = self.params[0]
+        state = dict(state) if state else {
+            "close": np.nan, "gain": np.nan, "loss": np.nan, "count": 0, "gain_sum": 0.0, "loss_sum": 0.0,
+        }
+
+        changes = np.diff(np.concatenate(([state["close"]], closes)))
+        if np.isnan(state["close"]):
+            changes = changes[1:]  # 第一筆收盤價沒有漲跌
+        ups = np.clip(changes, 0, None)
+        downs = np.clip(-changes, 0, None)
+        gains = np.full(len(changes), np.nan)
+        losses = np.full(len(changes), np.nan)
+
+        start = 0
+        if np.isnan(state["gain"]):
+            # 以前 period 筆漲跌的簡單平均作為起點（Wilder 的定義），尚未累積足夠時只記錄總和
+            start = min(period - state["count"], len(changes))
+            state["gain_sum"] += float(ups[:start].sum())
+            state["loss_sum"] += float(downs[:start].sum())
+            state["count"] += start
+            if state["count"] == period:
+                state["gain"] = gains[start - 1] = state["gain_sum"] / period
+                state["loss"] = losses[start - 1] = state["loss_sum"] / period
+        if start < len(changes):
+            gains[start:] = ema_filter(ups[start:], 1 / period, state["gain"])
+            losses[start:] = ema_filter(downs[start:], 1 / period, state["loss"])
+            state.update(gain=gains[-1], loss=losses[-1])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+        rsi[np.isnan(gains)] = np.nan
+        if len(rsi) < len(closes):
+            rsi = np.concatenate(([np.nan], rsi))
+
+        if len(closes):
+            state["close"] = closes[-1]
+        return {self.label: rsi}, state
+
+
+class MACD(Indicator):
+    """指數平滑異同移動平均線"""
+
+    NAME = "macd"
+    DEFAULT_PARAMS = (12, 26, 9)
+    PRICE_OVERLAY = False
+
+    def __init__(self, *params: int):
+        super().__init__(*params)
+        if len(self.params) != 3:
+            raise ValueError("MACD 需要三個參數：快線、慢線、訊號線")
+
+    def compute(self, closes, state=None):
+        fast, slow, signal = self.params
+        state = state or {"fast": np.nan, "slow": np.nan, "signal": np.nan}
+        fast_ema = ema_filter(closes, 2 / (fast + 1), state["fast"])
+        slow_ema = ema_filter(closes, 2 / (slow + 1), state["slow"])
+        macd = fast_ema - slow_ema
+        signal_line = ema_filter(macd, 2 / (signal + 1), state["signal"])
+        if len(closes) == 0:
+            return {"MACD": macd, "Signal": signal_line, "Histogram": macd}, state
+        return (
+            {"MACD": macd, "Signal": signal_line, "Histogram": macd - signal_line},
+            {"fast": fast_ema[-1], "slow": slow_ema[-1], "signal": signal_line[-1]},
+        )
+
+
+class Bollinger(Indicator):
+    """布林通道"""
+
+    NAME = "bb"
+    DEFAULT_PARAMS = (20, 2)
+
+    def __init__(self, *params: int):
+        super().__init__(*params)
+        # 只給週期時，通道寬度預設為 2 倍標準差
+        self.params = (self.params + self.DEFAULT_PARAMS[len(self.params):])[:2]
+
+    def compute(self, closes, state=None):
+        window, width = self.params
+        history = state["tail"] if state else np.empty(0)
+        values = np.concatenate((history, closes))
+        middle = np.full(len(values), np.nan)
+        deviation = np.full(len(values), np.nan)
+        if len(values) >= window:
+            windows = sliding_window_view(values, window)
+            middle[window - 1:] = windows.mean(axis=1)
+            deviation[window - 1:] = windows.std(axis=1)
+        n = len(history)
+        return (
+            {
+                "上軌": middle[n:] + width * deviation[n:],
+                "中軌": middle[n:],
+                "下軌": middle[n:] - width * deviation[n:],
+            },
+            {"tail": values[-(window - 1):] if window > 1 else np.empty(0)},
+        )
+
+
+INDICATORS: dict[str, type[Indicator]] = {
+    "ma": SMA,
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": RSI,
+    "macd": MACD,
+    "bb": Bollinger,
+    "boll": Bollinger,
+}
+
+NAME_PATTERN = re.compile(r"^([a-z]+)(\d+(?:[,_]\d+)*)?$")
+
+
+def parse_indicator(name: str) -> Indicator:
+    """
+    解析指標名稱，如 "ma20"、"ema12"、"rsi"、"macd12,26,9"、"bb20"。
+
+    引發:
+        ValueError: 若指標不存在或參數格式錯誤。
+    """
+    match = NAME_PATTERN.match(name.strip().lower())
+    if not match or match.group(1) not in INDICATORS:
+        raise ValueError(f"不支援的指標：{name}，可用的指標有 ma、ema、rsi、macd、bb")
+    params = [int(param) for param in re.split(r"[,_]", match.group(2))] if match.group(2) else []
+    return INDICATORS[match.group(1)](*params)
+
+
+class IndicatorCache:
+    """
+    技術指標的記憶體快取
+
+    以 (股票代號, 指標) 為鍵保存整段歷史的計算結果與延續狀態。再次查詢時若原本的日期是新資料的前綴
+    （只是多了新的交易日），就只以狀態計算新增的尾端；歷史資料有變動時才整段重算。超過容量時以 LRU 淘汰。
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.full = 0
+        self.incremental = 0
+        self.hits = 0
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[tuple[str, str], dict] = OrderedDict()
+
+    def series(self, stock_no: str, bars: DailyBars, indicator: Indicator) -> tuple[DailyBars, OUTPUTS]:
+        """
+        取得指標於整段每日資料上的計算結果。
+
+        參數:
+            stock_no (str): 股票代號。
+            bars (DailyBars): 該股票依日期排序的每日資料。
+            indicator (Indicator): 指標。
+
+        回傳:
+            tuple[DailyBars, OUTPUTS]: (有收盤價的每日資料, 指標輸出)，兩者逐筆對齊。
+        """
+        bars = bars.take(~np.isnan(bars["close"]))
+        dates, closes = bars["date"], bars["close"]
+        key = (stock_no, indicator.key)
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+
+        if entry is not None:
+            n = len(entry["dates"])
+            if n <= len(dates) and np.array_equal(entry["dates"], dates[:n]) and np.array_equal(entry["closes"], closes[:n]):
+                if n == len(dates):
+                    with self.__lock:
+                        self.hits += 1
+                    return bars, entry["outputs"]
+                tail, state = indicator.compute(closes[n:], entry["state"])
+                outputs = {name: np.concatenate((entry["outputs"][name], values)) for name, values in tail.items()}
+                with self.__lock:
+                    self.incremental += 1
+                self.__put(key, dates, closes, outputs, state)
+                return bars, outputs
+
+        outputs, state = indicator.compute(closes)
+        with self.__lock:
+            self.full += 1
+        self.__put(key, dates, closes, outputs, state)
+        return bars, outputs
+
+    def __put(self, key: tuple[str, str], dates: np.ndarray, closes: np.ndarray, outputs: OUTPUTS, state: dict) -> None:
+        with self.__lock:
+            self.__entries[key] = {"dates": dates.copy(), "closes": closes.copy(), "outputs": outputs, "state": state}
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self.__lock:
+            return {
+                "entries": len(self.__entries),
+                "hits": self.hits,
+                "incremental": self.incremental,
+                "full": self.full,
+            }
@@ -0,0 +1,592 @@
+"""
+全市場單日報表整批匯入
+
+一次 MI_INDEX 請求即可取得當日所有上市股票的收盤資料，解析後寫入本地每日交易資料庫，
+取代逐檔呼叫 STOCK_DAY。三大法人買賣超（T86）、融資融券（MI_MARGN）與成交量前二十名（MI_INDEX20）
+同樣以日期為單位整批匯入個股資料表，每個日期只需下載一次。建議每個交易日收盤後執行一次：
+
+    python -m crawler.ingest                      # 匯入今天
+    python -m crawler.ingest --date 20250417      # 匯入指定日期
+    python -m crawler.ingest --start 20250401 --end 20250417
+    python -m crawler.ingest --report T86 --start 20250401
+"""
+import argparse
+import concurrent.futures
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+import utils
+from .bars import BarRow, to_int, to_number
+from .errors import APIError, CrawlerError, NoDataError
+from .store import REPORT_TABLES, BarStore
+from .twse import TaiwanStockExchangeCrawler
+
+logger = logging.getLogger(__name__)
+
+# 使用者查詢報表時，單次請求最多下載的日期數與等待秒數；其餘日期改由背景工作匯入
+REPORT_DAYS_PER_REQUEST = int(os.getenv("TWSE_REPORT_DAYS_PER_REQUEST", "10"))
+REPORT_REQUEST_TIMEOUT = float(os.getenv("TWSE_REPORT_TIMEOUT", "20"))
+# 背景匯入每次最多下載的日期數，與背景匯入專用的執行緒池（不佔用使用者查詢共用的 EXECUTOR）
+REPORT_BACKFILL_BUDGET = int(os.getenv("TWSE_REPORT_BACKFILL_BUDGET", "20"))
+REPORT_BACKFILL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("TWSE_REPORT_BACKFILL_WORKERS", "1")),
+    thread_name_prefix="twse-report-backfill",
+)
+
+# 漲跌符號欄位為 HTML，如 "<p style= color:red>+</p>"
+TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def iter_tables(data: dict) -> Iterator[tuple[list[str], list[list[str]]]]:
+    """
+    列舉 TWSE 回傳資料中的所有表格。
+
+    新版格式將各表格放在 "tables"，舊版則為 "fields"/"data" 或 "fieldsN"/"dataN" 成對的鍵。
+
+    回傳:
+        Iterator[tuple[list[str], list[list[str]]]]: (欄位, 資料列)。
+    """
+    for table in data.get("tables", []):
+        yield table.get("fields", []), table.get("data", [])
+    for key, fields in data.items():
+        if key.startswith("fields") and isinstance(fields, list):
+            yield fields, data.get("data" + key[len("fields"):], [])
+
+
+def find_table(data: dict, *required: str) -> Optional[tuple[list[str], list[list[str]]]]:
+    """
+    找出第一個包含所有指定欄位的表格。
+
+    回傳:
+        Optional[tuple[list[str], list[list[str]]]]: (欄位, 資料列)，找不到時回傳 None。
+    """
+    for fields, rows in iter_tables(data):
+        if all(field in fields for field in required):
+            return fields, rows
+    return None
+
+
+def find_stock_table(data: dict) -> Optional[tuple[list[str], list[list[str]]]]:
+    """
+    從 MI_INDEX 回傳資料中找出個股收盤行情的表格。
+
+    回傳:
+        Optional[tuple[list[str], list[list[str]]]]: (欄位, 資料列)，找不到時回傳 None。
+    """
+    return find_table(data, "證券代號", "收盤價")
+
+
+def signed_change(sign: str, change: str) -> Optional[float]:
+    """依漲跌符號欄位（HTML，如 "<p style= color:green>-</p>"）為漲跌價差加上正負號。"""
+    value = to_number(change)
+    if value is not None and TAG_PATTERN.sub("", sign).strip() == "-":
+        value = -value
+    return value
+
+
+def parse_market_index(data: dict, date: str) -> list[tuple]:
+    """
+    將 MI_INDEX 回傳資料解析為每日資料表的列。
+
+    參數:
+        data (dict): MI_INDEX 回傳的 JSON。
+        date (str): 資料日期，格式為 YYYYMMDD。
+
+    回傳:
+        list[tuple]: 每列為 (股票代號, *BarRow)。
+    """
+    table = find_stock_table(data)
+    if table is None:
+        return []
+
+    fields, rows = table
+    index = {field: i for i, field in enumerate(fields)}
+    result: list[tuple] = []
+    for row in rows:
+        def value(field: str) -> str:
+            return row[index[field]] if field in index else ""
+
+        change = signed_change(value("漲跌(+/-)"), value("漲跌價差"))
+
+        bar: BarRow = (
+            int(date),
+            to_int(value("成交股數")),
+            to_int(value("成交金額")),
+            to_number(value("開盤價")),
+            to_number(value("最高價")),
+            to_number(value("最低價")),
+            to_number(value("收盤價")),
+            change,
+            to_int(value("成交筆數")),
+        )
+        result.append((value("證券代號").strip(), *bar))
+    return result
+
+
+def parse_institutional(data: dict, date: str) -> list[tuple]:
+    """
+    將三大法人買賣超（T86）解析為 institutional_flows 資料表的列。
+
+    外資欄位名稱隨改版不同（如「外陸資買進股數(不含外資自營商)」、「外資買進股數」），以前綴比對；
+    外資買賣超另外加上外資自營商的部分。
+
+    回傳:
+        list[tuple]: 每列為 (股票代號, 日期, *欄位值)，順序與 `REPORT_TABLES["T86"]` 相同。
+    """
+    table = find_table(data, "證券代號", "三大法人買賣超股數")
+    if table is None:
+        return []
+
+    fields, rows = table
+
+    def column(*prefixes: str) -> Optional[int]:
+        for prefix in prefixes:
+            for i, field in enumerate(fields):
+                if field.startswith(prefix):
+                    return i
+        return None
+
+    index = {
+        "foreign_buy": column("外陸資買進股數", "外資買進股數"),
+        "foreign_sell": column("外陸資賣出股數", "外資賣出股數"),
+        "foreign_net": column("外陸資買賣超股數", "外資買賣超股數"),
+        "foreign_dealer_net": column("外資自營商買賣超股數"),
+        "trust_buy": column("投信買進股數"),
+        "trust_sell": column("投信賣出股數"),
+        "trust_net": column("投信買賣超股數"),
+        "dealer_net": column("自營商買賣超股數"),
+        "total_net": column("三大法人買賣超股數"),
+    }
+
+    result: list[tuple] = []
+    for row in rows:
+        def value(name: str) -> int:
+            i = index[name]
+            return (to_int(row[i]) or 0) if i is not None else 0
+
+        result.append((
+            row[fields.index("證券代號")].strip(),
+            int(date),
+            value("foreign_buy"),
+            value("foreign_sell"),
+            value("foreign_net") + value("foreign_dealer_net"),
+            value("trust_buy"),
+            value("trust_sell"),
+            value("trust_net"),
+            value("dealer_net"),
+            value("total_net"),
+        ))
+    return result
+
+
+def parse_margin(data: dict, date: str) -> list[tuple]:
+    """
+    將融資融券彙總（MI_MARGN）解析為 margin_balances 資料表的列。
+
+    融資與融券的欄位名稱重複（買進、賣出、前日餘額…），因此依欄位位置解析：
+    代號、名稱、融資（買進、賣出、現金償還、前日餘額、今日餘額、限額）、
+    融券（買進、賣出、現券償還、前日餘額、今日餘額、限額）、資券互抵。
+
+    回傳:
+        list[tuple]: 每列為 (股票代號, 日期, *欄位值)，順序與 `REPORT_TABLES["MI_MARGN"]` 相同。
+    """
+    table = next(
+        ((fields, rows) for fields, rows in iter_tables(data)
+         if len(fields) >= 15 and fields[0] in ("代號", "股票代號")),
+        None,
+    )
+    if table is None:
+        return []
+
+    _, rows = table
+    result: list[tuple] = []
+    for row in rows:
+        if len(row) < 15:
+            continue
+        values = [to_int(cell) or 0 for cell in row[2:15]]
+        (margin_buy, margin_sell, margin_redeem, _, margin_balance, margin_limit,
+         short_buy, short_sell, short_redeem, _, short_balance, short_limit, offset) = values
+        result.append((
+            row[0].strip(), int(date),
+            margin_buy, margin_sell, margin_redeem, margin_balance, margin_limit,
+            short_buy, short_sell, short_redeem, short_balance, short_limit, offset,
+        ))
+    return result
+
+
+def parse_volume_rank(data: dict, date: str) -> list[tuple]:
+    """
+    將成交量前二十名證券（MI_INDEX20）解析為 volume_ranks 資料表的列。
+
+    回傳:
+        list[tuple]: 每列為 (股票代號, 日期, *欄位值)，順序與 `REPORT_TABLES["MI_INDEX20"]` 相同。
+    """
+    table = find_table(data, "證券代號", "排名")
+    if table is None:
+        return []
+
+    fields, rows = table
+    index = {field: i for i, field in enumerate(fields)}
+    result: list[tuple] = []
+    for row in rows:
+        def value(field: str) -> str:
+            return row[index[field]] if field in index else ""
+
+        result.append((
+            value("證券代號").strip(),
+            int(date),
+            to_int(value("排名")),
+            to_int(value("成交股數")),
+            to_int(value("成交筆數")),
+            to_number(value("收盤價")),
+            signed_change(value("漲跌(+/-)"), value("漲跌價差")),
+        ))
+    return result
+
+
+# 報表代號 -> 解析函式
+REPORT_PARSERS: dict[str, Callable[[dict, str], list[tuple]]] = {
+    "T86": parse_institutional,
+    "MI_MARGN": parse_margin,
+    "MI_INDEX20": parse_volume_rank,
+}
+
+# 報表代號 -> 報表名稱（`TaiwanStockExchangeCrawler.REPORTS` 的鍵）
+REPORT_NAMES: dict[str, str] = {
+    "T86": "三大法人買賣超",
+    "MI_MARGN": "融資融券與借券成交明細",
+    "MI_INDEX20": "成交量前二十名",
+}
+
+
+def ingest_market_day(date: Optional[str] = None, store: Optional[BarStore] = None) -> int:
+    """
+    匯入單日的收盤行情至本地每日交易資料庫。
+
+    參數:
+        date (Optional[str]): 日期，格式為 YYYYMMDD，預設為今天。
+        store (Optional[BarStore]): 目標資料庫，預設為爬蟲共用的 `TaiwanStockExchangeCrawler.STORE`。
+
+    回傳:
+        int: 寫入的股票筆數，非交易日或匯入失敗時為 0。
+    """
+    date = date or utils.date.today()
+    store = store or TaiwanStockExchangeCrawler.STORE
+    try:
+        data = TaiwanStockExchangeCrawler.report("每日收盤行情", (date, date))
+    except NoDataError:
+        # 查無資料表示當日休市；但今天的資料可能只是尚未公布，不記錄以便稍後重試
+        if date < utils.date.today():
+            store.mark_day(date, trading=False)
+        return 0
+    except APIError as e:
+        logger.warning("收盤行情匯入失敗（%s），稍後重試：%s", date, e)
+        return 0
+
+    rows = parse_market_index(data, date)
+    if not rows:
+        # 有回應卻解析不出資料（如格式改版），不記錄為已匯入，以免交易日被當成休市日
+        logger.warning("收盤行情解析不到資料（%s），稍後重試", date)
+        return 0
+    count = store.put_market_bars(rows)
+    store.mark_day(date, trading=True)
+    return count
+
+
+def ingest_market_range(start: str, end: str, store: Optional[BarStore] = None) -> dict[str, int]:
+    """
+    依序匯入期間內每一天的收盤行情，略過已匯入的日期。
+
+    參數:
+        start (str): 起始日期，格式為 YYYYMMDD。
+        end (str): 結束日期，格式為 YYYYMMDD。
+        store (Optional[BarStore]): 目標資料庫。
+
+    回傳:
+        dict[str, int]: 日期 -> 寫入筆數。
+    """
+    store = store or TaiwanStockExchangeCrawler.STORE
+    done = store.ingested_days(start, end)
+    result: dict[str, int] = {}
+    day = datetime.strptime(start, "%Y%m%d")
+    while day <= datetime.strptime(end, "%Y%m%d"):
+        date = day.strftime("%Y%m%d")
+        if date not in done:
+            result[date] = ingest_market_day(date, store)
+        day += timedelta(days=1)
+    return result
+
+
+def missing_market_days(trading_days: int, end: Optional[str] = None, store: Optional[BarStore] = None) -> list[str]:
+    """
+    列出涵蓋最近 trading_days 個交易日的期間內，尚未匯入收盤行情的平日，由新到舊排序。
+
+    參數:
+        trading_days (int): 需要的交易日數（依每週五個交易日換算期間，並多留國定假日的餘裕）。
+        end (Optional[str]): 最後一天，格式為 YYYYMMDD，預設為最近一個已收盤的日期。
+        store (Optional[BarStore]): 資料庫。
+
+    回傳:
+        list[str]: 尚未匯入的日期。
+    """
+    store = store or TaiwanStockExchangeCrawler.STORE
+    end = end or utils.date.last_closed_date()
+    last = datetime.strptime(end, "%Y%m%d")
+    first = last - timedelta(days=trading_days * 7 // 5 + 15)
+    done = store.ingested_days(first.strftime("%Y%m%d"), end)
+    missing: list[str] = []
+    day = last
+    while day >= first:
+        if day.weekday() < 5 and day.strftime("%Y%m%d") not in done:
+            missing.append(day.strftime("%Y%m%d"))
+        day -= timedelta(days=1)
+    return missing
+
+
+def backfill_market_history(
+    trading_days: int,
+    budget: Optional[int] = None,
+    store: Optional[BarStore] = None,
+) -> dict[str, int]:
+    """
+    補齊最近 trading_days 個交易日的收盤行情（由最近的日期開始），供需要較長歷史的計算（如 60 日均線）使用。
+
+    參數:
+        trading_days (int): 需要的交易日數。
+        budget (Optional[int]): 本次最多下載的天數，None 表示不限制。
+        store (Optional[BarStore]): 資料庫。
+
+    回傳:
+        dict[str, int]: 日期 -> 寫入筆數。
+    """
+    store = store or TaiwanStockExchangeCrawler.STORE
+    missing = missing_market_days(trading_days, store=store)
+    return {date: ingest_market_day(date, store) for date in missing[:budget]}
+
+
+# 同一時間只執行一個背景補齊工作
+BACKFILL_LOCK = threading.Lock()
+
+
+def start_backfill(trading_days: int) -> bool:
+    """
+    在爬蟲的預先載入執行緒池中補齊收盤行情，不佔用使用者請求的處理時間。
+
+    回傳:
+        bool: 是否啟動了新的補齊工作（已有工作進行中時回傳 False）。
+    """
+    if not BACKFILL_LOCK.acquire(blocking=False):
+        return False
+
+    def run() -> None:
+        try:
+            backfill_market_history(trading_days)
+        except Exception as e:
+            logger.warning("收盤行情補齊失敗：%s", e)
+        finally:
+            BACKFILL_LOCK.release()
+
+    try:
+        TaiwanStockExchangeCrawler.PREFETCH_EXECUTOR.submit(run)
+    except RuntimeError:
+        BACKFILL_LOCK.release()  # 執行緒池已關閉
+        return False
+    return True
+
+
+def ingest_report_day(report_code: str, date: str, store: Optional[BarStore] = None) -> int:
+    """
+    匯入單日的全市場報表（T86、MI_MARGN 或 MI_INDEX20）至本地資料庫。
+
+    參數:
+        report_code (str): 報表代號，需為 `REPORT_PARSERS` 中的鍵。
+        date (str): 日期，格式為 YYYYMMDD。
+        store (Optional[BarStore]): 目標資料庫，預設為爬蟲共用的 `TaiwanStockExchangeCrawler.STORE`。
+
+    回傳:
+        int: 寫入的股票筆數，非交易日或匯入失敗（包含連線失敗與逾時）時為 0，不記錄以便稍後重試。
+    """
+    if report_code not in REPORT_PARSERS:
+        raise ValueError(f"不支援的報表代號：{report_code}")
+    store = store or TaiwanStockExchangeCrawler.STORE
+    try:
+        data = TaiwanStockExchangeCrawler.report(REPORT_NAMES[report_code], (date, date))
+    except NoDataError:
+        # 與收盤行情相同：今天的資料可能尚未公布，不記錄以便稍後重試
+        if date < utils.date.today():
+            store.mark_report_day(report_code, date, trading=False)
+        return 0
+    except CrawlerError as e:
+        logger.warning("%s 匯入失敗（%s），稍後重試：%s", report_code, date, e)
+        return 0
+
+    rows = REPORT_PARSERS[report_code](data, date)
+    if not rows:
+        logger.warning("%s 解析不到資料（%s），稍後重試", report_code, date)
+    return store.put_report_rows(report_code, date, rows)
+
+
+def missing_report_days(report_code: str, start: str, end: str, store: Optional[BarStore] = None) -> list[str]:
+    """
+    列出期間內尚未匯入報表的平日（不含未來的日期），由新到舊排序。
+
+    回傳:
+        list[str]: 尚未匯入的日期。
+    """
+    store = store or TaiwanStockExchangeCrawler.STORE
+    done = store.reported_days(report_code, start, end)
+    missing: list[str] = []
+    first = datetime.strptime(start, "%Y%m%d")
+    day = datetime.strptime(min(end, utils.date.today()), "%Y%m%d")
+    while day >= first:
+        date = day.strftime("%Y%m%d")
+        if day.weekday() < 5 and date not in done:
+            missing.append(date)
+        day -= timedelta(days=1)
+    return missing
+
+
+def ingest_report_range(
+    report_code: str,
+    start: str,
+    end: str,
+    store: Optional[BarStore] = None,
+    budget: Optional[int] = None,
+    timeout: Optional[float] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> dict[str, int]:
+    """
+    匯入期間內每個平日的全市場報表，略過已匯入、週末與未來的日期。各日期以爬蟲的共用執行緒池同時下載，
+    由最近的日期開始。
+
+    參數:
+        report_code (str): 報表代號，需為 `REPORT_PARSERS` 中的鍵。
+        start (str): 起始日期，格式為 YYYYMMDD。
+        end (str): 結束日期，格式為 YYYYMMDD。
+        store (Optional[BarStore]): 目標資料庫。
+        budget (Optional[int]): 本次最多下載的日期數，None 表示不限制。
+        timeout (Optional[float]): 等待下載完成的秒數上限，None 表示不限制；逾時後取消尚未開始的日期。
+        executor (Optional[Executor]): 下載用的執行緒池，預設為爬蟲的共用執行緒池。
+
+    回傳:
+        dict[str, int]: 已完成的日期 -> 寫入筆數。
+    """
+    store = store or TaiwanStockExchangeCrawler.STORE
+    dates = missing_report_days(report_code, start, end, store)[:budget]
+    futures = {
+        (executor or TaiwanStockExchangeCrawler.EXECUTOR).submit(ingest_report_day, report_code, date, store): date
+        for date in dates
+    }
+    counts: dict[str, int] = {}
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=timeout):
+            counts[futures[future]] = future.result()
+    except concurrent.futures.TimeoutError:
+        for future in futures:
+            future.cancel()
+        logger.warning("%s 匯入逾時，已完成 %d/%d 個日期", report_code, len(counts), len(dates))
+    return dict(sorted(counts.items()))
+
+
+# 報表代號 -> 背景匯入的鎖，同一報表同一時間只執行一個背景匯入工作
+REPORT_BACKFILL_LOCKS = {report_code: threading.Lock() for report_code in REPORT_PARSERS}
+
+
+def start_report_backfill(report_code: str, start: str, end: str, store: Optional[BarStore] = None) -> bool:
+    """
+    在爬蟲的預先載入執行緒池中匯入期間內尚未匯入的報表，不佔用使用者請求的處理時間。
+    每次最多下載 `REPORT_BACKFILL_BUDGET` 個日期，並只使用 `REPORT_BACKFILL_EXECUTOR`，不與使用者查詢搶用 EXECUTOR；
+    其餘日期於下一次查詢時再匯入。
+
+    回傳:
+        bool: 是否啟動了新的匯入工作（同一報表已有工作進行中時回傳 False）。
+    """
+    lock = REPORT_BACKFILL_LOCKS[report_code]
+    if not lock.acquire(blocking=False):
+        return False
+
+    def run() -> None:
+        try:
+            ingest_report_range(report_code, start, end, store, budget=REPORT_BACKFILL_BUDGET, executor=REPORT_BACKFILL_EXECUTOR)
+        except Exception as e:
+            logger.warning("%s 背景匯入失敗：%s", report_code, e)
+        finally:
+            lock.release()
+
+    try:
+        TaiwanStockExchangeCrawler.PREFETCH_EXECUTOR.submit(run)
+    except RuntimeError:
+        lock.release()  # 執行緒池已關閉
+        return False
+    return True
+
+
+def pending_report_days(report_code: str, start: str, end: str, store: Optional[BarStore] = None) -> list[str]:
+    """
+    列出期間內應有資料卻尚未匯入的日期（今天的報表可能尚未公布，不列入），供回覆時提示資料不完整。
+
+    回傳:
+        list[str]: 尚未匯入的日期，由新到舊排序。
+    """
+    today = utils.date.today()
+    return [date for date in missing_report_days(report_code, start, end, store) if date < today]
+
+
+def report_series(
+    report_code: str,
+    stock_no: str,
+    start: str,
+    end: str,
+    store: Optional[BarStore] = None,
+) -> dict[str, np.ndarray]:
+    """
+    取得單一股票期間內的報表資料；尚未匯入的日期會先整批匯入，之後同一期間的查詢只讀本地資料庫。
+
+    每次請求最多匯入 `REPORT_DAYS_PER_REQUEST` 個日期並最多等待 `REPORT_REQUEST_TIMEOUT` 秒，
+    其餘日期交由背景工作匯入，回傳的資料可能不完整（見 `pending_report_days`）。
+
+    參數:
+        report_code (str): 報表代號，需為 `REPORT_PARSERS` 中的鍵。
+        stock_no (str): 股票代號。
+        start (str): 起始日期，格式為 YYYYMMDD。
+        end (str): 結束日期，格式為 YYYYMMDD。
+        store (Optional[BarStore]): 資料庫。
+
+    回傳:
+        dict[str, np.ndarray]: "date" 與 `REPORT_TABLES` 中各欄位的陣列，依日期排序。
+    """
+    store = store or TaiwanStockExchangeCrawler.STORE
+    ingest_report_range(report_code, start, end, store, budget=REPORT_DAYS_PER_REQUEST, timeout=REPORT_REQUEST_TIMEOUT)
+    if pending_report_days(report_code, start, end, store):
+        start_report_backfill(report_code, start, end, store)
+    return store.report_columns(report_code, stock_no, start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="匯入全市場單日報表至本地資料庫")
+    parser.add_argument("--report", default="MI_INDEX", choices=["MI_INDEX", *REPORT_TABLES], help="報表代號，預設為每日收盤行情（MI_INDEX）")
+    parser.add_argument("--date", help="單日，格式為 YYYYMMDD，預設為今天")
+    parser.add_argument("--start", help="起始日期，格式為 YYYYMMDD")
+    parser.add_argument("--end", help="結束日期，格式為 YYYYMMDD，預設為今天")
+    args = parser.parse_args()
+
+    if args.report == "MI_INDEX":
+        if args.start:
+            counts = ingest_market_range(args.start, args.end or utils.date.today())
+        else:
+            date = args.date or utils.date.today()
+            counts = {date: ingest_market_day(date)}
+    elif args.start:
+        counts = ingest_report_range(args.report, args.start, args.end or utils.date.today())
+    else:
+        date = args.date or utils.date.today()
+        counts = {date: ingest_report_day(args.report, date)}
+
+    for date, count in counts.items():
+        print(f"{date}: {count} 筆")
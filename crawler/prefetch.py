@@ -0,0 +1,284 @@
+"""
+熱門股票的背景預先載入
+
+記錄每檔股票被查詢的頻率（隨時間衰減），並於背景執行：
+- 盤前與盤中：在報價過期前預先更新最熱門股票的即時報價。
+- 平日收盤後：補齊選股所需期間（最長均線週期）的每日收盤行情與當日全市場報表，並預先快取熱門股票上個月的每日資料。
+
+所有請求都經由爬蟲的 `fetch()`，因此同樣受 `RATE_LIMITER` 限制。
+"""
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import utils
+from .ingest import ingest_market_day, ingest_report_day, missing_market_days
+from .screen import HISTORY_DAYS
+from .twse import TaiwanStockExchangeCrawler
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """
+    背景預先載入排程
+
+    以指數衰減的分數記錄查詢頻率（半衰期 half_life 秒），每 interval 秒檢查一次目前的交易時段並執行對應的工作。
+    """
+
+    # 收盤後更新失敗時，重新嘗試前的等待秒數
+    RETRY_INTERVAL = 600
+    # 當日收盤行情與報表尚未公布時，重新檢查的間隔秒數與最晚的檢查時間（融資融券約於 21:30 後才公布）
+    PUBLISH_RETRY_INTERVAL = 300
+    PUBLISH_CUTOFF = utils.date.time(23, 0)
+
+    def __init__(
+        self,
+        quote_budget: int = 30,
+        bar_budget: int = 20,
+        market_budget: int = 25,
+        reports: tuple[str, ...] = ("T86", "MI_MARGN"),
+        interval: float = 5.0,
+        half_life: float = 86400.0,
+        idle: float = 1800.0,
+    ):
+        """
+        建立 PrefetchScheduler 物件。
+
+        參數:
+            quote_budget (int): 盤中預先更新報價的股票數上限。
+            bar_budget (int): 收盤後預先快取每日資料的股票數上限（每檔一個請求）。
+            market_budget (int): 收盤後補齊收盤行情的天數上限（每天一個請求）。
+            reports (tuple[str, ...]): 收盤後匯入的全市場報表代號。
+            interval (float): 排程檢查的間隔秒數。
+            half_life (float): 查詢分數的半衰期秒數。
+            idle (float): 超過此秒數沒有任何查詢時暫停預先更新報價。
+        """
+        self.quote_budget = quote_budget
+        self.bar_budget = bar_budget
+        self.market_budget = market_budget
+        self.reports = reports
+        self.interval = interval
+        self.half_life = half_life
+        self.idle = idle
+        self.refreshed_date: Optional[str] = None
+        self.retry_at = 0.0
+        self.last_query = 0.0
+        self.__scores: dict[str, tuple[float, float]] = {}  # 代號 -> (分數, 更新時間)
+        self.__history: deque[dict] = deque(maxlen=50)
+        self.__totals: dict[str, dict[str, int]] = {}
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def record(self, stock_no: str, now: Optional[float] = None) -> None:
+        """記錄一次查詢。"""
+        now = now or time.time()
+        with self.__lock:
+            score, updated_at = self.__scores.get(stock_no, (0.0, now))
+            self.__scores[stock_no] = (self.decay(score, now - updated_at) + 1, now)
+            self.last_query = now
+
+    def decay(self, score: float, elapsed: float) -> float:
+        return score * math.pow(0.5, elapsed / self.half_life)
+
+    def hottest(self, n: int, now: Optional[float] = None) -> list[tuple[str, float]]:
+        """
+        取得目前分數最高的 n 檔股票。
+
+        回傳:
+            list[tuple[str, float]]: (股票代號, 分數)，依分數由高到低排序。
+        """
+        now = now or time.time()
+        with self.__lock:
+            scores = [(stock_no, self.decay(score, now - updated_at)) for stock_no, (score, updated_at) in self.__scores.items()]
+        return heapq.nlargest(n, scores, key=lambda item: item[1])
+
+    def start(self) -> None:
+        """啟動背景執行緒（重複呼叫不會啟動第二個）。"""
+        with self.__lock:
+            if self.__thread is not None and self.__thread.is_alive():
+                return
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, name="twse-prefetch-scheduler", daemon=True)
+            self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop.set()
+
+    def __run(self) -> None:
+        while not self.__stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.exception("預先載入失敗：%s", e)
+
+    def tick(self, now: Optional[float] = None) -> None:
+        """依目前交易時段執行一次排程工作。"""
+        now = now or time.time()
+        dt = utils.date.datetime.fromtimestamp(now, utils.date.TAIPEI_TZ)
+        session = utils.date.market_session(dt)
+        if session in ("pre_open", "trading"):
+            if now - self.last_query <= self.idle:
+                self.warm_quotes(now)
+        elif (
+            dt.weekday() < 5
+            and dt.time() >= utils.date.CLOSE_TIME
+            and self.refreshed_date != dt.strftime("%Y%m%d")
+            and now >= self.retry_at
+        ):
+            self.refresh_after_close(dt.strftime("%Y%m%d"), now)
+
+    def warm_quotes(self, now: Optional[float] = None) -> None:
+        """在報價過期前更新最熱門股票的即時報價（一次批次請求）。"""
+        stock_nos = [stock_no for stock_no, _ in self.hottest(self.quote_budget, now)]
+        if not stock_nos:
+            return
+        crawler = TaiwanStockExchangeCrawler
+        with self.__job("quotes", stock_nos) as job:
+            def loader(expiring: list[str]) -> dict:
+                # 只有即將過期的報價會被重新抓取
+                job["requests"] += len(crawler.real_time_params(expiring))
+                return crawler.fetch_real_time(expiring)
+
+            crawler.QUOTES.get_many(stock_nos, loader, timeout=crawler.TIMEOUT, ahead=self.interval, record=False)
+
+    def refresh_after_close(self, date: str, now: Optional[float] = None) -> None:
+        """
+        收盤後的更新：補齊最近 HISTORY_DAYS 個交易日的收盤行情（選股的均線與近期每日資料可由本地資料庫提供）、
+        匯入當日全市場報表，並預先快取熱門股票上個月的每日資料（已結束的月份會永久保存在報表快取）。
+
+        TWSE 於收盤後一段時間才公布當日資料，當日的收盤行情與報表都匯入後才視為完成；
+        在此之前每 PUBLISH_RETRY_INTERVAL 秒重新檢查，直到 PUBLISH_CUTOFF 為止。
+
+        參數:
+            date (str): 當日日期，格式為 YYYYMMDD。
+            now (Optional[float]): 目前時間（Unix 時間戳），預設為現在。
+        """
+        now = now or time.time()
+        crawler = TaiwanStockExchangeCrawler
+        # 由最近的日期開始補，超過預算的留待下一次
+        missing = missing_market_days(HISTORY_DAYS, end=date)
+        remaining = len(missing) > self.market_budget
+        missing = missing[:self.market_budget]
+
+        jobs: list[dict] = []
+        with self.__job("market", missing) as job:
+            jobs.append(job)
+            for day in missing:
+                ingest_market_day(day)
+                job["requests"] += 1
+
+        reports = [code for code in self.reports if date not in crawler.STORE.reported_days(code, date, date)]
+        with self.__job("reports", reports) as job:
+            jobs.append(job)
+            for report_code in reports:
+                ingest_report_day(report_code, date)
+                job["requests"] += 1
+
+        stock_nos = [stock_no for stock_no, _ in self.hottest(self.bar_budget)]
+        previous_month = utils.date.last_month()
+        with self.__job("bars", stock_nos) as job:
+            jobs.append(job)
+            for stock_no in stock_nos:
+                if crawler.CACHE.get("STOCK_DAY", stock_no, previous_month) is None:
+                    crawler.month_report("STOCK_DAY", previous_month, stock_no)
+                    job["requests"] += 1
+
+        if any(job["error"] for job in jobs) or remaining:
+            # 失敗或尚未補齊時，稍後再執行一次
+            self.retry_at = now + self.RETRY_INTERVAL
+        elif self.published(date):
+            self.refreshed_date = date
+        elif utils.date.datetime.fromtimestamp(now, utils.date.TAIPEI_TZ).time() < self.PUBLISH_CUTOFF:
+            self.retry_at = now + self.PUBLISH_RETRY_INTERVAL
+        else:
+            # 過了最晚的檢查時間仍未公布（如臨時休市），留待下一個交易日的補齊工作
+            logger.warning("%s 的收盤行情或報表至 %s 仍未公布", date, self.PUBLISH_CUTOFF)
+            self.refreshed_date = date
+
+    def published(self, date: str) -> bool:
+        """當日的收盤行情與所有報表是否都已匯入（或已記錄為休市）。"""
+        store = TaiwanStockExchangeCrawler.STORE
+        return date in store.ingested_days(date, date) and all(
+            date in store.reported_days(report_code, date, date) for report_code in self.reports
+        )
+
+    def __job(self, kind: str, targets: list[str]) -> "PrefetchJob":
+        return PrefetchJob(self.__history, self.__totals, self.__lock, kind, targets)
+
+    def status(self) -> dict:
+        """
+        取得排程狀態：設定、熱門股票、最近的預先載入紀錄，以及各快取的命中率。
+        """
+        crawler = TaiwanStockExchangeCrawler
+        with self.__lock:
+            history = list(self.__history)
+            totals = {kind: dict(total) for kind, total in self.__totals.items()}
+            tracked = len(self.__scores)
+        return {
+            "running": self.__thread is not None and self.__thread.is_alive(),
+            "session": utils.date.market_session(),
+            "budgets": {
+                "quotes": self.quote_budget,
+                "bars": self.bar_budget,
+                "market_days": self.market_budget,
+                "reports": list(self.reports),
+            },
+            "tracked_symbols": tracked,
+            "hottest": [{"stock_no": stock_no, "score": round(score, 3)} for stock_no, score in self.hottest(self.quote_budget)],
+            "refreshed_date": self.refreshed_date,
+            "totals": totals,
+            "history": history[::-1],
+            "caches": {
+                "quotes": crawler.QUOTES.stats(),
+                "reports": crawler.CACHE.stats(),
+                "indicators": crawler.INDICATORS.stats(),
+            },
+        }
+
+
+class PrefetchJob:
+    """
+    記錄一次預先載入工作的目標、請求數、耗時與錯誤。
+
+    工作中的錯誤只會記錄下來而不會往外拋出，避免單一工作失敗中斷整個排程。
+    """
+
+    def __init__(self, history: deque, totals: dict[str, dict[str, int]], lock: threading.Lock, kind: str, targets: list[str]):
+        self.history = history
+        self.totals = totals
+        self.lock = lock
+        self.record = {"kind": kind, "targets": targets, "requests": 0, "error": None, "started_at": time.time()}
+
+    def __enter__(self) -> dict:
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.record["seconds"] = round(time.time() - self.record["started_at"], 3)
+        if exc is not None:
+            self.record["error"] = str(exc)
+        with self.lock:
+            self.history.append(self.record)
+            total = self.totals.setdefault(self.record["kind"], {"runs": 0, "requests": 0, "targets": 0, "errors": 0})
+            total["runs"] += 1
+            total["requests"] += self.record["requests"]
+            total["targets"] += len(self.record["targets"])
+            total["errors"] += exc is not None
+        return True
+
+
+PREFETCHER = PrefetchScheduler(
+    quote_budget=int(os.getenv("TWSE_PREFETCH_QUOTES", "30")),
+    bar_budget=int(os.getenv("TWSE_PREFETCH_BARS", "20")),
+    market_budget=int(os.getenv("TWSE_PREFETCH_MARKET_DAYS", "25")),
+    reports=tuple(code for code in os.getenv("TWSE_PREFETCH_REPORTS", "T86,MI_MARGN").split(",") if code),
+    interval=float(os.getenv("TWSE_PREFETCH_INTERVAL", "5")),
+    half_life=float(os.getenv("TWSE_PREFETCH_HALF_LIFE", "86400")),
+    idle=float(os.getenv("TWSE_PREFETCH_IDLE", "1800")),
+)
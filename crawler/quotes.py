@@ -0,0 +1,233 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional
+
+import utils
+from .backend import CacheBackend, MemoryBackend
+from .models import REAL_TIME
+
+
+class QuoteCache:
+    """
+    即時報價的短效快取
+
+    MIS 的即時資料每隔數秒才更新一次，因此在同一時段內重複查詢同一檔股票時直接回傳快取。
+    同時查詢同一檔股票的請求會共用同一個進行中的請求（single-flight），只向 TWSE 發送一次。
+    收盤後取得的報價會保留到下一次開盤為止；但收盤後的寬限時間內，尚未反映收盤集合競價（報價時間早於收盤）
+    的報價仍只短暫快取，以取得最後的收盤價。報價保存在快取後端，使用共用的 SQLite 後端時，
+    同一台主機上的其他行程可直接使用（single-flight 僅限同一行程內）。
+    """
+
+    # 快取後端中的資料種類
+    KIND = "quote"
+
+    def __init__(
+        self,
+        ttl: Optional[dict[str, float]] = None,
+        backend: Optional[CacheBackend] = None,
+        max_entries: int = 2000,
+        settle: float = 600.0,
+    ):
+        """
+        建立 QuoteCache 物件。
+
+        參數:
+            ttl (Optional[dict[str, float]]): 各交易時段的快取秒數，鍵為 "pre_open"、"trading" 與 "settling"
+                （收盤後的寬限時間內，尚未反映收盤價的報價）；其餘收盤時段的報價保留至下一次開盤。
+            backend (Optional[CacheBackend]): 快取後端，預設為僅限本行程的記憶體 LRU。
+            max_entries (int): 未指定 backend 時，記憶體快取最多保存的股票數。
+            settle (float): 收盤後的寬限秒數，期間內等待收盤集合競價的結果。
+        """
+        self.ttl = {"pre_open": 10.0, "trading": 5.0, "settling": 15.0, **(ttl or {})}
+        self.settle = settle
+        self.backend = backend or MemoryBackend(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.__inflight: dict[str, Future] = {}
+        self.__lock = threading.Lock()
+
+    def expires_at(self, now: float, quote: Optional[REAL_TIME] = None) -> float:
+        """
+        計算在 now 時取得的報價應於何時過期。
+
+        平日收盤後的寬限時間內，除非報價本身的時間戳（"tlong"）已在收盤之後（已反映收盤集合競價），
+        否則只快取 "settling" 秒；寬限時間過後的報價保留至下一次開盤。
+
+        參數:
+            now (float): 取得報價的時間（Unix 時間戳）。
+            quote (Optional[REAL_TIME]): 報價內容，用於判斷是否已反映收盤價。
+
+        回傳:
+            float: 過期時間（Unix 時間戳）。
+        """
+        dt = utils.date.datetime.fromtimestamp(now, utils.date.TAIPEI_TZ)
+        session = utils.date.market_session(dt)
+        if session != "closed":
+            return now + self.ttl[session]
+
+        close = utils.date.datetime.combine(dt.date(), utils.date.CLOSE_TIME, tzinfo=utils.date.TAIPEI_TZ).timestamp()
+        if dt.weekday() < 5 and close <= now < close + self.settle and not self.settled(quote, close):
+            return min(now + self.ttl["settling"], close + self.settle)
+        return utils.date.next_market_open(dt).timestamp()
+
+    @staticmethod
+    def settled(quote: Optional[REAL_TIME], close: float) -> bool:
+        """判斷報價的時間戳（"tlong"，毫秒）是否已在收盤時間 close 之後。"""
+        try:
+            return quote is not None and int(quote.get("tlong", "")) / 1000 >= close
+        except (TypeError, ValueError):
+            return False
+
+    def get_many(
+        self,
+        stock_nos: list[str],
+        loader: Callable[[list[str]], dict[str, REAL_TIME]],
+        timeout: Optional[float] = None,
+        ahead: float = 0.0,
+        record: bool = True,
+    ) -> dict[str, REAL_TIME]:
+        """
+        取得多檔股票的報價，僅對未快取且沒有進行中請求的股票呼叫 loader。
+
+        參數:
+            stock_nos (list[str]): 股票代號清單。
+            loader (Callable): 批次抓取報價的函式，傳入股票代號清單，回傳代號 -> 報價。
+            timeout (Optional[float]): 等待其他執行緒進行中請求的最長秒數。
+            ahead (float): 將 ahead 秒內即將過期的報價視為過期，供預先更新使用。
+            record (bool): 是否計入命中率統計；背景預先載入時設為 False，統計只反映使用者的查詢。
+
+        回傳:
+            dict[str, REAL_TIME]: 股票代號 -> 報價，查無資料的代號不會出現在結果中。
+        """
+        cached = self.backend.get_many(self.KIND, stock_nos, min_ttl=ahead)
+        result, waiting, owned = self.__claim(stock_nos, cached, record)
+
+        if owned:
+            try:
+                data = loader(owned)
+            except BaseException as e:
+                self.__fail(owned, e)
+                raise
+            result.update(self.__complete(owned, data))
+
+        for stock_no, future in waiting.items():
+            quote = future.result(timeout=timeout)
+            if quote is not None:
+                result[stock_no] = quote
+
+        return result
+
+    async def get_many_async(
+        self,
+        stock_nos: list[str],
+        loader: Callable[[list[str]], Awaitable[dict[str, REAL_TIME]]],
+        timeout: Optional[float] = None,
+        record: bool = True,
+    ) -> dict[str, REAL_TIME]:
+        """
+        `get_many` 的 asyncio 版本：loader 為協程函式，快取後端的讀寫在執行緒中進行以免阻塞事件迴圈。
+        與同步版本共用進行中的請求，同一檔股票同時只會向 TWSE 發送一次。
+
+        參數:
+            stock_nos (list[str]): 股票代號清單。
+            loader (Callable): 批次抓取報價的協程函式，傳入股票代號清單，回傳代號 -> 報價。
+            timeout (Optional[float]): 等待其他進行中請求的最長秒數。
+            record (bool): 是否計入命中率統計。
+
+        回傳:
+            dict[str, REAL_TIME]: 股票代號 -> 報價，查無資料的代號不會出現在結果中。
+        """
+        cached = await asyncio.to_thread(self.backend.get_many, self.KIND, stock_nos)
+        result, waiting, owned = self.__claim(stock_nos, cached, record)
+
+        if owned:
+            try:
+                data = await loader(owned)
+            except BaseException as e:
+                # 包含取消（CancelledError），否則等待中的請求永遠不會完成
+                self.__fail(owned, e)
+                raise
+            result.update(await asyncio.to_thread(self.__complete, owned, data))
+
+        for stock_no, future in waiting.items():
+            # shield：逾時或被取消時只放棄等待，不取消其他請求共用的進行中 Future
+            quote = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            if quote is not None:
+                result[stock_no] = quote
+
+        return result
+
+    def __claim(
+        self,
+        stock_nos: list[str],
+        cached: dict[str, REAL_TIME],
+        record: bool,
+    ) -> tuple[dict[str, REAL_TIME], dict[str, Future], list[str]]:
+        """將股票分為已快取、等待其他進行中請求，以及由本次請求負責抓取（登記為進行中）三類。"""
+        result: dict[str, REAL_TIME] = {}
+        waiting: dict[str, Future] = {}
+        owned: list[str] = []
+        with self.__lock:
+            for stock_no in stock_nos:
+                if stock_no in cached:
+                    result[stock_no] = cached[stock_no]
+                    self.hits += int(record)
+                elif stock_no in self.__inflight:
+                    waiting[stock_no] = self.__inflight[stock_no]
+                    self.coalesced += int(record)
+                else:
+                    self.__inflight[stock_no] = Future()
+                    owned.append(stock_no)
+                    self.misses += int(record)
+        return result, waiting, owned
+
+    def __fail(self, owned: list[str], error: BaseException) -> None:
+        with self.__lock:
+            for stock_no in owned:
+                future = self.__inflight.pop(stock_no)
+                if not future.done():
+                    future.set_exception(error)
+
+    def __complete(self, owned: list[str], data: dict[str, REAL_TIME]) -> dict[str, REAL_TIME]:
+        """寫入抓取到的報價並通知等待中的請求，回傳 owned 中有資料的報價。"""
+        now = time.time()
+        fetched = {stock_no: data[stock_no] for stock_no in owned if data.get(stock_no) is not None}
+        try:
+            self.backend.put_entries(
+                self.KIND,
+                {stock_no: (quote, self.expires_at(now, quote)) for stock_no, quote in fetched.items()},
+            )
+        finally:
+            # 即使寫入快取失敗，也要讓等待中的請求取得結果
+            with self.__lock:
+                for stock_no in owned:
+                    future = self.__inflight.pop(stock_no)
+                    if not future.done():
+                        future.set_result(fetched.get(stock_no))
+        return fetched
+
+    def clear(self) -> None:
+        """清除所有快取的報價與統計數字。"""
+        self.backend.clear(self.KIND)
+        with self.__lock:
+            self.hits = self.misses = self.coalesced = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        取得快取統計資料。
+
+        回傳:
+            dict: 包含 hits/misses/coalesced/entries/hit_rate。
+        """
+        with self.__lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": self.backend.count(self.KIND),
+                "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+            }
@@ -0,0 +1,186 @@
+"""
+每日交易資料的週期重取樣
+
+將 DailyBars 依日曆區間（週、月、季、年）分組後彙總，全部以 NumPy 的 reduceat 完成，
+不需逐筆建立 Python 物件。DailyBars 已依日期排序，同一區間的資料必定相鄰。
+"""
+from typing import Literal, get_args
+
+import numpy as np
+
+from .bars import FIELD_COLUMNS, DailyBars
+from .models import DAILY_DATA_KEYS
+
+INTERVALS = Literal["day", "week", "month", "quarter", "year"]
+
+AGGREGATIONS = Literal["first", "max", "min", "last", "sum", "mean"]
+
+# 各欄位預設的彙總方式：開高低收為第一筆/最高/最低/最後一筆，量、額、筆數與漲跌為加總
+COLUMN_AGGREGATIONS: dict[str, AGGREGATIONS] = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "turnover": "sum",
+    "change": "sum",
+    "transactions": "sum",
+}
+
+
+def check_interval(interval: str) -> INTERVALS:
+    """
+    檢查間隔單位是否有效。
+
+    引發:
+        ValueError: 若間隔單位不存在。
+    """
+    if interval not in get_args(INTERVALS):
+        raise ValueError(f"間隔單位只能是 {'、'.join(get_args(INTERVALS))}")
+    return interval
+
+
+def bucket_keys(dates: np.ndarray, interval: INTERVALS) -> np.ndarray:
+    """
+    計算每個日期所屬區間的鍵值，鍵值隨日期遞增。
+
+    參數:
+        dates (np.ndarray): YYYYMMDD 整數日期。
+        interval (INTERVALS): 間隔單位。
+
+    回傳:
+        np.ndarray: 區間鍵值，日為 YYYYMMDD、週為該週週一的 YYYYMMDD、月為 YYYYMM、季為 YYYYQ、年為 YYYY。
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    if interval == "day":
+        return dates
+    if interval == "month":
+        return dates // 100
+    if interval == "year":
+        return dates // 10000
+    if interval == "quarter":
+        return dates // 10000 * 10 + (dates // 100 % 100 - 1) // 3 + 1
+
+    # 週：轉為 1970-01-01 起算的日數（該日為週四），往回推到週一
+    months = (dates // 10000 - 1970) * 12 + dates // 100 % 100 - 1
+    days = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + dates % 100 - 1
+    mondays = (days - (days + 3) % 7).astype("datetime64[D]")
+    monday_months = mondays.astype("datetime64[M]")
+    years = mondays.astype("datetime64[Y]").astype(np.int64) + 1970
+    month_numbers = monday_months.astype(np.int64) % 12 + 1
+    day_numbers = (mondays - monday_months.astype("datetime64[D]")).astype(np.int64) + 1
+    return years * 10000 + month_numbers * 100 + day_numbers
+
+
+def bucket_label(key: int, interval: INTERVALS) -> str:
+    """
+    將區間鍵值轉為圖表用的標籤，如 "20250414"、"202504"、"2025Q2"、"2025"。
+    """
+    if interval == "quarter":
+        return f"{key // 10}Q{key % 10}"
+    return str(key)
+
+
+def bucket_starts(keys: np.ndarray) -> np.ndarray:
+    """取得每個區間第一筆資料的索引。"""
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+
+def aggregate(values: np.ndarray, starts: np.ndarray, how: AGGREGATIONS) -> np.ndarray:
+    """
+    依區間彙總單一欄位，NaN（缺值）不參與計算，整個區間都缺值時結果為 NaN。
+
+    參數:
+        values (np.ndarray): 欄位值，依日期排序。
+        starts (np.ndarray): 每個區間第一筆資料的索引（`bucket_starts`）。
+        how (AGGREGATIONS): 彙總方式。
+
+    回傳:
+        np.ndarray: 每個區間一個值。
+    """
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.float64 if how == "mean" else values.dtype)
+
+    if not np.issubdtype(values.dtype, np.floating):
+        if how == "sum":
+            return np.add.reduceat(values, starts)
+        if how == "mean":
+            return np.add.reduceat(values, starts) / np.diff(np.append(starts, len(values)))
+        values = values.astype(np.float64)
+
+    valid = ~np.isnan(values)
+    if how == "max":
+        return np.fmax.reduceat(values, starts)
+    if how == "min":
+        return np.fmin.reduceat(values, starts)
+    if how in ("sum", "mean"):
+        totals = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        if how == "sum":
+            return totals
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+    # first / last：以索引找出區間內第一筆或最後一筆有效值
+    index = np.arange(len(values))
+    if how == "first":
+        picked = np.minimum.reduceat(np.where(valid, index, len(values)), starts)
+        found = picked < len(values)
+    elif how == "last":
+        picked = np.maximum.reduceat(np.where(valid, index, -1), starts)
+        found = picked >= 0
+    else:
+        raise ValueError(f"不支援的彙總方式：{how}")
+    return np.where(found, values[np.clip(picked, 0, len(values) - 1)], np.nan)
+
+
+def resample(bars: DailyBars, interval: INTERVALS) -> tuple[list[str], dict[str, np.ndarray]]:
+    """
+    將每日交易資料重取樣為指定間隔的 OHLCV。
+
+    參數:
+        bars (DailyBars): 每日交易資料。
+        interval (INTERVALS): 間隔單位。
+
+    回傳:
+        tuple[list[str], dict[str, np.ndarray]]: (區間標籤, 欄位 -> 彙總值)，欄位與 `COLUMN_AGGREGATIONS` 相同。
+    """
+    check_interval(interval)
+    keys = bucket_keys(bars["date"], interval)
+    starts = bucket_starts(keys)
+    labels = [bucket_label(key, interval) for key in keys[starts].tolist()]
+    columns = {column: aggregate(bars[column], starts, how) for column, how in COLUMN_AGGREGATIONS.items()}
+    return labels, columns
+
+
+def resample_field(
+    bars: DailyBars,
+    field: DAILY_DATA_KEYS,
+    interval: INTERVALS,
+    how: AGGREGATIONS | None = None,
+) -> tuple[list[str], np.ndarray]:
+    """
+    將每日交易資料中的單一欄位重取樣，並略過整個區間都缺值的結果。
+
+    參數:
+        bars (DailyBars): 每日交易資料。
+        field (DAILY_DATA_KEYS): 中文欄位名稱，如 "收盤價"。
+        interval (INTERVALS): 間隔單位。
+        how (AGGREGATIONS | None): 彙總方式，預設依 `COLUMN_AGGREGATIONS`。
+
+    回傳:
+        tuple[list[str], np.ndarray]: (區間標籤, 彙總值)。
+    """
+    check_interval(interval)
+    column = FIELD_COLUMNS.get(field)
+    if column is None or column == "date":
+        raise KeyError(f"無此欄位：{field}")
+
+    keys = bucket_keys(bars["date"], interval)
+    starts = bucket_starts(keys)
+    values = aggregate(bars[column], starts, how or COLUMN_AGGREGATIONS[column]).astype(np.float64)
+    valid = ~np.isnan(values)
+    labels = [bucket_label(key, interval) for key in keys[starts][valid].tolist()]
+    return labels, values[valid]
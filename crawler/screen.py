@@ -0,0 +1,263 @@
+"""
+全市場選股
+
+以本地每日交易資料庫建立某一交易日的全市場快照（每個欄位為一個涵蓋所有股票的陣列），
+選股條件轉為布林遮罩一次套用至所有股票，再以 heap 取出排序前 k 名，不需逐檔請求 TWSE。
+"""
+import heapq
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .store import BarStore
+
+# 均線週期；快照最多讀取最長週期的交易日數
+MA_WINDOWS = (5, 10, 20, 60)
+# 完整快照需要的交易日數（最長的均線週期）
+HISTORY_DAYS = max(MA_WINDOWS)
+
+# 需要多個交易日才能計算的欄位 -> 交易日數，其餘欄位只需最近一個交易日
+FIELD_WINDOWS: dict[str, int] = {
+    **{f"ma{n}": n for n in MA_WINDOWS},
+    "vol_ma20": 20,
+    "vol_ratio": 20,
+}
+
+# 使用者可用的欄位名稱（含中文別名） -> 快照欄位
+FIELD_ALIASES: dict[str, str] = {
+    "close": "close", "收盤價": "close", "收盤": "close", "價格": "close",
+    "open": "open", "開盤價": "open",
+    "high": "high", "最高價": "high",
+    "low": "low", "最低價": "low",
+    "change": "change", "漲跌": "change",
+    "change%": "change_pct", "pct": "change_pct", "漲跌幅": "change_pct", "漲幅": "change_pct",
+    "volume": "volume", "vol": "volume", "成交量": "volume",
+    "turnover": "turnover", "成交金額": "turnover",
+    "transactions": "transactions", "成交筆數": "transactions",
+    "vol_ma20": "vol_ma20", "均量": "vol_ma20",
+    "vol_ratio": "vol_ratio", "量比": "vol_ratio",
+    **{f"ma{n}": f"ma{n}" for n in MA_WINDOWS},
+}
+
+# 欄位的中文說明，用於回覆訊息
+FIELD_LABELS: dict[str, str] = {
+    "close": "收盤價", "open": "開盤價", "high": "最高價", "low": "最低價",
+    "change": "漲跌", "change_pct": "漲跌幅(%)", "volume": "成交量(張)", "turnover": "成交金額",
+    "transactions": "成交筆數", "vol_ma20": "20日均量(張)", "vol_ratio": "量比",
+    **{f"ma{n}": f"{n}日均線" for n in MA_WINDOWS},
+}
+
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "=": np.equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+CONDITION_PATTERN = re.compile(r"^(.+?)(>=|<=|==|!=|>|<|=)(.+)$")
+
+
+class MarketSnapshot:
+    """
+    單一交易日的全市場欄位式快照
+
+    涵蓋當日有收盤資料的所有股票，欄位包含開高低收、漲跌、漲跌幅、成交量（張）、成交金額、成交筆數，
+    以及由前幾個交易日計算的均線（ma5、ma10、ma20、ma60）、20 日均量與量比。資料不足的均線為 NaN。
+    """
+
+    def __init__(self, date: str, codes: np.ndarray, columns: dict[str, np.ndarray], history: int = 1):
+        self.date = date
+        self.codes = codes
+        self.columns = columns
+        self.history = history  # 建立快照時使用的交易日數
+
+    @classmethod
+    def build(cls, store: BarStore, date: Optional[str] = None) -> Optional["MarketSnapshot"]:
+        """
+        由本地每日交易資料庫建立快照。
+
+        參數:
+            store (BarStore): 每日交易資料庫。
+            date (Optional[str]): 交易日，格式為 YYYYMMDD，預設為最近一個已匯入的交易日。
+
+        回傳:
+            Optional[MarketSnapshot]: 快照，資料庫尚無交易日資料時回傳 None。
+        """
+        days = store.trading_days(end=date, limit=max(MA_WINDOWS))
+        if not days:
+            return None
+
+        stock_nos, bars = store.market_bars(days[0], days[-1])
+        codes, stock_index = np.unique(stock_nos, return_inverse=True)
+        day_index = np.searchsorted(np.array(days, dtype=np.int64), bars["date"])
+
+        # 轉為 (股票 x 交易日) 矩陣，缺少的資料為 NaN
+        def matrix(values: np.ndarray) -> np.ndarray:
+            result = np.full((len(codes), len(days)), np.nan)
+            result[stock_index, day_index] = values
+            return result
+
+        closes = matrix(bars["close"])
+        volumes = matrix(bars["volume"] / 1000)
+        latest = bars["date"] == int(days[-1])
+        listed = np.zeros(len(codes), dtype=bool)
+        listed[stock_index[latest]] = True
+
+        columns: dict[str, np.ndarray] = {}
+        for column in ("open", "high", "low", "change", "turnover", "transactions"):
+            columns[column] = matrix(bars[column])[:, -1]
+        columns["close"] = closes[:, -1]
+        columns["volume"] = volumes[:, -1]
+
+        previous = columns["close"] - columns["change"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns["change_pct"] = np.where(previous > 0, columns["change"] / previous * 100, np.nan)
+
+        for n in MA_WINDOWS:
+            columns[f"ma{n}"] = window_mean(closes, n)
+        columns["vol_ma20"] = window_mean(volumes, 20)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns["vol_ratio"] = np.where(columns["vol_ma20"] > 0, columns["volume"] / columns["vol_ma20"], np.nan)
+
+        return cls(days[-1], codes[listed], {column: values[listed] for column, values in columns.items()}, len(days))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+
+def window_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """每列最後 window 個值的平均，不足 window 個有效值時為 NaN。"""
+    if matrix.shape[1] < window:
+        return np.full(matrix.shape[0], np.nan)
+    tail = matrix[:, -window:]
+    counts = np.count_nonzero(~np.isnan(tail), axis=1)
+    with np.errstate(invalid="ignore"):
+        return np.where(counts == window, np.nansum(tail, axis=1) / window, np.nan)
+
+
+def history_needed(fields: list[str]) -> int:
+    """計算欄位所需的交易日數。"""
+    return max((FIELD_WINDOWS.get(field, 1) for field in fields), default=1)
+
+
+def resolve_field(name: str) -> str:
+    """
+    將使用者輸入的欄位名稱轉為快照欄位。
+
+    引發:
+        ValueError: 若欄位不存在。
+    """
+    field = FIELD_ALIASES.get(name.strip().lower())
+    if field is None:
+        raise ValueError(f"不支援的欄位：{name}")
+    return field
+
+
+@dataclass(frozen=True)
+class Condition:
+    """選股條件，如 change% > 5、volume > 1000、close > ma20"""
+
+    field: str
+    operator: str
+    value: float | str  # 數值，或另一個欄位
+
+    @classmethod
+    def parse(cls, text: str) -> "Condition":
+        """
+        解析條件文字，如 "change%>5"、"成交量>=1000"、"close>ma20"。
+
+        引發:
+            ValueError: 若格式錯誤或欄位不存在。
+        """
+        match = CONDITION_PATTERN.match(text.strip())
+        if not match:
+            raise ValueError(f"無法解析條件：{text}")
+        field, operator, value = match.groups()
+        try:
+            target: float | str = float(value.replace(",", ""))
+        except ValueError:
+            target = resolve_field(value)
+        return cls(resolve_field(field), operator, target)
+
+    @property
+    def fields(self) -> list[str]:
+        """條件使用的快照欄位。"""
+        return [self.field, self.value] if isinstance(self.value, str) else [self.field]
+
+    def mask(self, snapshot: MarketSnapshot) -> np.ndarray:
+        """對快照中所有股票套用條件，缺值（NaN）一律不符合。"""
+        right = snapshot[self.value] if isinstance(self.value, str) else self.value
+        with np.errstate(invalid="ignore"):
+            return OPERATORS[self.operator](snapshot[self.field], right)
+
+    def __str__(self) -> str:
+        value = FIELD_LABELS[self.value] if isinstance(self.value, str) else f"{self.value:g}"
+        return f"{FIELD_LABELS[self.field]} {self.operator} {value}"
+
+
+def screen(
+    snapshot: MarketSnapshot,
+    conditions: list[Condition],
+    sort_by: str = "change_pct",
+    k: int = 10,
+    descending: bool = True,
+) -> tuple[int, list[tuple[str, dict[str, float]]]]:
+    """
+    以條件篩選快照中的股票，並取出排序欄位前 k 名。
+
+    參數:
+        snapshot (MarketSnapshot): 全市場快照。
+        conditions (list[Condition]): 需全部符合的條件。
+        sort_by (str): 排序欄位（快照欄位名稱）。
+        k (int): 回傳的數量。
+        descending (bool): 由大到小排序。
+
+    回傳:
+        tuple[int, list[tuple[str, dict[str, float]]]]: (符合條件的數量, [(股票代號, {欄位: 值})])。
+    """
+    mask = np.ones(len(snapshot), dtype=bool)
+    for condition in conditions:
+        mask &= condition.mask(snapshot)
+
+    keys = snapshot[sort_by]
+    candidates = np.flatnonzero(mask & ~np.isnan(keys))
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    top = pick(k, candidates.tolist(), key=keys.__getitem__)
+
+    fields = dict.fromkeys(["close", "change_pct", "volume", sort_by, *(c.field for c in conditions)])
+    return int(np.count_nonzero(mask)), [
+        (str(snapshot.codes[i]), {field: float(snapshot[field][i]) for field in fields})
+        for i in top
+    ]
+
+
+class SnapshotCache:
+    """
+    全市場快照快取
+
+    快照只在資料庫匯入新的收盤行情後才重新建立，其餘查詢直接共用同一份快照。
+    """
+
+    def __init__(self, store: BarStore):
+        self.store = store
+        self.__lock = threading.Lock()
+        self.__snapshot: Optional[MarketSnapshot] = None
+        self.__version = -1.0
+
+    def get(self) -> Optional[MarketSnapshot]:
+        """取得最近一個交易日的快照，資料庫有新資料時重新建立。"""
+        version = self.store.market_version()
+        with self.__lock:
+            if self.__snapshot is None or version != self.__version:
+                self.__snapshot = MarketSnapshot.build(self.store)
+                self.__version = version
+            return self.__snapshot
@@ -0,0 +1,277 @@
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .errors import RequestFailedError, RequestTimeoutError
+
+
+class HostStats:
+    """單一主機的請求延遲統計（多個執行緒共用，更新時持有鎖）"""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.new_connections = 0
+        self.new_connection_seconds = 0.0
+
+    def record(self, seconds: float, new_connection: bool) -> None:
+        with self.__lock:
+            self.requests += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if new_connection:
+                self.new_connections += 1
+                self.new_connection_seconds += seconds
+
+    def record_error(self) -> None:
+        with self.__lock:
+            self.errors += 1
+
+    def record_retry(self) -> None:
+        with self.__lock:
+            self.retries += 1
+
+    def to_dict(self) -> dict[str, int | float]:
+        with self.__lock:
+            reused = self.requests - self.new_connections
+            avg_new = self.new_connection_seconds / self.new_connections if self.new_connections else 0.0
+            avg_reused = (self.total_seconds - self.new_connection_seconds) / reused if reused else 0.0
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "avg_seconds": self.total_seconds / self.requests if self.requests else 0.0,
+                "max_seconds": self.max_seconds,
+                "new_connections": self.new_connections,
+                "avg_new_connection_seconds": avg_new,
+                "avg_reused_connection_seconds": avg_reused,
+                # 新連線與重用連線的平均延遲差，可估計 TCP + TLS 建立連線的成本
+                "estimated_setup_seconds": max(0.0, avg_new - avg_reused) if self.new_connections and reused else 0.0,
+            }
+
+
+class HostSessions:
+    """
+    依主機分開的連線池
+
+    每個主機（如 www.twse.com.tw、mis.twse.com.tw）使用各自的 `requests.Session`，
+    以 keep-alive 重用 TCP/TLS 連線。`get()` 只發送一次請求；重試由 `request()` 處理，
+    每次嘗試前都會先呼叫 acquire（如取得速率限制的令牌），所有嘗試與退避等待合計不超過期限。
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+    ):
+        """
+        建立 HostSessions 物件。
+
+        參數:
+            pool_size (int): 每個主機保留的最大連線數。
+            max_retries (int): 逾時、連線失敗或 5xx 後最多重試的次數。
+            backoff_base (float): 退避等待的基準秒數，第 n 次重試最多等待 base * 2^n 秒。
+            backoff_max (float): 單次退避等待的最大秒數。
+        """
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.__sessions: dict[str, requests.Session] = {}
+        self.__stats: dict[str, HostStats] = {}
+        self.__lock = threading.Lock()
+
+    def session(self, host: str) -> requests.Session:
+        """
+        取得指定主機的共用 Session，不存在時建立。
+
+        參數:
+            host (str): 主機名稱（含協定），如 "https://www.twse.com.tw"。
+
+        回傳:
+            requests.Session: 該主機的 Session。
+        """
+        with self.__lock:
+            session = self.__sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # 重試由 request() 處理，每次嘗試都經過速率限制並套用抖動退避
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.__sessions[host] = session
+                self.__stats[host] = HostStats()
+            return session
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重試前的等待秒數（Full Jitter）。"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    @staticmethod
+    def retryable(error: Exception) -> bool:
+        """逾時、連線失敗與 5xx 可以重試；4xx 重試也不會成功。"""
+        if isinstance(error, RequestTimeoutError):
+            return True
+        return isinstance(error, RequestFailedError) and (error.status_code is None or error.status_code >= 500)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        以主機的共用連線發送一次 GET 請求（不重試，見 `request()`）。
+
+        參數:
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+            headers (Optional[dict]): 請求標頭。
+            timeout (Optional[float]): 請求的逾時秒數。
+
+        回傳:
+            requests.Response: 成功（2xx）的回應。
+
+        引發:
+            RequestTimeoutError: 請求逾時。
+            RequestFailedError: 連線失敗或回傳非 2xx 狀態碼。
+        """
+        host = self.host(url)
+        session = self.session(host)
+        stats = self.__stats[host]
+
+        connections_before = self.__connection_count(session, url)
+        start = time.perf_counter()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            stats.record_error()
+            raise RequestTimeoutError(f"請求逾時：{host}（{e}）")
+        except requests.exceptions.RequestException as e:
+            stats.record_error()
+            raise RequestFailedError(f"連線失敗：{host}（{e}）")
+
+        connections_after = self.__connection_count(session, url)
+        new_connection = None not in (connections_before, connections_after) and connections_after > connections_before
+        stats.record(time.perf_counter() - start, new_connection)
+
+        if response.status_code >= 500:
+            stats.record_error()
+            raise RequestFailedError(f"伺服器錯誤：{host} 回傳 {response.status_code}", response.status_code)
+        if response.status_code >= 400:
+            stats.record_error()
+            raise RequestFailedError(f"請求失敗：{host} 回傳 {response.status_code}", response.status_code)
+        return response
+
+    def request(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        timeout: float = 10.0,
+        acquire: Optional[Callable[[float], None]] = None,
+    ) -> requests.Response:
+        """
+        發送 GET 請求，逾時、連線失敗或 5xx 時以帶抖動的指數退避重試。
+
+        每次嘗試（包含重試）前都先呼叫 acquire，因此重試同樣受速率限制；
+        等待配額、請求與退避的時間合計不超過 timeout 秒，剩餘時間不足以退避時不再重試。
+
+        參數:
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+            headers (Optional[dict]): 請求標頭。
+            timeout (float): 整體期限秒數。
+            acquire (Optional[Callable[[float], None]]): 每次嘗試前呼叫，參數為剩餘秒數，
+                無法在期限內取得配額時應引發 RequestTimeoutError。
+
+        回傳:
+            requests.Response: 成功（2xx）的回應。
+
+        引發:
+            RequestTimeoutError: 期限內仍然逾時或無法取得配額。
+            RequestFailedError: 連線失敗或回傳非 2xx 狀態碼。
+        """
+        deadline = time.monotonic() + timeout
+        error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self.backoff(attempt - 1)
+                if time.monotonic() + delay >= deadline:
+                    break
+                stats = self.__stats.get(self.host(url))
+                if stats is not None:
+                    stats.record_retry()
+                time.sleep(delay)
+
+            if acquire is not None:
+                acquire(max(0.0, deadline - time.monotonic()))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return self.get(url, params=params, headers=headers, timeout=remaining)
+            except (RequestTimeoutError, RequestFailedError) as e:
+                if not self.retryable(e):
+                    raise
+                error = e
+
+        raise error or RequestTimeoutError(f"請求逾時：{self.host(url)}（超過 {timeout} 秒）")
+
+    @staticmethod
+    def __connection_count(session: requests.Session, url: str) -> Optional[int]:
+        """
+        該 Session 目前為止建立過的連線總數，用於判斷請求是否開啟了新連線（僅供統計）。
+
+        這裡讀取 urllib3 連線池的內部屬性，不同版本可能不存在；無法取得時回傳 None，不影響請求本身。
+        """
+        try:
+            pools = session.get_adapter(url).poolmanager.pools
+            return sum(pools[key].num_connections for key in pools.keys())
+        except Exception:
+            return None
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """
+        取得各主機的延遲統計。
+
+        回傳:
+            dict: 主機 -> 統計資料。
+        """
+        with self.__lock:
+            return {host: stats.to_dict() for host, stats in self.__stats.items()}
+
+    def close(self) -> None:
+        """關閉所有連線。"""
+        with self.__lock:
+            for session in self.__sessions.values():
+                session.close()
+            self.__sessions.clear()
+            self.__stats.clear()
+
+
+# 模組層級共用的連線池，可透過環境變數調整
+SESSIONS = HostSessions(
+    pool_size=int(os.getenv("TWSE_POOL_SIZE", "10")),
+    max_retries=int(os.getenv("TWSE_MAX_RETRIES", "2")),
+    backoff_base=float(os.getenv("TWSE_BACKOFF_BASE", "0.2")),
+    backoff_max=float(os.getenv("TWSE_BACKOFF_MAX", "2.0")),
+)
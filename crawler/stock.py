@@ -1,19 +1,40 @@
-from typing import Literal, Optional, Union
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Literal, Optional, Union
 
+import numpy as np
+
+from .bars import DailyBars, DailyRecords
+from .resample import INTERVALS, check_interval, resample, resample_field
+from .store import month_bounds
 from .models import DAILY_DATA, DAILY_DATA_KEYS, MONTH_AVG, REAL_TIME, REAL_TIME_KEYS, real_time_fields
 
 class Stock:
     """股票"""
     KEYS = Literal[REAL_TIME_KEYS,"每日交易資料", "月平均資料" ]
-    
-    
 
-    def __init__(self, stock_no: str=None):
+    # 資料群組：每個群組由一個資料來源（loader）一次載入
+    GROUPS = Literal["real_time", "daily", "month_avg"]
+    GROUP_PARAMS: dict[str, str] = {
+        "real_time": "real_time_data",
+        "daily": "daily_data",
+        "month_avg": "month_avg_data",
+    }
+
+    def __init__(
+        self,
+        stock_no: str=None,
+        loaders: Optional[dict[GROUPS, Callable[[], Any]]] = None,
+        executor: Optional[Executor] = None,
+    ):
         """
         建立 Stock 物件。
 
         參數:
             stock_no (str): 股票代號，若為 None 則不初始化資料。
+            loaders (Optional[dict[GROUPS, Callable]]): 各資料群組的載入函式。提供時資料改為延遲載入：
+                第一次 `get()` 到該群組的欄位時才呼叫，結果會被保留。
+            executor (Optional[Executor]): `prefetch()` 背景載入使用的執行緒池。
         
         引發:
             ValueError: 若資料格式錯誤或缺少必要欄位。
@@ -22,14 +43,18 @@ class Stock:
             raise ValueError("無效的原始資料")
 
         self.__no = stock_no
-        self.__data: dict[Stock.KEYS, str | list[dict[str, str]]] = {}
+        self.__data: dict[Stock.KEYS, str | DailyBars | list[dict[str, str]]] = {}
+        self.__loaders = dict(loaders or {})
+        self.__executor = executor
+        self.__loads: dict[str, Future] = {}
+        self.__lock = threading.Lock()
         
     def __str__(self) -> str:
         return f"{self.__no}: {self.get('股票簡稱')[0] or '無名稱'}"
     
     def set_data(
         self,
-        daily_data: Optional[DAILY_DATA] = None,
+        daily_data: Optional[DAILY_DATA | DailyBars] = None,
         real_time_data: Optional[REAL_TIME] = None,
         month_avg_data: Optional[MONTH_AVG] = None
         ) -> None:
@@ -38,7 +63,7 @@ class Stock:
 
         參數:
             real_time_data (Optional[REAL_TIME]): 即時資料，格式為 {欄位名稱: 欄位值}。
-            daily_data (Optional[DAILY_DATA]): 每日交易資料，格式為 [日期, 開盤價, 最高價, 最低價, 收盤價, 成交股數, 成交金額]。
+            daily_data (Optional[DAILY_DATA | DailyBars]): 每日交易資料，STOCK_DAY 格式會於此時一次轉為欄位式的 DailyBars。
             month_avg_data (Optional[MONTH_AVG]): 月平均資料，格式為 [月份, 平均價]。
         
         """
@@ -47,122 +72,202 @@ class Stock:
                 if symbol in real_time_data:
                     self.__data[key] = real_time_data[symbol]
         
-        if daily_data:
-            self.__data["每日交易資料"] = [
-                dict(zip(daily_data["fields"], row)) for row in daily_data["data"]
-            ]
+        if daily_data is not None:
+            self.__data["每日交易資料"] = daily_data if isinstance(daily_data, DailyBars) else DailyBars.from_daily_data(daily_data)
                     
         if month_avg_data:
             self.__data["月平均資料"] = [{"月份": date, "平均收盤價": avg} for date, avg in month_avg_data.items()]
         
+    @staticmethod
+    def group_of(key: KEYS) -> Optional[GROUPS]:
+        """取得欄位所屬的資料群組。"""
+        if key == "每日交易資料":
+            return "daily"
+        if key == "月平均資料":
+            return "month_avg"
+        if key in real_time_fields:
+            return "real_time"
+        return None
+
+    def is_loaded(self, group: GROUPS) -> bool:
+        """資料群組是否已載入完成。"""
+        future = self.__loads.get(group)
+        return future is not None and future.done() and future.exception() is None
+
+    def load(self, group: Optional[GROUPS]) -> None:
+        """
+        載入資料群組（若有對應的載入函式且尚未載入）。同一群組只會載入一次，
+        其他執行緒同時要求時會等待同一次載入完成。
+
+        參數:
+            group (Optional[GROUPS]): 資料群組。
+
+        引發:
+            Exception: 載入函式拋出的錯誤。
+        """
+        if group is None or group not in self.__loaders:
+            return
+
+        with self.__lock:
+            future = self.__loads.get(group)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.__loads[group] = future
+
+        if not owner:
+            future.result()
+            return
+
+        try:
+            self.set_data(**{self.GROUP_PARAMS[group]: self.__loaders[group]()})
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        future.set_result(None)
+
+    def prefetch(self, *groups: GROUPS) -> None:
+        """
+        於背景預先載入資料群組，之後的 `get()` 會直接使用或等待該次載入。
+
+        參數:
+            *groups (GROUPS): 欲預先載入的資料群組。
+        """
+        for group in groups:
+            if group not in self.__loaders or group in self.__loads:
+                continue
+            if self.__executor is None:
+                self.load(group)
+            else:
+                self.__executor.submit(self.__load_quietly, group)
+
+    def __load_quietly(self, group: GROUPS) -> None:
+        # 背景載入的錯誤保留在 Future 中，等到真正 get() 時才拋出
+        try:
+            self.load(group)
+        except Exception:
+            pass
+
     def get_data(self) -> dict:
         return self.__data
 
     def get_no(self) -> str:
         return self.__no
     
-    def get(self, key:KEYS, date_range: Optional[tuple[str, str]] = None) -> list[str|list[dict[DAILY_DATA_KEYS, str]]]:
+    def get(self, key:KEYS, date_range: Optional[tuple[str, str]] = None) -> list[str|DailyRecords]:
+        self.load(self.group_of(key))
         if not self.__data:
             return []
         if key not in self.__data:
             raise KeyError(f"無此欄位：{key}")
     
         if key == "每日交易資料":
-            if date_range:
-                start, end = date_range
-                return [[data for data in self.__data["每日交易資料"] if start <= data["日期"] <= end]]
-            return [self.__data["每日交易資料"]]
+            return [self.bars(date_range).records()]
         
         return [self.__data[key]]
+
+    def bars(self, date_range: Optional[tuple[str, str]] = None) -> DailyBars:
+        """
+        取得欄位式的每日交易資料。
+
+        參數:
+            date_range (Optional[tuple[str, str]]): 起始與結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            DailyBars: 區間內的每日交易資料，尚未設定時為空資料。
+        """
+        self.load("daily")
+        bars: DailyBars = self.__data.get("每日交易資料") or DailyBars.empty()
+        if date_range:
+            return bars.between(*date_range)
+        return bars
     
     
     def daily_field_transform(
         self,
         field: DAILY_DATA_KEYS,
-        interval: Literal["day", "month"],
+        interval: INTERVALS,
         date_range: Optional[tuple[str, str]] = None
     ) -> Optional[list[list[str,float]]]:
         """
-        擷取每日交易資料中指定欄位的資料，並根據時間間隔進行聚合（每日或每月）。
+        擷取每日交易資料中指定欄位的資料，並根據時間間隔進行聚合（日、週、月、季、年）。
+
+        收盤價以區間平均彙總（與月平均資料相同），成交股數、成交金額、成交筆數與漲跌價差為加總，
+        開盤價、最高價、最低價分別取第一筆、最高與最低。
 
         參數:
             field (DAILY_DATA_KEYS): 欲擷取的欄位，如 "收盤價"。
-            interval (Literal["day", "month"]): 時間間隔，日或月。
+            interval (INTERVALS): 時間間隔，day、week、month、quarter 或 year。
             date_range (Optional[tuple[str, str]]): 起始與結束日期，格式為 YYYYMMDD。
 
         回傳:
-        Optional[list[list[str,float]]] : 日期與對應的值的列表。
+        Optional[list[list[str,float]]] : 日期（或區間標籤）與對應的值的列表。
+
+        引發:
+            ValueError: 若間隔單位無效。
         """
+        check_interval(interval)
+        if field == "收盤價" and interval == "month":
+            if self.is_loaded("daily"):
+                # 已有每日資料時直接以整月的收盤價計算月平均，不再請求月平均資料
+                if date_range:
+                    date_range = (month_bounds(date_range[0])[0], month_bounds(date_range[1])[1])
+            else:
+                self.load("month_avg")
+                if "月平均資料" in self.__data:
+                    return sorted(
+                        [[data["月份"], float(data["平均收盤價"])] for data in self.__data["月平均資料"]],
+                        key=lambda x: x[0]
+                        )   
         
-        if field == "收盤價" and interval == "month" and "月平均資料" in self.__data:
-                return sorted(
-                    [[data["月份"], float(data["平均收盤價"])] for data in self.__data["月平均資料"]],
-                    key=lambda x: x[0]
-                    )   
-        
-        raw_data: list[dict[DAILY_DATA_KEYS, str]] = self.get("每日交易資料", date_range=date_range)[0]
-
-        # 資料整理與轉換
-        sorted_data: list[list[str, float]] = []
-        for data in raw_data:
-            date = data.get("日期")
-            val_str = data.get(field, "")
-            try:
-                val = float(val_str.replace(",", ""))
-                sorted_data.append([date, val])
-            except (ValueError, TypeError):
-                continue
-
-        if not sorted_data:
+        labels, values = resample_field(
+            self.bars(date_range),
+            field,
+            interval,
+            how="mean" if field == "收盤價" else None,
+        )
+        if len(values) == 0:
             return None
-        
-        if interval == "month":
-            monthly_data: dict[str, list[float]] = {}
-            for date, value in sorted_data:
-                yyyymm = date[:6]
-                monthly_data.setdefault(yyyymm, []).append(value)
-            sorted_data = [[yyyymm, sum(values) / len(values)] for yyyymm, values in monthly_data.items()]
-
-        # 資料排序
-        sorted_data.sort(key=lambda x: x[0])
 
-        # 聚合資料
-
-        return sorted_data
+        # DailyBars 已依日期排序，結果不需再排序
+        return [[label, value] for label, value in zip(labels, values.tolist())]
         
     def kline(
         self,
         date_range: Optional[tuple[str, str]] = None,
+        interval: INTERVALS = "day",
     ) -> Optional[list[dict[str, str| float]]]:
         """
         擷取每日交易資料中的 K 線圖所需欄位資料（開、高、低、收），並轉為 float。
+        間隔不為日時，每根 K 棒為該區間的第一筆開盤價、最高價、最低價與最後一筆收盤價。
 
         參數:
             date_range (Optional[tuple[str, str]]): 起始與結束日期，格式為 YYYYMMDD。
+            interval (INTERVALS): K 棒的時間間隔，day、week、month、quarter 或 year。
 
         回傳:
             Optional[list[dict[str, float]]]: 每筆資料包含 date/open/high/low/close。若無有效資料則回傳 None。
+
+        引發:
+            ValueError: 若間隔單位無效。
         """
-        raw_data: list[dict[DAILY_DATA_KEYS, str]] = self.get("每日交易資料", date_range=date_range)[0]
-        result: list[dict[str, float]] = []
-
-        for data in raw_data:
-            try:
-                result.append({
-                    "date": data["日期"],
-                    "open": float(data["開盤價"].replace(",", "")),
-                    "high": float(data["最高價"].replace(",", "")),
-                    "low": float(data["最低價"].replace(",", "")),
-                    "close": float(data["收盤價"].replace(",", "")),
-                })
-            except (ValueError, KeyError, TypeError):
-                continue  # 忽略資料格式錯誤的筆數
-
-        if not result:
+        labels, columns = resample(self.bars(date_range), interval)
+        opens, highs, lows, closes = columns["open"], columns["high"], columns["low"], columns["close"]
+
+        # 忽略缺少開高低收任一價格的筆數
+        valid = ~(np.isnan(opens) | np.isnan(highs) | np.isnan(lows) | np.isnan(closes))
+        if not valid.any():
             return None
 
-        # 按照日期排序
-        result.sort(key=lambda x: x["date"])
+        result: list[dict[str, str | float]] = [
+            {"date": label, "open": open, "high": high, "low": low, "close": close}
+            for label, open, high, low, close in zip(
+                [label for label, keep in zip(labels, valid.tolist()) if keep],
+                opens[valid].tolist(),
+                highs[valid].tolist(),
+                lows[valid].tolist(),
+                closes[valid].tolist(),
+            )
+        ]
 
         return result
-
@@ -0,0 +1,421 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .bars import BAR_COLUMNS, COLUMN_TYPES, DAILY_FIELDS, BarRow, DailyBars, format_daily_row, parse_daily_row
+from .models import DAILY_DATA
+
+logger = logging.getLogger(__name__)
+
+# 全市場單日報表解析後的個股資料表：報表代號 -> (資料表, {欄位: 型別})
+# 股數為整數，價格為浮點數；每張表的主鍵皆為 (stock_no, date)
+REPORT_TABLES: dict[str, tuple[str, dict[str, str]]] = {
+    "T86": ("institutional_flows", {
+        "foreign_buy": "INTEGER",      # 外資買進股數
+        "foreign_sell": "INTEGER",     # 外資賣出股數
+        "foreign_net": "INTEGER",      # 外資買賣超股數（含外資自營商）
+        "trust_buy": "INTEGER",        # 投信買進股數
+        "trust_sell": "INTEGER",       # 投信賣出股數
+        "trust_net": "INTEGER",        # 投信買賣超股數
+        "dealer_net": "INTEGER",       # 自營商買賣超股數
+        "total_net": "INTEGER",        # 三大法人買賣超股數
+    }),
+    "MI_MARGN": ("margin_balances", {
+        "margin_buy": "INTEGER",       # 融資買進
+        "margin_sell": "INTEGER",      # 融資賣出
+        "margin_redeem": "INTEGER",    # 現金償還
+        "margin_balance": "INTEGER",   # 融資今日餘額
+        "margin_limit": "INTEGER",     # 融資限額
+        "short_buy": "INTEGER",        # 融券買進
+        "short_sell": "INTEGER",       # 融券賣出
+        "short_redeem": "INTEGER",     # 現券償還
+        "short_balance": "INTEGER",    # 融券今日餘額
+        "short_limit": "INTEGER",      # 融券限額
+        "offset": "INTEGER",           # 資券互抵
+    }),
+    "MI_INDEX20": ("volume_ranks", {
+        "rank": "INTEGER",             # 成交量排名
+        "volume": "INTEGER",           # 成交股數
+        "transactions": "INTEGER",     # 成交筆數
+        "close": "REAL",               # 收盤價
+        "change": "REAL",              # 漲跌價差
+    }),
+}
+
+
+class BarStore:
+    """
+    本地每日交易資料庫
+
+    以 SQLite 保存所有股票的每日開高低收量，資料來源為每日收盤行情（MI_INDEX）的整批匯入，
+    以及個股每日歷史交易資料（STOCK_DAY）的回補。另外記錄已匯入過的日期，以判斷某段期間是否完整。
+    """
+
+    def __init__(self, path: str):
+        """
+        建立 BarStore 物件。
+
+        參數:
+            path (str): SQLite 資料庫檔案路徑。
+        """
+        self.path = path
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__ready = False
+        self.__anchor: Optional[sqlite3.Connection] = None  # 改用記憶體資料庫時保持開啟，避免資料庫被釋放
+
+    def open(self) -> None:
+        """
+        建立資料庫與資料表（第一次取得連線時自動呼叫，匯入模組時不會接觸檔案系統）。
+        無法開啟資料庫檔案（如唯讀的檔案系統）時，記錄警告並改用同一行程共用的記憶體資料庫。
+        """
+        with self.__lock:
+            if self.__ready:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, uri=True)
+                try:
+                    with conn:
+                        self.__create_tables(conn)
+                finally:
+                    conn.close()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("無法開啟每日交易資料庫 %s（%s），改用記憶體資料庫", self.path, e)
+                self.path = f"file:bars-{id(self)}?mode=memory&cache=shared"
+                self.__anchor = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+                with self.__anchor as conn:
+                    self.__create_tables(conn)
+            self.__ready = True
+
+    @staticmethod
+    def __create_tables(conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS daily_bars (
+                stock_no TEXT NOT NULL,
+                date INTEGER NOT NULL,
+                volume INTEGER,
+                turnover INTEGER,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                change REAL,
+                transactions INTEGER,
+                PRIMARY KEY (stock_no, date)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS daily_bars_date ON daily_bars (date);
+            CREATE TABLE IF NOT EXISTS market_days (
+                date INTEGER PRIMARY KEY,
+                trading INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS report_days (
+                report TEXT NOT NULL,
+                date INTEGER NOT NULL,
+                trading INTEGER NOT NULL,
+                ingested_at REAL NOT NULL,
+                PRIMARY KEY (report, date)
+            ) WITHOUT ROWID;
+        """)
+        for table, columns in REPORT_TABLES.values():
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "stock_no TEXT NOT NULL, date INTEGER NOT NULL, "
+                + "".join(f"{column} {kind}, " for column, kind in columns.items())
+                + "PRIMARY KEY (stock_no, date)) WITHOUT ROWID"
+            )
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        取得目前執行緒的資料庫連線（sqlite3 連線不能跨執行緒共用）。
+        """
+        conn: Optional[sqlite3.Connection] = getattr(self.__local, "conn", None)
+        if conn is None:
+            if not self.__ready:
+                self.open()
+            conn = sqlite3.connect(self.path, timeout=30, uri=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+        return conn
+
+    def put_bars(self, stock_no: str, rows: Iterable[BarRow]) -> int:
+        """
+        寫入單一股票的多筆每日資料，已存在的日期會被覆寫。
+
+        參數:
+            stock_no (str): 股票代號。
+            rows (Iterable[BarRow]): 每日資料。
+
+        回傳:
+            int: 寫入的筆數。
+        """
+        return self.put_market_bars((stock_no, *row) for row in rows)
+
+    def put_market_bars(self, rows: Iterable[tuple]) -> int:
+        """
+        以單一交易寫入多檔股票的每日資料，每列為 (股票代號, *BarRow)。
+
+        回傳:
+            int: 寫入的筆數。
+        """
+        rows = list(rows)
+        with self.connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO daily_bars (stock_no, {', '.join(BAR_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(BAR_COLUMNS) + 1))})",
+                rows,
+            )
+        return len(rows)
+
+    def put_daily_data(self, stock_no: str, daily_data: DAILY_DATA) -> int:
+        """
+        將 STOCK_DAY 格式的每日資料寫入資料庫（回補用）。
+
+        回傳:
+            int: 寫入的筆數。
+        """
+        rows = [parse_daily_row(daily_data["fields"], row) for row in daily_data.get("data", [])]
+        return self.put_bars(stock_no, [row for row in rows if row is not None])
+
+    def mark_day(self, date: str, trading: bool) -> None:
+        """
+        記錄某日的收盤行情已匯入。
+
+        參數:
+            date (str): 日期，格式為 YYYYMMDD。
+            trading (bool): 是否為交易日。
+        """
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO market_days (date, trading, ingested_at) VALUES (?, ?, ?)",
+                (int(date), int(trading), time.time()),
+            )
+
+    def ingested_days(self, start: str, end: str) -> dict[str, bool]:
+        """
+        取得期間內已匯入的日期。
+
+        回傳:
+            dict[str, bool]: 日期 -> 是否為交易日。
+        """
+        cursor = self.connection().execute(
+            "SELECT date, trading FROM market_days WHERE date BETWEEN ? AND ?",
+            (int(start), int(end)),
+        )
+        return {str(date): bool(trading) for date, trading in cursor}
+
+    def trading_days(self, end: Optional[str] = None, limit: int = 60) -> list[str]:
+        """
+        取得已匯入收盤行情的最近幾個交易日，由舊到新排序。
+
+        參數:
+            end (Optional[str]): 最後一天（含），格式為 YYYYMMDD，預設為不限。
+            limit (int): 最多回傳的天數。
+
+        回傳:
+            list[str]: 交易日期。
+        """
+        cursor = self.connection().execute(
+            "SELECT date FROM market_days WHERE trading = 1 AND date <= ? ORDER BY date DESC LIMIT ?",
+            (int(end or 99991231), limit),
+        )
+        return [str(date) for date, in cursor][::-1]
+
+    def market_version(self) -> float:
+        """最後一次匯入收盤行情的時間，可用來判斷依收盤行情計算的結果是否需要更新。"""
+        row = self.connection().execute("SELECT MAX(ingested_at) FROM market_days").fetchone()
+        return row[0] or 0.0
+
+    def market_bars(self, start: str, end: str) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        以欄位式取得期間內所有股票的每日資料，依股票代號與日期排序。
+
+        參數:
+            start (str): 起始日期，格式為 YYYYMMDD。
+            end (str): 結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            tuple[np.ndarray, dict[str, np.ndarray]]: (每列的股票代號, 欄位 -> 陣列)，欄位與 `BAR_COLUMNS` 相同。
+        """
+        rows = self.connection().execute(
+            f"SELECT stock_no, {', '.join(BAR_COLUMNS)} FROM daily_bars "
+            "WHERE date BETWEEN ? AND ? ORDER BY stock_no, date",
+            (int(start), int(end)),
+        ).fetchall()
+        stock_nos = np.array([row[0] for row in rows], dtype=str)
+        columns: dict[str, np.ndarray] = {}
+        for i, (column, dtype) in enumerate(COLUMN_TYPES.items(), start=1):
+            missing = np.nan if dtype is np.float64 else 0
+            columns[column] = np.array([missing if row[i] is None else row[i] for row in rows], dtype=dtype)
+        return stock_nos, columns
+
+    def covers(self, start: str, end: str) -> bool:
+        """
+        判斷期間內的每個平日是否都已匯入收盤行情（週末不交易，匯入時也不會記錄）。
+
+        參數:
+            start (str): 起始日期，格式為 YYYYMMDD。
+            end (str): 結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            bool: 全部平日都已匯入時回傳 True。
+        """
+        day = datetime.strptime(start, "%Y%m%d")
+        end_dt = datetime.strptime(end, "%Y%m%d")
+        days = self.ingested_days(start, end)
+        while day <= end_dt:
+            if day.weekday() < 5 and day.strftime("%Y%m%d") not in days:
+                return False
+            day += timedelta(days=1)
+        return True
+
+    def bars(self, stock_no: str, start: Optional[str] = None, end: Optional[str] = None) -> list[BarRow]:
+        """
+        取得單一股票期間內的每日資料，依日期排序。
+
+        參數:
+            stock_no (str): 股票代號。
+            start (Optional[str]): 起始日期，格式為 YYYYMMDD。
+            end (Optional[str]): 結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            list[BarRow]: 每日資料。
+        """
+        cursor = self.connection().execute(
+            f"SELECT {', '.join(BAR_COLUMNS)} FROM daily_bars "
+            "WHERE stock_no = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (stock_no, int(start or 0), int(end or 99991231)),
+        )
+        return cursor.fetchall()
+
+    def daily_bars(self, stock_no: str, start: Optional[str] = None, end: Optional[str] = None) -> DailyBars:
+        """
+        以欄位式取得單一股票期間內的每日資料。
+
+        回傳:
+            DailyBars: 依日期排序的每日資料。
+        """
+        return DailyBars.from_rows(self.bars(stock_no, start, end))
+
+    def daily_data(self, stock_no: str, start: Optional[str] = None, end: Optional[str] = None) -> DAILY_DATA:
+        """
+        以 STOCK_DAY 格式取得單一股票期間內的每日資料。
+
+        回傳:
+            DAILY_DATA: 欄位與字串資料列。
+        """
+        return {
+            "fields": list(DAILY_FIELDS),
+            "data": [format_daily_row(row) for row in self.bars(stock_no, start, end)],
+        }
+
+    def put_report_rows(self, report_code: str, date: str, rows: Iterable[tuple]) -> int:
+        """
+        以單一交易寫入全市場單日報表解析後的個股資料，並記錄該日為已匯入的交易日。
+
+        沒有資料列時不寫入也不記錄，以免解析失敗的交易日被當成休市日而不再重試；
+        休市日只依 TWSE 明確回傳的查無資料以 `mark_report_day` 記錄。
+
+        參數:
+            report_code (str): 報表代號，需為 `REPORT_TABLES` 中的鍵。
+            date (str): 資料日期，格式為 YYYYMMDD。
+            rows (Iterable[tuple]): 每列為 (股票代號, 日期, *欄位值)，欄位順序與 `REPORT_TABLES` 相同。
+
+        回傳:
+            int: 寫入的筆數。
+        """
+        table, columns = REPORT_TABLES[report_code]
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (stock_no, date, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 2))})",
+                rows,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO report_days (report, date, trading, ingested_at) VALUES (?, ?, ?, ?)",
+                (report_code, int(date), 1, time.time()),
+            )
+        return len(rows)
+
+    def mark_report_day(self, report_code: str, date: str, trading: bool) -> None:
+        """記錄某日的報表已匯入（休市日沒有資料列）。"""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO report_days (report, date, trading, ingested_at) VALUES (?, ?, ?, ?)",
+                (report_code, int(date), int(trading), time.time()),
+            )
+
+    def reported_days(self, report_code: str, start: str, end: str) -> dict[str, bool]:
+        """
+        取得期間內某報表已匯入的日期。
+
+        回傳:
+            dict[str, bool]: 日期 -> 是否為交易日。
+        """
+        cursor = self.connection().execute(
+            "SELECT date, trading FROM report_days WHERE report = ? AND date BETWEEN ? AND ?",
+            (report_code, int(start), int(end)),
+        )
+        return {str(date): bool(trading) for date, trading in cursor}
+
+    def report_columns(
+        self,
+        report_code: str,
+        stock_no: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        以欄位式取得單一股票期間內的報表資料，依日期排序。
+
+        參數:
+            report_code (str): 報表代號，需為 `REPORT_TABLES` 中的鍵。
+            stock_no (str): 股票代號。
+            start (Optional[str]): 起始日期，格式為 YYYYMMDD。
+            end (Optional[str]): 結束日期，格式為 YYYYMMDD。
+
+        回傳:
+            dict[str, np.ndarray]: "date" 與各欄位的陣列，整數欄位缺值為 0、浮點欄位缺值為 NaN。
+        """
+        table, columns = REPORT_TABLES[report_code]
+        rows = self.connection().execute(
+            f"SELECT date, {', '.join(columns)} FROM {table} "
+            "WHERE stock_no = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (stock_no, int(start or 0), int(end or 99991231)),
+        ).fetchall()
+
+        result: dict[str, np.ndarray] = {"date": np.array([row[0] for row in rows], dtype=np.int64)}
+        for i, (column, kind) in enumerate(columns.items(), start=1):
+            if kind == "REAL":
+                result[column] = np.array([np.nan if row[i] is None else row[i] for row in rows], dtype=np.float64)
+            else:
+                result[column] = np.array([row[i] or 0 for row in rows], dtype=np.int64)
+        return result
+
+
+def month_bounds(date: str) -> tuple[str, str]:
+    """
+    取得日期所在月份的第一天與最後一天。
+
+    參數:
+        date (str): 日期，格式為 YYYYMMDD。
+
+    回傳:
+        tuple[str, str]: (月初, 月底)，格式為 YYYYMMDD。
+    """
+    first = datetime.strptime(date[:6] + "01", "%Y%m%d")
+    last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return first.strftime("%Y%m%d"), last.strftime("%Y%m%d")
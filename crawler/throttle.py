@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    令牌桶（Token Bucket）速率限制器
+
+    以固定速率補充令牌，每次請求前取得一個令牌；桶容量決定可瞬間發出的請求數。
+    供多執行緒共用，確保對 TWSE 的總請求速率不超過上限。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        建立 RateLimiter 物件。
+
+        參數:
+            rate (float): 每秒補充的令牌數，即長期平均的每秒請求數上限。
+            burst (int): 令牌桶容量，即可瞬間發出的最大請求數。
+
+        引發:
+            ValueError: 若 rate 或 burst 不為正數。
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError("速率與容量必須為正數")
+
+        self.rate = rate
+        self.burst = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    def try_acquire(self) -> bool:
+        """
+        嘗試立即取得一個令牌，不等待。
+
+        回傳:
+            bool: 成功取得回傳 True。
+        """
+        with self.__lock:
+            self.__refill()
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        取得一個令牌，令牌不足時等待補充。
+
+        參數:
+            timeout (Optional[float]): 最長等待秒數，None 表示無限等待。
+
+        引發:
+            TimeoutError: 若超過等待時間仍無法取得令牌。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.__lock:
+                self.__refill()
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                wait = (1 - self.__tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining:
+                    raise TimeoutError("等待請求配額逾時")
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> None:
+        """
+        `acquire` 的 asyncio 版本，等待令牌時不阻塞事件迴圈。
+
+        參數:
+            timeout (Optional[float]): 最長等待秒數，None 表示無限等待。
+
+        引發:
+            TimeoutError: 若超過等待時間仍無法取得令牌。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire():
+            wait = 1 / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("等待請求配額逾時")
+            await asyncio.sleep(wait)
@@ -1,9 +1,25 @@
-import requests
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Literal, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
 
 import utils
+from .backend import LazyBackend, MemoryBackend, SQLiteBackend, TieredBackend, data_path
+from .cache import ReportCache
+from .cassette import CassetteLibrary
+from .directory import SYMBOL, SymbolDirectory, parse_isin_listing
+from .bars import DailyBars
+from .errors import APIError, CrawlerError, NoDataError, RequestTimeoutError, ResponseFormatError
+from .indicators import OUTPUTS, Indicator, IndicatorCache, parse_indicator
+from .quotes import QuoteCache
+from .screen import SnapshotCache
+from .session import SESSIONS
 from .stock import Stock
+from .store import BarStore, month_bounds
+from .throttle import RateLimiter
 from .models import DAILY_DATA_JSON, MONTH_AVG, MONTH_AVG_JSON, REAL_TIME_JSON, DAILY_DATA, REAL_TIME
 
 class TaiwanStockExchangeCrawler:
@@ -18,11 +34,13 @@ class TaiwanStockExchangeCrawler:
     
     URL_KEYS = Literal[
         "交易報表",
+        "法人報表",
         "即時資訊",
         "股票代號"
     ]
     URLS: dict[URL_KEYS,str] = {
         "交易報表":"https://www.twse.com.tw/exchangeReport",
+        "法人報表":"https://www.twse.com.tw/fund",
         "即時資訊":"https://mis.twse.com.tw/stock/api/getStockInfo.jsp", 
         "股票代號":"https://isin.twse.com.tw/isin/C_public.jsp"
         }
@@ -34,6 +52,7 @@ class TaiwanStockExchangeCrawler:
         "個股每日股價與月平均",
         "融資融券與借券成交明細",
         "法人持股統計",
+        "成交量前二十名",
     ]
     
     REPORTS: dict[REPORTS_KEYS, str] = {
@@ -42,38 +61,491 @@ class TaiwanStockExchangeCrawler:
         "個股每日歷史交易資料": "STOCK_DAY",
         "個股每日股價與月平均": "STOCK_DAY_AVG",
         "融資融券與借券成交明細": "MI_MARGN", 
-        "法人持股統計": "MI_INDEX20",             
+        "法人持股統計": "MI_INDEX20",  # MI_INDEX20 實際內容為每日成交量前二十名證券，保留舊名稱相容
+        "成交量前二十名": "MI_INDEX20",
     }
     
     TIMEOUT=10
 
+    # TWSE 查無資料（如休市日）時的狀態訊息：「很抱歉，沒有符合條件的資料!」
+    NO_DATA_MESSAGE = "沒有符合條件的資料"
+
+    # 即時資訊每次請求最多串接的股票數
+    REAL_TIME_BATCH_SIZE = 50
+
+    # 快取後端：行程內的記憶體 LRU + 同一台主機上所有 worker 共用的 SQLite（WAL），可透過環境變數調整位置與容量
+    # 資料庫於第一次使用時才開啟，無法開啟時改用記憶體快取
+    SHARED_CACHE = LazyBackend(
+        lambda: SQLiteBackend(
+            os.getenv("TWSE_CACHE_PATH") or data_path("cache.sqlite3"),
+            limits={"report": int(os.getenv("TWSE_CACHE_MAX_ENTRIES", "5000"))},
+        ),
+        fallback=lambda: MemoryBackend(max_entries=int(os.getenv("TWSE_CACHE_MAX_ENTRIES", "5000"))),
+        ttls={
+            "report": None,  # 已結束的月份不會再變動
+            "symbols": None,  # 清單是否過期由 SymbolDirectory 的 max_age 判斷
+            "quote": float(os.getenv("TWSE_QUOTE_TTL_TRADING", "5")),  # 實際依交易時段另外指定
+        },
+    )
+    BACKEND = TieredBackend(
+        MemoryBackend(max_entries=int(os.getenv("TWSE_CACHE_MEMORY_ENTRIES", "2000"))),
+        SHARED_CACHE,
+    )
+
+    # 即時報價快取，盤中、盤前與收盤寬限時間的快取秒數可透過環境變數調整
+    QUOTES = QuoteCache(
+        ttl={
+            "pre_open": float(os.getenv("TWSE_QUOTE_TTL_PRE_OPEN", "10")),
+            "trading": float(os.getenv("TWSE_QUOTE_TTL_TRADING", "5")),
+            "settling": float(os.getenv("TWSE_QUOTE_TTL_SETTLING", "15")),
+        },
+        backend=BACKEND,
+        settle=float(os.getenv("TWSE_QUOTE_SETTLE_SECONDS", "600")),
+    )
+
+    # 已結束月份的報表快取
+    CACHE = ReportCache(BACKEND)
+
+    # 本地每日交易資料庫，由每日收盤行情整批匯入（見 crawler.ingest）
+    STORE = BarStore(os.getenv("TWSE_STORE_PATH") or data_path("bars.sqlite3"))
+    # 由資料庫建立的全市場快照，匯入新的收盤行情後才重建
+    SNAPSHOTS = SnapshotCache(STORE)
+
+    # 技術指標快取，新交易日只重算尾端
+    INDICATORS = IndicatorCache(max_entries=int(os.getenv("TWSE_INDICATOR_CACHE_ENTRIES", "256")))
+
+    # 本地股票代號目錄，由 ISIN 清單定期更新
+    DIRECTORY = SymbolDirectory(
+        SHARED_CACHE,
+        loader=lambda: TaiwanStockExchangeCrawler.symbols(),
+        max_age=float(os.getenv("TWSE_SYMBOLS_MAX_AGE", "86400")),
+    )
+
+    # 抓取各月份報表的共用執行緒池與請求速率限制，避免超過 TWSE 的請求上限
+    EXECUTOR = ThreadPoolExecutor(
+        max_workers=int(os.getenv("TWSE_MAX_WORKERS", "4")),
+        thread_name_prefix="twse",
+    )
+    # Stock 背景預先載入用的執行緒池（與抓取月報表的執行緒池分開，避免互相等待而卡住）
+    PREFETCH_EXECUTOR = ThreadPoolExecutor(
+        max_workers=int(os.getenv("TWSE_PREFETCH_WORKERS", "4")),
+        thread_name_prefix="twse-prefetch",
+    )
+    RATE_LIMITER = RateLimiter(
+        rate=float(os.getenv("TWSE_RATE_LIMIT", "2")),
+        burst=int(os.getenv("TWSE_RATE_BURST", "6")),
+    )
+
+    # 回應的錄製與重播（見 crawler.cassette），預設關閉；重播的請求不經過速率限制
+    CASSETTES = CassetteLibrary(
+        directory=os.getenv("TWSE_CASSETTE_DIR", ".cache/cassettes"),
+        mode=os.getenv("TWSE_CASSETTE_MODE", "off"),
+    )
+
     def __init__(self): ...
 
     @classmethod
     def fetch(cls, url: str, params: Optional[dict]=None) -> dict:
-        
-        
+        """
+        以共用連線池向 TWSE 發送請求並解析 JSON。
+
+        參數：
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+
+        回傳：
+            dict: 解析後的 JSON 資料。
+
+        拋出：
+            - RequestTimeoutError: 若 TIMEOUT 秒內（包含重試與等待請求配額）仍無法完成。
+            - RequestFailedError: 若連線失敗或 HTTP 狀態碼非成功。
+            - ResponseFormatError: 若回傳內容無法解析為 JSON 或格式不符。
+            - APIError: 若 API 回傳狀態不是 OK。
+            - CassetteNotFoundError: 若為重播模式且沒有錄製過此請求。
+        """
+        endpoint = cls.endpoint(url)
+        start = time.perf_counter()
+        cache = "miss"
         try:
-            response = requests.get(url, params=params, headers=cls.headers, timeout=cls.TIMEOUT) 
-            data = response.json()
-        except ValueError:
-            raise RuntimeError(f"無法解析 JSON：{response.text}")
-        except requests.exceptions.Timeout:
-            print("內部請求超時，請稍後再試")
-            return None
-        except requests.exceptions.RequestException as e:
-            print(f"發生錯誤: {e}")
-            return None
-        
+            cassette = cls.CASSETTES.play(url, params)
+            if cassette is not None:
+                cache = "replay"
+                if "json" not in cassette:
+                    raise ResponseFormatError(f"無法解析 JSON：{cassette.get('text', '')[:200]}")
+                return cls.check_response(cassette["json"], params)
+
+            response = SESSIONS.request(url, params=params, headers=cls.headers, timeout=cls.TIMEOUT, acquire=cls.acquire)
+            try:
+                data = response.json()
+            except ValueError:
+                cls.CASSETTES.record(url, params, text=response.text)
+                raise ResponseFormatError(f"無法解析 JSON：{response.text[:200]}")
+
+            # 錄製檢查前的原始回應，重播時才會得到相同的錯誤
+            cls.CASSETTES.record(url, params, data=data)
+            return cls.check_response(data, params)
+        except CrawlerError as e:
+            utils.metrics.FETCH_ERRORS.inc(endpoint=endpoint, error=type(e).__name__)
+            raise
+        finally:
+            # 耗時包含等待請求配額的時間
+            utils.metrics.observe_fetch(endpoint, cache, time.perf_counter() - start)
+
+    @classmethod
+    def acquire(cls, timeout: float) -> None:
+        """
+        取得一個請求配額，每次嘗試（包含重試）前呼叫。
+
+        引發:
+            RequestTimeoutError: 若 timeout 秒內無法取得配額。
+        """
+        try:
+            cls.RATE_LIMITER.acquire(timeout=timeout)
+        except TimeoutError:
+            raise RequestTimeoutError("請求過於頻繁，請稍後再試")
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """網址的最後一段（如 "STOCK_DAY"、"getStockInfo.jsp"），作為指標的標籤。"""
+        return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+    @classmethod
+    def fetch_text(cls, url: str, params: Optional[dict] = None, encoding: str = "utf-8") -> str:
+        """
+        以共用連線池發送請求並回傳解碼後的文字（用於非 JSON 的頁面）。
+
+        參數：
+            url (str): 請求網址。
+            params (Optional[dict]): 查詢參數。
+            encoding (str): 頁面編碼。
+
+        回傳：
+            str: 頁面內容。
+        """
+        endpoint = cls.endpoint(url)
+        start = time.perf_counter()
+        cache = "miss"
+        try:
+            cassette = cls.CASSETTES.play(url, params)
+            if cassette is not None:
+                cache = "replay"
+                return cassette.get("text", "")
+
+            response = SESSIONS.request(url, params=params, headers=cls.headers, timeout=cls.TIMEOUT, acquire=cls.acquire)
+            text = response.content.decode(encoding, errors="replace")
+            cls.CASSETTES.record(url, params, text=text)
+            return text
+        except CrawlerError as e:
+            utils.metrics.FETCH_ERRORS.inc(endpoint=endpoint, error=type(e).__name__)
+            raise
+        finally:
+            utils.metrics.observe_fetch(endpoint, cache, time.perf_counter() - start)
+
+    @staticmethod
+    def check_response(data: dict, params: Optional[dict] = None) -> dict:
+        """
+        檢查 TWSE 回傳的 JSON 狀態欄位。
+
+        參數：
+            data (dict): 解析後的 JSON 資料。
+            params (Optional[dict]): 請求參數，僅用於錯誤訊息。
+
+        回傳：
+            dict: 原樣回傳 data。
+
+        拋出：
+            - ResponseFormatError: 若缺少狀態欄位。
+            - NoDataError: 若 API 明確回傳查無資料。
+            - APIError: 若 API 回傳其他不是 OK 的狀態。
+        """
         if "stat" not in data and 'rtmessage' not in data:
-            raise RuntimeError("API 回傳格式錯誤，無法解析")
+            raise ResponseFormatError("API 回傳格式錯誤，無法解析")
 
         for key in ["stat", "rtmessage"]:
             if key in data and data[key] != "OK":
-                raise RuntimeError(f"API 回傳錯誤：[{key}: {data[key]}] {params}")
+                error = NoDataError if TaiwanStockExchangeCrawler.NO_DATA_MESSAGE in str(data[key]) else APIError
+                raise error(f"API 回傳錯誤：[{key}: {data[key]}] {params}")
 
         return data
+
+    @staticmethod
+    def parse_month_report(data: DAILY_DATA_JSON | MONTH_AVG_JSON) -> DAILY_DATA:
+        """
+        整理單月報表：保留欄位與資料列，並將民國日期轉換為西元。
+
+        參數：
+            data (DAILY_DATA_JSON | MONTH_AVG_JSON): TWSE 回傳的月報表。
+
+        回傳：
+            DAILY_DATA: 欄位與資料列。
+        """
+        # 將民國日期轉換西元
+        try:
+            date_index = data["fields"].index("日期")
+        except (KeyError, ValueError):
+            date_index = None  # 若沒有日期欄位就略過轉換
+
+        if date_index is not None:
+            for row in data.get("data", []):
+                try:
+                    row[date_index] = utils.date.roc_to_ad(row[date_index], output_format="%Y%m%d")
+                except Exception:
+                    pass  # 無法轉換的就略過（如月平均列）
+
+        return {"fields": data["fields"], "data": data.get("data", [])}
+
+    @staticmethod
+    def merge_month_reports(
+        report_code: Literal["STOCK_DAY", "STOCK_DAY_AVG"],
+        months: list[str],
+        reports: list[DAILY_DATA],
+    ) -> DAILY_DATA | MONTH_AVG:
+        """
+        依月份順序合併多個單月報表。
+
+        參數：
+            report_code (str): 報表代號，"STOCK_DAY" 或 "STOCK_DAY_AVG"。
+            months (list[str]): 各月份的日期，格式為 'YYYYMMDD'。
+            reports (list[DAILY_DATA]): 與 months 順序相同的各月報表。
+
+        回傳：
+            DAILY_DATA | MONTH_AVG: STOCK_DAY 回傳合併後的每日資料；STOCK_DAY_AVG 回傳 {月份: 月平均收盤價}。
+        """
+        result: dict = {}
+        if report_code == "STOCK_DAY_AVG":
+            for date, data in zip(months, reports):
+                result[date[:6]] = data["data"][-1][1]
+            return result
+
+        for data in reports:
+            if not result:
+                result = { "fields":data["fields"] , "data":list(data["data"])}
+            else:
+                result["data"].extend(data.get("data", []))  # 合併每月資料
+        return result
     
+    @classmethod
+    def month_report(
+        cls,
+        report_code: Literal["STOCK_DAY", "STOCK_DAY_AVG"],
+        date: str,
+        stock_no: str,
+        response_format: str = "json",
+        check_cache: bool = True,
+    ) -> DAILY_DATA:
+        """
+        取得單一股票單一月份的報表，已結束的月份優先由本地快取讀取。
+
+        參數：
+            report_code (str): 報表代號，"STOCK_DAY" 或 "STOCK_DAY_AVG"。
+            date (str): 查詢月份中的任一日期，格式為 'YYYYMMDD'。
+            stock_no (str): 股票代號。
+            response_format (str): 回傳資料格式，預設為 "json"。
+            check_cache (bool): 是否先查詢快取；呼叫端已批次查詢過快取時設為 False。
+
+        回傳：
+            DAILY_DATA: 該月份的欄位與資料列（日期已轉為西元）。
+        """
+        start = time.perf_counter()
+        if check_cache:
+            cached = cls.CACHE.get(report_code, stock_no, date)
+            if cached is not None:
+                utils.metrics.observe_fetch(report_code, "hit", time.perf_counter() - start)
+                return cached
+
+        if report_code == "STOCK_DAY" and not cls.CACHE.is_closed(date):
+            # 本月若每天的收盤行情都已整批匯入，直接由本地資料庫取得
+            stored = cls.stored_month(date, stock_no)
+            if stored is not None:
+                utils.metrics.observe_fetch(report_code, "hit", time.perf_counter() - start)
+                return stored
+
+        result = cls.parse_month_report(cls.fetch(*cls.month_request(report_code, date, stock_no, response_format)))
+        cls.CACHE.put(report_code, stock_no, date, result)
+        if report_code == "STOCK_DAY":
+            cls.STORE.put_daily_data(stock_no, result)  # 回補本地資料庫
+        return result
+
+    @classmethod
+    def month_request(
+        cls,
+        report_code: Literal["STOCK_DAY", "STOCK_DAY_AVG"],
+        date: str,
+        stock_no: str,
+        response_format: str = "json",
+    ) -> tuple[str, dict[str, str]]:
+        """
+        產生單一股票單一月份報表的請求網址與查詢參數（同步與非同步版本共用）。
+
+        回傳：
+            tuple[str, dict[str, str]]: (網址, 查詢參數)。
+        """
+        params: dict[str, str] = {
+            "response": response_format,
+            "date": date,
+            "stockNo": stock_no
+        }
+        return f"{cls.URLS['交易報表']}/{report_code}", params
+
+    @classmethod
+    def daily_report_request(
+        cls,
+        report_code: Literal["MI_INDEX", "T86", "MI_MARGN", "MI_INDEX20"],
+        date_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+        response_format: str = "json",
+    ) -> tuple[str, dict[str, str]]:
+        """
+        產生全市場單日報表的請求網址與查詢參數（同步與非同步版本共用），日期取日期區間的結束日。
+
+        參數：
+            report_code (str): 報表代號，"MI_INDEX"（每日收盤行情）、"T86"（三大法人）、
+                "MI_MARGN"（融資融券）或 "MI_INDEX20"（成交量前二十名）。
+            date_range (Optional[tuple[str, str]]): 查詢的日期區間，格式為 'YYYYMMDD'。
+            response_format (str): 回傳資料格式，預設為 "json"。
+
+        回傳：
+            tuple[str, dict[str, str]]: (網址, 查詢參數)。
+        """
+        params: dict[str, str] = {
+            "response": response_format,
+            "date": utils.date.check_date_range(date_range)[1],
+        }
+        match report_code:
+            case "MI_INDEX":
+                params["type"] = "ALLBUT0999"
+            case "T86":
+                params["selectType"] = "ALLBUT0999"
+            case "MI_MARGN":
+                params["selectType"] = "ALL"
+        url_key = "法人報表" if report_code == "T86" else "交易報表"
+        return f"{cls.URLS[url_key]}/{report_code}", params
+
+    @classmethod
+    def local_month(cls, date: str, stock_no: str) -> Optional[DAILY_DATA]:
+        """
+        不發出請求，由本地快取或每日交易資料庫取得完整的單月每日資料。
+
+        參數：
+            date (str): 查詢月份中的任一日期，格式為 'YYYYMMDD'。
+            stock_no (str): 股票代號。
+
+        回傳：
+            Optional[DAILY_DATA]: 該月份的每日資料，本地沒有完整資料時回傳 None。
+        """
+        cached = cls.CACHE.get("STOCK_DAY", stock_no, date)
+        if cached is not None:
+            return cached
+        return cls.stored_month(date, stock_no)
+
+    @classmethod
+    def month_averages(
+        cls,
+        stock_no: str,
+        date_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+    ) -> MONTH_AVG:
+        """
+        取得期間內各月份的平均收盤價。本地已有完整單月每日資料的月份直接計算，
+        只有缺少的月份才向 TWSE 請求個股每日股價與月平均（STOCK_DAY_AVG）。
+
+        參數：
+            stock_no (str): 股票代號。
+            date_range (Optional[tuple[str, str]]): 查詢的日期區間 (起始日期, 結束日期)，格式為 'YYYYMMDD'。
+
+        回傳：
+            MONTH_AVG: {月份: 月平均收盤價}，與 STOCK_DAY_AVG 相同格式。
+        """
+        months = utils.date.month_range(*utils.date.check_date_range(date_range))
+        result, missing = cls.local_month_averages(stock_no, months)
+        if missing:
+            reports = cls.month_reports("STOCK_DAY_AVG", missing, stock_no)
+            result.update(cls.merge_month_reports("STOCK_DAY_AVG", missing, reports))
+        return dict(sorted(result.items()))
+
+    @classmethod
+    def local_month_averages(cls, stock_no: str, months: list[str]) -> tuple[MONTH_AVG, list[str]]:
+        """
+        以本地資料計算各月份的平均收盤價（`month_averages` 與非同步版本共用）。
+
+        參數：
+            stock_no (str): 股票代號。
+            months (list[str]): 月份中的任一日期，格式為 'YYYYMMDD'。
+
+        回傳：
+            tuple[MONTH_AVG, list[str]]: 本地已有資料的月平均，以及需要向 TWSE 請求的月份。
+        """
+        result: MONTH_AVG = {}
+        missing: list[str] = []
+        for month in months:
+            daily = cls.local_month(month, stock_no)
+            if daily is None:
+                missing.append(month)
+                continue
+            closes = DailyBars.from_daily_data(daily)["close"]
+            closes = closes[~np.isnan(closes)]
+            if len(closes):
+                result[month[:6]] = f"{closes.mean():.2f}"
+        return result, missing
+
+    @classmethod
+    def stored_month(cls, date: str, stock_no: str) -> Optional[DAILY_DATA]:
+        """
+        由本地每日交易資料庫取得單月資料，僅在該月至今每天的收盤行情都已匯入時有效。
+
+        參數：
+            date (str): 查詢月份中的任一日期，格式為 'YYYYMMDD'。
+            stock_no (str): 股票代號。
+
+        回傳：
+            Optional[DAILY_DATA]: 該月份的每日資料，資料不完整時回傳 None。
+        """
+        first, last = month_bounds(date)
+        # 收盤後才需要今天的資料，盤中只需涵蓋到昨天
+        if not cls.STORE.covers(first, min(last, utils.date.last_closed_date())):
+            return None
+        data = cls.STORE.daily_data(stock_no, first, last)
+        return data if data["data"] else None
+
+    @classmethod
+    def month_reports(
+        cls,
+        report_code: Literal["STOCK_DAY", "STOCK_DAY_AVG"],
+        months: list[str],
+        stock_no: str,
+        response_format: str = "json"
+    ) -> list[DAILY_DATA]:
+        """
+        以共用的執行緒池同時抓取多個月份的報表，並依月份順序回傳。
+
+        參數：
+            report_code (str): 報表代號，"STOCK_DAY" 或 "STOCK_DAY_AVG"。
+            months (list[str]): 各月份的日期，格式為 'YYYYMMDD'。
+            stock_no (str): 股票代號。
+            response_format (str): 回傳資料格式，預設為 "json"。
+
+        回傳：
+            list[DAILY_DATA]: 與 months 順序相同的各月報表。
+
+        拋出：
+            - RequestTimeoutError: 若超過 `TIMEOUT` 秒仍未全部完成。
+        """
+        # 已快取的月份以一次批次查詢取得，只有其餘月份才送進執行緒池
+        start = time.perf_counter()
+        cached = cls.CACHE.get_many(report_code, stock_no, months)
+        for _ in cached:
+            # 批次查詢的耗時平均分配給各個命中的月份
+            utils.metrics.observe_fetch(report_code, "hit", (time.perf_counter() - start) / len(cached))
+        futures = {
+            date: cls.EXECUTOR.submit(cls.month_report, report_code, date, stock_no, response_format, check_cache=False)
+            for date in months if date not in cached
+        }
+        done, not_done = wait(futures.values(), timeout=cls.TIMEOUT)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise RequestTimeoutError("請求時間過長，請減少查詢範圍")
+
+        return [cached[date] if date in cached else futures[date].result() for date in months]
+
     @classmethod
     def report(
         cls,
@@ -103,62 +575,18 @@ class TaiwanStockExchangeCrawler:
         
         report_code: str = cls.REPORTS[report_name]
         result: dict = {}
-        start_time = time.time()
         
         match report_code:
-            case "STOCK_DAY":
-                date_range = utils.date.check_date_range(date_range)
-                
-                for date in utils.date.month_range(*date_range):
-
-                    if time.time() - start_time >= cls.TIMEOUT:
-                        raise RuntimeError("請求時間過長，請減少查詢範圍")
-                    
-                    params: dict[str, str] = {
-                        "response": response_format,
-                        "date": date,
-                        "stockNo": stock_no
-                    }
-                            
-                    data: DAILY_DATA_JSON = cls.fetch(f"{cls.URLS['交易報表']}/{report_code}", params)
-                    # 將民國日期轉換西元
-                    try:
-                        date_index = data["fields"].index("日期")
-                    except (KeyError, ValueError):
-                        date_index = None  # 若沒有日期欄位就略過轉換
-
-                    if date_index is not None:
-                        for row in data.get("data", []):
-                            try:
-                                row[date_index] = utils.date.roc_to_ad(row[date_index], output_format="%Y%m%d")
-                            except Exception:
-                                pass  # 無法轉換的就略過
-                    
-                    if not result:
-                        result = { "fields":data["fields"] , "data":data["data"]}
-                    else:
-                        result["data"].extend(data.get("data", []))  # 合併每月資料
-                        
-            case "STOCK_DAY_AVG":
+            case "STOCK_DAY" | "STOCK_DAY_AVG":
                 date_range = utils.date.check_date_range(date_range)
+                months = utils.date.month_range(*date_range)
                 
-                for date in utils.date.month_range(*date_range):
-                    # 檢查是否超過9秒
-                    if time.time() - start_time > 9:
-                        raise RuntimeError("請求時間過長，請減少查詢範圍")
-                    
-                    params: dict[str, str] = {
-                        "response": response_format,
-                        "date": date,
-                        "stockNo": stock_no
-                    }
-                        
-                    data: MONTH_AVG_JSON = cls.fetch(f"{cls.URLS['交易報表']}/{report_code}", params)
+                reports = cls.month_reports(report_code, months, stock_no, response_format)
+                result = cls.merge_month_reports(report_code, months, reports)
                     
-                    result[date[:6]] = data["data"][-1][1]
-                    
-            case "MI_INDEX":
-                result = cls.fetch(f"{cls.URLS['交易報表']}/{report_code}")
+            case "MI_INDEX" | "T86" | "MI_MARGN" | "MI_INDEX20":
+                # 全市場單日報表（收盤行情、三大法人、融資融券、成交量前二十名），取日期區間的結束日
+                result = cls.fetch(*cls.daily_report_request(report_code, date_range, response_format))
                 
             case _:
                 raise RuntimeError(f"不應該運行至這段：{report_code}")
@@ -247,30 +675,194 @@ class TaiwanStockExchangeCrawler:
 
         回傳：
             dict: 即時資料。
+
+        拋出：
+            - APIError: 若查無該股票的即時資料。
         """
-        return cls.fetch(cls.URLS["即時資訊"], {"ex_ch": f"tse_{stock_no}.tw"})["msgArray"][0]
+        result = cls.real_time_many([stock_no])
+        if stock_no not in result:
+            raise APIError(f"查無即時資料：{stock_no}")
+        return result[stock_no]
+
+    @classmethod
+    def real_time_many(cls, stock_nos: list[str]) -> dict[str, REAL_TIME]:
+        """
+        批次取得多檔股票的即時資料，優先使用短效報價快取。
+
+        參數：
+            stock_nos (list[str]): 股票代號清單。
+
+        回傳：
+            dict[str, REAL_TIME]: 股票代號 -> 即時資料，查無資料的代號不會出現在結果中。
+        """
+        stock_nos = list(dict.fromkeys(stock_nos))  # 去除重複並保留順序
+        result = cls.QUOTES.get_many(stock_nos, cls.fetch_real_time, timeout=cls.TIMEOUT)
+        cls.remember_names(result)
+        return result
+
+    @classmethod
+    def remember_names(cls, quotes: dict[str, REAL_TIME]) -> None:
+        """以即時資料中的股票簡稱與全名補充本地股票代號目錄。"""
+        for stock_no, data in quotes.items():
+            cls.DIRECTORY.remember(stock_no, name=data.get("n"), full_name=data.get("nf"))
+
+    @classmethod
+    def fetch_real_time(cls, stock_nos: list[str]) -> dict[str, REAL_TIME]:
+        """
+        不經快取，直接向 MIS 批次抓取多檔股票的即時資料。
+
+        MIS 端點可在一次請求中以 `|` 串接多個頻道，因此依 `REAL_TIME_BATCH_SIZE` 分批後同時發送。
+
+        參數：
+            stock_nos (list[str]): 股票代號清單。
+
+        回傳：
+            dict[str, REAL_TIME]: 股票代號 -> 即時資料，查無資料的代號不會出現在結果中。
+
+        拋出：
+            - RequestTimeoutError: 若超過 `TIMEOUT` 秒仍未全部完成。
+        """
+        batches = cls.real_time_params(stock_nos)
+        if len(batches) == 1:
+            # 只有一批時直接在目前的執行緒發送，不佔用執行緒池
+            return cls.merge_real_time([cls.fetch(cls.URLS["即時資訊"], batches[0])])
+
+        futures = [cls.EXECUTOR.submit(cls.fetch, cls.URLS["即時資訊"], params) for params in batches]
+        # 執行緒池被其他請求佔滿時不無限等待（與 month_reports 相同）
+        done, not_done = wait(futures, timeout=cls.TIMEOUT)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise RequestTimeoutError("即時資訊請求時間過長，請稍後再試")
+        return cls.merge_real_time([future.result() for future in futures])
+
+    @classmethod
+    def real_time_params(cls, stock_nos: list[str]) -> list[dict[str, str]]:
+        """
+        將股票代號依 `REAL_TIME_BATCH_SIZE` 分批，產生每次即時資訊請求的查詢參數。
+
+        參數：
+            stock_nos (list[str]): 股票代號清單。
+
+        回傳：
+            list[dict[str, str]]: 每批的查詢參數。
+        """
+        return [
+            {"ex_ch": "|".join(f"tse_{no}.tw" for no in stock_nos[i:i + cls.REAL_TIME_BATCH_SIZE])}
+            for i in range(0, len(stock_nos), cls.REAL_TIME_BATCH_SIZE)
+        ]
+
+    @staticmethod
+    def merge_real_time(responses: list[REAL_TIME_JSON]) -> dict[str, REAL_TIME]:
+        """
+        合併多次即時資訊請求的結果。
+
+        參數：
+            responses (list[REAL_TIME_JSON]): 各批次的回傳資料。
+
+        回傳：
+            dict[str, REAL_TIME]: 股票代號 -> 即時資料，無效的項目（代號為空）會被略過。
+        """
+        result: dict[str, REAL_TIME] = {}
+        for data in responses:
+            for item in data.get("msgArray", []):
+                if item.get("c"):
+                    result[item["c"]] = item
+        return result
     
+    @classmethod
+    def symbols(cls) -> list[SYMBOL]:
+        """
+        下載上市有價證券代號清單（ISIN）。
+
+        回傳：
+            list[SYMBOL]: 所有上市有價證券。
+        """
+        html = cls.fetch_text(cls.URLS["股票代號"], {"strMode": "2"}, encoding="cp950")
+        return parse_isin_listing(html)
+
+    @classmethod
+    def resolve(cls, query: str) -> str:
+        """
+        將使用者輸入的股票代號或名稱（如 "台積電"）轉為股票代號。
+
+        參數：
+            query (str): 代號或名稱。
+
+        回傳：
+            str: 股票代號。
+
+        拋出：
+            - ValueError: 若名稱查無對應的股票。
+        """
+        return cls.DIRECTORY.resolve(query)
+
+    @classmethod
+    def name(cls, stock_no: str) -> str:
+        """
+        取得股票簡稱，優先使用本地代號目錄，查無時才查詢即時資訊。
+
+        參數：
+            stock_no (str): 股票代號。
+
+        回傳：
+            str: 股票簡稱。
+        """
+        return cls.DIRECTORY.name(stock_no) or cls.real_time(stock_no).get("n", stock_no)
+
+    @classmethod
+    def indicator(
+        cls,
+        stock_no: str,
+        name: str | Indicator,
+        date_range: Optional[tuple[str, str]] = None,
+    ) -> tuple[Indicator, DailyBars, OUTPUTS]:
+        """
+        以本地每日交易資料庫計算技術指標，不會向 TWSE 發出請求。
+
+        指標以該股票於資料庫中的完整歷史計算（區間開始前的資料作為均線等的暖機），再取出查詢區間。
+
+        參數：
+            stock_no (str): 股票代號。
+            name (str | Indicator): 指標名稱，如 "ma20"、"rsi"、"macd"、"bb20"。
+            date_range (Optional[tuple[str, str]]): 查詢的日期區間 (起始日期, 結束日期)，格式為 'YYYYMMDD'。
+
+        回傳：
+            tuple[Indicator, DailyBars, OUTPUTS]: (指標, 區間內有收盤價的每日資料, 逐筆對齊的指標輸出)。
+
+        引發：
+            ValueError: 若指標名稱無效。
+        """
+        indicator = parse_indicator(name) if isinstance(name, str) else name
+        bars, outputs = cls.INDICATORS.series(stock_no, cls.STORE.daily_bars(stock_no), indicator)
+        window = bars.index_range(*(date_range or (None, None)))
+        return indicator, bars.take(window), {key: values[window] for key, values in outputs.items()}
+
     @classmethod
     def no(cls, stock_no: str,  date_range: Optional[tuple[str, str]] = None, only_fetch: Optional[list[Literal["daily", "real_time", "month_avg"]]] = None) -> Stock:
         """
-        取得指定股票代號的每日歷史交易資料
+        取得指定股票代號的資料。回傳的 Stock 為延遲載入：只有實際讀取到的資料群組才會向 TWSE 請求。
 
         參數：
             stock_no (str): 股票代號。
             date_range (Optional[tuple[str, str]]): 查詢的日期區間 (起始日期, 結束日期)，格式為 'YYYYMMDD'。若為 None，則回傳所有日期的資料。
-            only_fetch (Optional[list[Literal["daily", "real_time"]]]): 只取特定資料
+            only_fetch (Optional[list[Literal["daily", "real_time", "month_avg"]]]): 預先於背景載入的資料
             - daily：每日資料
             - real_time：即時資料
-            - None：所有資料
+            - month_avg：月平均資料
+            - None：不預先載入，全部於讀取時才載入
             
         回傳：
             Stock: 封裝好的股票物件資料。
         """
-        stock = Stock(stock_no)
-        
-        stock.set_data(
-            real_time_data=cls.real_time(stock_no) if not only_fetch or "real_time" in only_fetch else None,
-            daily_data= cls.report("個股每日歷史交易資料", date_range, stock_no) if not only_fetch or "daily" in only_fetch else None,
-            month_avg_data = cls.report("個股每日股價與月平均", date_range, stock_no) if not only_fetch or "month_avg" in only_fetch else None
+        stock = Stock(
+            stock_no,
+            loaders={
+                "real_time": lambda: cls.real_time(stock_no),
+                "daily": lambda: cls.report("個股每日歷史交易資料", date_range, stock_no),
+                "month_avg": lambda: cls.month_averages(stock_no, date_range),
+            },
+            executor=cls.PREFETCH_EXECUTOR,
         )
-        return stock
\ No newline at end of file
+        stock.prefetch(*(only_fetch or []))
+        return stock
@@ -0,0 +1,22 @@
+"""
+測試共用設定
+
+匯入專案模組前先設定環境變數：資料庫放在暫存目錄、不啟動背景預先載入，並提供假的 LINE 金鑰。
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DOBUJIO_DATA_DIR", tempfile.mkdtemp(prefix="dobujio-test-"))
+os.environ.setdefault("LINE_CHANNEL_ACCESS_TOKEN", "test-token")
+os.environ.setdefault("LINE_CHANNEL_SECRET", "test-secret")
+os.environ.setdefault("TWSE_PREFETCH_ENABLED", "0")
+
+import pytest
+
+from crawler.store import BarStore
+
+
+@pytest.fixture
+def store(tmp_path) -> BarStore:
+    """暫存目錄中的空白每日交易資料庫。"""
+    return BarStore(str(tmp_path / "bars.sqlite3"))
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from crawler.aio import AsyncTaiwanStockExchangeCrawler
+from crawler.backend import MemoryBackend
+from crawler.cache import ReportCache
+from crawler.cassette import CassetteLibrary
+from crawler.twse import TaiwanStockExchangeCrawler
+
+MARCH = {"fields": ["日期", "收盤價"], "data": [["20250303", "100.00"], ["20250304", "102.00"]]}
+
+
+@pytest.fixture
+def crawler(monkeypatch):
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "CACHE", ReportCache(MemoryBackend()))
+    monkeypatch.setattr(ReportCache, "is_closed", staticmethod(lambda month: month[:6] < "202505"))
+    return AsyncTaiwanStockExchangeCrawler()
+
+
+def test_month_averages_use_local_months_first(crawler, monkeypatch):
+    TaiwanStockExchangeCrawler.CACHE.put("STOCK_DAY", "2330", "20250301", MARCH)
+    requested = []
+
+    async def fetch(url, params=None):
+        requested.append(params["date"])
+        return {"stat": "OK", "fields": ["日期", "收盤價"], "data": [["114年04月", "110.00"]]}
+
+    monkeypatch.setattr(crawler, "fetch", fetch)
+
+    result = asyncio.run(crawler.month_averages("2330", ("20250301", "20250430")))
+
+    assert requested == ["20250401"]
+    assert result == {"202503": "101.00", "202504": "110.00"}
+
+
+def test_fetch_replays_cassettes(crawler, tmp_path, monkeypatch):
+    url = TaiwanStockExchangeCrawler.URLS["交易報表"] + "/STOCK_DAY"
+    params = {"response": "json", "date": "20250401", "stockNo": "2330"}
+    CassetteLibrary(str(tmp_path), "record").record(url, params, data={"stat": "OK", "data": []})
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "CASSETTES", CassetteLibrary(str(tmp_path), "replay"))
+
+    assert asyncio.run(crawler.fetch(url, params)) == {"stat": "OK", "data": []}
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from crawler.backend import LazyBackend, MemoryBackend, SQLiteBackend, TieredBackend
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.put("report", "a", 1)
+    backend.put("report", "b", 2)
+    assert backend.get("report", "a") == 1  # a 成為最近使用
+    backend.put("report", "c", 3)
+
+    assert backend.get_many("report", ["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert backend.stats()["evictions"] == 1
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend(ttls={"quote": 60})
+    backend.put("quote", "2330", {"z": "1"}, ttl=-1)
+    backend.put("quote", "2317", {"z": "2"})
+
+    assert backend.get("quote", "2330") is None
+    assert backend.get("quote", "2317") == {"z": "2"}
+    assert backend.count("quote") == 1
+    # 剩餘存活時間不足 min_ttl 的項目視為未命中
+    assert backend.get("quote", "2317", min_ttl=120) is None
+
+
+def test_sqlite_backend_round_trip_and_limits(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), limits={"series": 2})
+    backend.put("series", "a", {"x": [1, 2]})
+    time.sleep(0.01)
+    backend.put("series", "b", [1, "二"])
+    time.sleep(0.01)
+    backend.put("series", "c", "c")
+
+    assert backend.get_many("series", ["a", "b", "c"]) == {"b": [1, "二"], "c": "c"}
+    assert backend.count("series") == 2
+    assert backend.stats()["evictions"] == 1
+    assert backend.cross_process
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteBackend(path).put("report", "key", {"data": [["1"]]})
+    assert SQLiteBackend(path).get("report", "key") == {"data": [["1"]]}
+
+
+def test_tiered_backend_backfills_memory_with_original_expiry(tmp_path):
+    shared = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    memory = MemoryBackend()
+    backend = TieredBackend(memory, shared)
+    expires_at = time.time() + 100
+    shared.put_entries("quote", {"2330": ({"z": "1"}, expires_at)})
+
+    assert backend.get("quote", "2330") == {"z": "1"}
+    assert memory.get_entries("quote", ["2330"]) == {"2330": ({"z": "1"}, expires_at)}
+    assert backend.cross_process
+
+
+def test_lazy_backend_opens_on_first_use():
+    opened = []
+
+    def factory():
+        opened.append(True)
+        return MemoryBackend()
+
+    backend = LazyBackend(factory, fallback=MemoryBackend, ttls={"report": None})
+    assert not opened
+    backend.put("report", "key", 1)
+    assert opened == [True]
+    assert backend.get("report", "key") == 1
+
+
+def test_lazy_backend_falls_back_when_database_cannot_open(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    backend = LazyBackend(
+        lambda: SQLiteBackend(str(blocker / "cache.sqlite3")),
+        fallback=MemoryBackend,
+        ttls={"series": 60},
+    )
+
+    backend.put("series", "key", [1])
+    assert backend.get("series", "key") == [1]
+    assert isinstance(backend.backend, MemoryBackend)
+    assert backend.backend.ttls == {"series": 60}
+    assert not backend.cross_process
+
+
+@pytest.mark.parametrize("backend", [MemoryBackend(), TieredBackend(MemoryBackend(), MemoryBackend())])
+def test_clear_only_removes_given_kind(backend):
+    backend.put("quote", "a", 1)
+    backend.put("report", "a", 2)
+    backend.clear("quote")
+    assert backend.get("quote", "a") is None
+    assert backend.get("report", "a") == 2
@@ -0,0 +1,49 @@
+import numpy as np
+
+from crawler.bars import DailyBars
+
+
+def bar(date: int, close: float) -> tuple:
+    return (date, 1000, int(close * 1000), close, close, close, close, 0.0, 10)
+
+
+def test_rows_are_sorted_and_duplicate_dates_keep_the_last():
+    bars = DailyBars.from_rows([bar(20250403, 3.0), bar(20250401, 1.0), bar(20250402, 2.0), bar(20250401, 1.5)])
+
+    assert bars["date"].tolist() == [20250401, 20250402, 20250403]
+    assert bars["close"].tolist() == [1.5, 2.0, 3.0]
+
+
+def test_between_uses_inclusive_bounds_and_returns_views():
+    bars = DailyBars.from_rows([bar(day, float(day % 100)) for day in (20250401, 20250402, 20250407, 20250408)])
+
+    assert bars.index_range("20250402", "20250407") == slice(1, 3)
+    assert bars.index_range("20250403", "20250406") == slice(2, 2)
+    assert bars.index_range(None, "20250331") == slice(0, 0)
+    assert bars.index_range("20250409", None) == slice(4, 4)
+
+    window = bars.between("20250402", "20250407")
+    assert window["date"].tolist() == [20250402, 20250407]
+    assert np.shares_memory(window["close"], bars["close"])
+
+
+def test_empty_bars():
+    bars = DailyBars.empty()
+    assert len(bars) == 0
+    assert len(bars.between("20250101", "20251231")) == 0
+
+
+def test_records_keep_the_placeholder_for_missing_integers():
+    daily_data = {
+        "fields": ["日期", "成交股數", "成交金額", "開盤價", "最高價", "最低價", "收盤價", "漲跌價差", "成交筆數"],
+        "data": [
+            ["20250402", "--", "--", "--", "--", "--", "--", "--", "--"],
+            ["20250401", "1,000", "100,000", "100.00", "101.00", "99.00", "100.50", "+0.50", "10"],
+        ],
+    }
+    bars = DailyBars.from_daily_data(daily_data)
+
+    assert bars["volume"].tolist() == [1000, 0]  # 計算時缺值為 0
+    records = bars.between("20250402", "20250402").records()
+    assert records[0] == dict(zip(daily_data["fields"], daily_data["data"][0]))
+    assert bars.records()[0]["成交股數"] == "1,000"
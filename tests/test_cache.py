@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import utils
+from crawler.backend import MemoryBackend
+from crawler.cache import ReportCache
+from utils.date import TAIPEI_TZ
+
+
+def test_closed_months_follow_taipei_time(monkeypatch):
+    # 台北時間 5/1 00:30（UTC 4/30 16:30）：四月已結束
+    monkeypatch.setattr(utils.date, "taipei_now", lambda: datetime(2025, 5, 1, 0, 30, tzinfo=TAIPEI_TZ))
+    assert ReportCache.is_closed("202504")
+    assert ReportCache.is_closed("20250430")
+    assert not ReportCache.is_closed("202505")
+
+
+def test_only_closed_months_are_cached(monkeypatch):
+    monkeypatch.setattr(utils.date, "taipei_now", lambda: datetime(2025, 5, 1, 0, 30, tzinfo=TAIPEI_TZ))
+    cache = ReportCache(MemoryBackend())
+    cache.put("STOCK_DAY", "2330", "20250401", {"data": [1]})
+    cache.put("STOCK_DAY", "2330", "20250501", {"data": [2]})
+
+    assert cache.get_many("STOCK_DAY", "2330", ["20250415", "20250501"]) == {"20250415": {"data": [1]}}
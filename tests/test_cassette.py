@@ -0,0 +1,46 @@
+import pytest
+
+from crawler.cassette import CassetteLibrary, CassetteNotFoundError
+from crawler.errors import NoDataError
+from crawler.twse import TaiwanStockExchangeCrawler
+
+URL = "https://www.twse.com.tw/exchangeReport/STOCK_DAY"
+PARAMS = {"response": "json", "date": "20250401", "stockNo": "2330"}
+
+
+def test_key_ignores_host_and_parameter_order():
+    assert CassetteLibrary.key(URL, PARAMS) == CassetteLibrary.key(
+        "http://127.0.0.1:8000/exchangeReport/STOCK_DAY", dict(reversed(PARAMS.items()))
+    )
+
+
+def test_recorded_response_is_replayed(tmp_path):
+    CassetteLibrary(str(tmp_path), "record").record(URL, PARAMS, data={"stat": "OK", "data": []})
+    library = CassetteLibrary(str(tmp_path), "replay")
+
+    assert library.play(URL, PARAMS)["json"] == {"stat": "OK", "data": []}
+    with pytest.raises(CassetteNotFoundError):
+        library.play(URL, {**PARAMS, "date": "20250501"})
+    assert library.stats() == {"mode": "replay", "hits": 1, "misses": 1, "recorded": 0}
+
+
+def test_off_and_auto_modes(tmp_path):
+    assert CassetteLibrary(str(tmp_path), "off").play(URL, PARAMS) is None
+    auto = CassetteLibrary(str(tmp_path), "auto")
+    assert auto.play(URL, PARAMS) is None
+    auto.record(URL, PARAMS, text="<html>")
+    assert auto.play(URL, PARAMS)["text"] == "<html>"
+    with pytest.raises(ValueError):
+        CassetteLibrary(str(tmp_path), "rewind")
+
+
+def test_fetch_replays_without_network_and_checks_status(tmp_path, monkeypatch):
+    library = CassetteLibrary(str(tmp_path), "replay")
+    CassetteLibrary(str(tmp_path), "record").record(URL, PARAMS, data={"stat": "OK", "data": [["114/04/01"]]})
+    CassetteLibrary(str(tmp_path), "record").record(URL, {**PARAMS, "date": "20250501"}, data={"stat": "很抱歉，沒有符合條件的資料!"})
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "CASSETTES", library)
+    monkeypatch.setattr("crawler.twse.SESSIONS.get", lambda *args, **kwargs: pytest.fail("不應連網"))
+
+    assert TaiwanStockExchangeCrawler.fetch(URL, PARAMS)["data"] == [["114/04/01"]]
+    with pytest.raises(NoDataError):
+        TaiwanStockExchangeCrawler.fetch(URL, {**PARAMS, "date": "20250501"})
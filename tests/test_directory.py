@@ -0,0 +1,74 @@
+import pytest
+
+from crawler.backend import MemoryBackend
+from crawler.directory import SymbolDirectory, parse_isin_listing
+
+LISTING = """
+<table>
+<tr><td>有價證券代號及名稱</td><td>國際證券辨識號碼(ISIN Code)</td><td>上市日</td><td>市場別</td><td>產業別</td><td>CFICode</td><td>備註</td></tr>
+<tr><td colspan=7><B>股票</B></td></tr>
+<tr><td>2330　台積電</td><td>TW0002330008</td><td>1994/09/05</td><td>上市</td><td>半導體業</td><td>ESVUFR</td><td></td></tr>
+<tr><td>2303　聯電</td><td>TW0002303005</td><td>1985/07/16</td><td>上市</td><td>半導體業</td><td>ESVUFR</td><td></td></tr>
+<tr><td>2317　鴻海</td><td>TW0002317005</td><td>1991/06/18</td><td>上市</td><td>其他電子業</td><td>ESVUFR</td><td></td></tr>
+<tr><td colspan=7><B>ETF</B></td></tr>
+<tr><td>0050　元大台灣50</td><td>TW0000050004</td><td>2003/06/30</td><td>上市</td><td></td><td>CEOGEU</td><td></td></tr>
+</table>
+"""
+
+
+def test_parse_isin_listing():
+    symbols = parse_isin_listing(LISTING)
+
+    assert [symbol["code"] for symbol in symbols] == ["2330", "2303", "2317", "0050"]
+    assert symbols[0] == {
+        "code": "2330",
+        "name": "台積電",
+        "isin": "TW0002330008",
+        "listed": "1994/09/05",
+        "market": "上市",
+        "industry": "半導體業",
+        "category": "股票",
+    }
+    assert symbols[-1]["category"] == "ETF"
+
+
+def test_lookup_by_code_name_and_prefix():
+    directory = SymbolDirectory(MemoryBackend(), lambda: parse_isin_listing(LISTING))
+
+    assert directory.name("2330") == "台積電"
+    assert directory.lookup("2317") == ["2317"]
+    assert directory.lookup("聯電") == ["2303"]
+    assert directory.lookup("元大") == ["0050"]
+    assert directory.resolve("鴻海") == "2317"
+    assert directory.resolve("9999") == "9999"  # 尚未收錄的代號原樣回傳
+    with pytest.raises(ValueError):
+        directory.resolve("不存在")
+
+
+def test_directory_is_shared_through_backend():
+    backend = MemoryBackend()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return parse_isin_listing(LISTING)
+
+    SymbolDirectory(backend, loader).ensure_fresh()
+    other = SymbolDirectory(backend, loader)
+
+    assert other.name("2330") == "台積電"
+    assert len(calls) == 1
+
+
+def test_failed_download_is_not_retried_on_every_lookup():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        raise OSError("無法連線")
+
+    directory = SymbolDirectory(MemoryBackend(), loader)
+
+    assert directory.lookup("2330") == []
+    assert directory.resolve("2330") == "2330"
+    assert len(calls) == 1
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from linebot.models import MessageEvent, SourceGroup, SourceUser, TextMessage, TextSendMessage
+
+from api.dispatcher import ReplyDispatcher, source_key
+
+
+class RecordingBot:
+    """記錄回覆內容的假 LINE Bot API。"""
+
+    def __init__(self):
+        self.replies: list[tuple[str, str]] = []
+        self.lock = threading.Lock()
+
+    def reply_message(self, reply_token, messages):
+        with self.lock:
+            self.replies.append((reply_token, messages[0].text))
+
+
+def event(text: str, user_id: str = "U1", group_id: str | None = None) -> MessageEvent:
+    source = SourceGroup(group_id=group_id, user_id=user_id) if group_id else SourceUser(user_id=user_id)
+    return MessageEvent(reply_token=f"token-{text}", source=source, message=TextMessage(text=text))
+
+
+def slow_echo(text: str) -> list[TextSendMessage]:
+    # 越早送出的訊息處理越久，若同一來源的事件被同時處理，回覆順序就會顛倒
+    time.sleep(0.2 / int(text.split()[-1]))
+    return [TextSendMessage(text=text)]
+
+
+def test_events_from_one_source_are_replied_in_order():
+    bot = RecordingBot()
+    dispatcher = ReplyDispatcher(bot, slow_echo, workers=4, loading_delay=60)
+
+    payload = dispatcher.dispatch([event(f"/a {i}") for i in range(1, 6)])
+    assert payload.done.wait(5)
+
+    assert [text for _, text in bot.replies] == [f"/a {i}" for i in range(1, 6)]
+    assert dispatcher.stats()["processed"] == 5
+
+
+def test_different_sources_are_processed_concurrently():
+    bot = RecordingBot()
+    dispatcher = ReplyDispatcher(bot, lambda text: time.sleep(0.2) or [TextSendMessage(text=text)], workers=4, loading_delay=60)
+
+    start = time.perf_counter()
+    payload = dispatcher.dispatch([event(f"/a {i}", user_id=f"U{i}") for i in range(1, 5)])
+    assert payload.done.wait(5)
+
+    assert time.perf_counter() - start < 0.6
+    assert len(bot.replies) == 4
+
+
+def test_order_is_kept_per_source_when_sources_interleave():
+    bot = RecordingBot()
+    dispatcher = ReplyDispatcher(bot, slow_echo, workers=3, loading_delay=60)
+
+    events = [event(f"/{user} {i}", user_id=user) for i in range(1, 4) for user in ("U1", "U2", "U3")]
+    payload = dispatcher.dispatch(events)
+    assert payload.done.wait(5)
+
+    for user in ("U1", "U2", "U3"):
+        assert [text for _, text in bot.replies if text.startswith(f"/{user}")] == [f"/{user} {i}" for i in range(1, 4)]
+
+
+def test_full_queue_replies_busy_message():
+    bot = RecordingBot()
+    release = threading.Event()
+    dispatcher = ReplyDispatcher(bot, lambda text: release.wait(5) and [TextSendMessage(text=text)], workers=1, max_queue=1, loading_delay=60)
+
+    payload = dispatcher.dispatch([event("/a 1"), event("/a 2")])
+    assert bot.replies == [("token-/a 2", ReplyDispatcher.BUSY_MESSAGE)]
+    release.set()
+    assert payload.done.wait(5)
+    assert dispatcher.stats()["rejected"] == 1
+
+
+def test_group_messages_share_one_source():
+    assert source_key(event("/a", user_id="U1", group_id="G1")) == source_key(event("/b", user_id="U2", group_id="G1"))
+    assert source_key(event("/a", user_id="U1")) != source_key(event("/a", user_id="U2"))
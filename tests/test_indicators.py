@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from crawler.bars import DailyBars
+from crawler.indicators import RSI, IndicatorCache, ema_filter, parse_indicator
+
+# Wilder RSI(14) 的經典範例資料（StockCharts）
+CLOSES = np.array([
+    44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08, 45.89, 46.03, 45.61, 46.28,
+    46.28, 46.00, 46.03, 46.41, 46.22, 45.64, 46.21, 46.25, 45.71, 46.45, 45.78, 45.35, 44.03, 44.18,
+    44.22, 44.57, 43.42, 42.66, 43.13,
+])
+# 以完整精度計算的結果（StockCharts 的表格因中間值四捨五入而略有差異，如第一筆為 70.53）
+RSI_EXPECTED = [
+    70.46, 66.25, 66.48, 69.35, 66.29, 57.92, 62.88, 63.21, 56.01, 62.34,
+    54.67, 50.39, 40.02, 41.49, 41.90, 45.50, 37.32, 33.09, 37.79,
+]
+
+INDICATORS = ["ma5", "ma20", "ema12", "rsi", "rsi5", "macd", "bb20"]
+
+
+def test_rsi_reference_values():
+    outputs, _ = RSI(14).compute(CLOSES)
+    rsi = outputs["RSI(14)"]
+
+    assert len(rsi) == len(CLOSES)
+    assert np.isnan(rsi[:14]).all()
+    assert np.round(rsi[14:], 2).tolist() == RSI_EXPECTED
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+@pytest.mark.parametrize("split", [1, 5, 14, 15, 20, 32])
+def test_incremental_matches_full(name, split):
+    indicator = parse_indicator(name)
+    full, _ = indicator.compute(CLOSES)
+    head, state = indicator.compute(CLOSES[:split])
+    tail, _ = indicator.compute(CLOSES[split:], state)
+
+    for output, values in full.items():
+        np.testing.assert_allclose(np.concatenate((head[output], tail[output])), values, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+def test_one_close_at_a_time_matches_full(name):
+    indicator = parse_indicator(name)
+    full, _ = indicator.compute(CLOSES)
+    state = None
+    parts: dict[str, list[np.ndarray]] = {}
+    for close in CLOSES:
+        outputs, state = indicator.compute(np.array([close]), state)
+        for output, values in outputs.items():
+            parts.setdefault(output, []).append(values)
+
+    for output, values in full.items():
+        np.testing.assert_allclose(np.concatenate(parts[output]), values, equal_nan=True)
+
+
+def test_ema_filter_seeds_with_first_value():
+    np.testing.assert_allclose(ema_filter(np.array([1.0, 2.0, 3.0]), 0.5), [1.0, 1.5, 2.25])
+    np.testing.assert_allclose(ema_filter(np.array([2.0]), 0.5, initial=4.0), [3.0])
+
+
+def bars(closes: np.ndarray, first_date: int = 20250101) -> DailyBars:
+    return DailyBars.from_rows([(first_date + i, 0, 0, c, c, c, c, None, 0) for i, c in enumerate(closes)])
+
+
+def test_cache_computes_only_new_tail():
+    cache = IndicatorCache()
+    indicator = parse_indicator("rsi")
+    cache.series("2330", bars(CLOSES[:20]), indicator)
+    _, outputs = cache.series("2330", bars(CLOSES[:25]), indicator)
+    _, again = cache.series("2330", bars(CLOSES[:25]), indicator)
+
+    full, _ = indicator.compute(CLOSES[:25])
+    np.testing.assert_allclose(outputs["RSI(14)"], full["RSI(14)"], equal_nan=True)
+    assert again is outputs
+    assert cache.stats() == {"entries": 1, "hits": 1, "incremental": 1, "full": 1}
+
+
+def test_cache_recomputes_when_history_changes():
+    cache = IndicatorCache()
+    indicator = parse_indicator("ma5")
+    cache.series("2330", bars(CLOSES[:20]), indicator)
+    revised = CLOSES[:21].copy()
+    revised[3] += 1
+    cache.series("2330", bars(revised), indicator)
+
+    assert cache.stats()["full"] == 2
+
+
+def test_parse_indicator_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        parse_indicator("kd9")
+    with pytest.raises(ValueError):
+        parse_indicator("macd12")
@@ -0,0 +1,40 @@
+import pytest
+
+from crawler import ingest
+from crawler.errors import NoDataError, RequestTimeoutError
+from crawler.twse import TaiwanStockExchangeCrawler
+
+
+def test_network_error_is_not_recorded(store, monkeypatch):
+    def report(cls, name, dates):
+        raise RequestTimeoutError("逾時")
+
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "report", classmethod(report))
+
+    assert ingest.ingest_report_day("T86", "20250417", store) == 0
+    assert ingest.missing_report_days("T86", "20250417", "20250417", store) == ["20250417"]
+
+
+def test_past_day_without_data_is_marked_as_holiday(store, monkeypatch):
+    def report(cls, name, dates):
+        raise NoDataError("沒有符合條件的資料")
+
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "report", classmethod(report))
+
+    assert ingest.ingest_report_day("T86", "20250417", store) == 0
+    assert ingest.missing_report_days("T86", "20250417", "20250417", store) == []
+
+
+def test_background_backfill_uses_its_own_bounded_executor(store, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(ingest, "REPORT_BACKFILL_BUDGET", 3)
+    monkeypatch.setattr(ingest, "ingest_report_day", lambda report_code, date, store: submitted.append(date) or 0)
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "EXECUTOR", None)  # 不應使用共用的執行緒池
+
+    assert ingest.start_report_backfill("T86", "20250401", "20250417", store)
+    lock = ingest.REPORT_BACKFILL_LOCKS["T86"]
+    assert lock.acquire(timeout=5)  # 等待背景工作結束
+    lock.release()
+
+    assert len(submitted) == 3
+    assert submitted == sorted(submitted, reverse=True)
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from crawler import prefetch
+from crawler.prefetch import PrefetchScheduler
+from crawler.twse import TaiwanStockExchangeCrawler
+from utils.date import TAIPEI_TZ
+
+DATE = "20250417"  # 週四
+
+
+def timestamp(hour: int, minute: int) -> float:
+    return datetime(2025, 4, 17, hour, minute, tzinfo=TAIPEI_TZ).timestamp()
+
+
+@pytest.fixture
+def scheduler(store, monkeypatch):
+    """以暫存資料庫取代爬蟲的資料庫；published 控制 TWSE 是否已公布當日資料。"""
+    state = {"published": False, "requests": []}
+
+    def ingest_market_day(date):
+        state["requests"].append(("MI_INDEX", date))
+        if state["published"]:
+            store.mark_day(date, trading=True)
+        return 0
+
+    def ingest_report_day(report_code, date):
+        state["requests"].append((report_code, date))
+        if state["published"]:
+            store.mark_report_day(report_code, date, trading=True)
+        return 0
+
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "STORE", store)
+    monkeypatch.setattr(prefetch, "ingest_market_day", ingest_market_day)
+    monkeypatch.setattr(prefetch, "ingest_report_day", ingest_report_day)
+    monkeypatch.setattr(prefetch, "missing_market_days", lambda days, end: [] if end in store.ingested_days(end, end) else [end])
+    scheduler = PrefetchScheduler(reports=("T86",))
+    scheduler.state = state
+    return scheduler
+
+
+def test_retries_until_todays_data_is_published(scheduler):
+    scheduler.tick(timestamp(13, 31))
+    assert scheduler.refreshed_date is None
+    assert scheduler.retry_at == timestamp(13, 31) + PrefetchScheduler.PUBLISH_RETRY_INTERVAL
+
+    scheduler.tick(timestamp(13, 32))  # 尚未到重新檢查的時間
+    assert len(scheduler.state["requests"]) == 2
+
+    scheduler.state["published"] = True
+    scheduler.tick(timestamp(14, 0))
+    assert scheduler.refreshed_date == DATE
+    assert scheduler.state["requests"][-2:] == [("MI_INDEX", DATE), ("T86", DATE)]
+
+
+def test_gives_up_after_cutoff(scheduler):
+    scheduler.tick(timestamp(23, 30))
+    assert scheduler.refreshed_date == DATE
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from crawler.quotes import QuoteCache
+from utils.date import TAIPEI_TZ
+
+
+def quote(stock_no: str) -> dict:
+    return {"c": stock_no, "z": "100.0"}
+
+
+def test_cached_quotes_are_not_reloaded():
+    cache = QuoteCache()
+    calls = []
+
+    def loader(stock_nos):
+        calls.append(list(stock_nos))
+        return {stock_no: quote(stock_no) for stock_no in stock_nos}
+
+    cache.get_many(["2330"], loader)
+    result = cache.get_many(["2330", "2317"], loader)
+
+    assert calls == [["2330"], ["2317"]]
+    assert set(result) == {"2330", "2317"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_requests_share_one_load():
+    cache = QuoteCache()
+    calls = []
+    started = threading.Event()
+
+    def loader(stock_nos):
+        calls.append(list(stock_nos))
+        started.set()
+        time.sleep(0.2)
+        return {stock_no: quote(stock_no) for stock_no in stock_nos}
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_many(["2330"], loader)))
+    owner.start()
+    started.wait(1)
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_many(["2330"], loader, timeout=5))) for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    for thread in [owner, *waiters]:
+        thread.join()
+
+    assert calls == [["2330"]]
+    assert results == [{"2330": quote("2330")}] * 5
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_loader_error_reaches_waiters_and_is_not_cached():
+    cache = QuoteCache()
+    started = threading.Event()
+
+    def failing(stock_nos):
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("MIS 無回應")
+
+    errors = []
+
+    def request():
+        try:
+            cache.get_many(["2330"], failing, timeout=5)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    owner = threading.Thread(target=request)
+    owner.start()
+    started.wait(1)
+    waiter = threading.Thread(target=request)
+    waiter.start()
+    owner.join()
+    waiter.join()
+
+    assert errors == ["MIS 無回應"] * 2
+    assert cache.get_many(["2330"], lambda stock_nos: {"2330": quote("2330")}) == {"2330": quote("2330")}
+
+
+def test_async_requests_share_loads_with_sync_cache():
+    cache = QuoteCache()
+    calls = []
+
+    async def loader(stock_nos):
+        calls.append(list(stock_nos))
+        await asyncio.sleep(0.05)
+        return {stock_no: quote(stock_no) for stock_no in stock_nos}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_many_async(["2330"], loader, timeout=5) for _ in range(3)))
+
+    assert asyncio.run(main()) == [{"2330": quote("2330")}] * 3
+    assert calls == [["2330"]]
+    assert cache.get_many(["2330"], lambda stock_nos: pytest.fail("應由快取回傳")) == {"2330": quote("2330")}
+
+
+def timestamp(hour: int, minute: int, day: int = 17) -> float:
+    # 2025-04-17 為週四
+    return datetime(2025, 4, day, hour, minute, tzinfo=TAIPEI_TZ).timestamp()
+
+
+def test_expiry_follows_market_session():
+    cache = QuoteCache(ttl={"pre_open": 10, "trading": 5})
+    assert cache.expires_at(timestamp(8, 45)) == timestamp(8, 45) + 10
+    assert cache.expires_at(timestamp(10, 0)) == timestamp(10, 0) + 5
+    assert cache.expires_at(timestamp(20, 0)) == timestamp(8, 30, day=18)
+
+
+def test_quotes_before_closing_auction_are_refreshed_during_grace_window():
+    cache = QuoteCache(ttl={"settling": 15}, settle=600)
+    now = timestamp(13, 31)
+    before_close = {"tlong": str(int(timestamp(13, 25) * 1000))}
+    after_close = {"tlong": str(int(timestamp(13, 30) * 1000))}
+
+    assert cache.expires_at(now, before_close) == now + 15
+    assert cache.expires_at(now) == now + 15
+    assert cache.expires_at(now, after_close) == timestamp(8, 30, day=18)
+    # 寬限時間過後不再等待收盤價
+    assert cache.expires_at(timestamp(13, 41), before_close) == timestamp(8, 30, day=18)
+    # 不超過寬限時間的結束
+    assert cache.expires_at(timestamp(13, 39) + 50, before_close) == timestamp(13, 40)
+
+
+def test_async_waiter_timeout_does_not_break_in_flight_load():
+    cache = QuoteCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader(stock_nos):
+        started.set()
+        release.wait(5)
+        return {stock_no: quote(stock_no) for stock_no in stock_nos}
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_many(["2330", "2317"], loader)))
+    owner.start()
+    started.wait(1)
+
+    async def wait_briefly():
+        await cache.get_many_async(["2330"], loader, timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(wait_briefly())
+    release.set()
+    owner.join()
+
+    assert results == [{"2330": quote("2330"), "2317": quote("2317")}]
+    # 進行中的請求已正常結束，之後的查詢直接命中快取
+    assert cache.get_many(["2330", "2317"], lambda stock_nos: pytest.fail("應由快取回傳"), timeout=1) == results[0]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from crawler.bars import DailyBars
+from crawler.resample import bucket_keys, bucket_label, check_interval, resample, resample_field
+
+DATES = np.array([20241227, 20241230, 20241231, 20250102, 20250103, 20250106, 20250331, 20250401])
+
+
+def test_week_keys_are_mondays_across_year_end():
+    assert bucket_keys(DATES, "week").tolist() == [
+        20241223, 20241230, 20241230, 20241230, 20241230, 20250106, 20250331, 20250331,
+    ]
+
+
+def test_week_key_of_sunday_is_previous_monday():
+    assert bucket_keys(np.array([20250105, 20250302, 20240229]), "week").tolist() == [20241230, 20250224, 20240226]
+
+
+@pytest.mark.parametrize("interval, expected", [
+    ("day", DATES.tolist()),
+    ("month", [202412, 202412, 202412, 202501, 202501, 202501, 202503, 202504]),
+    ("quarter", [20244, 20244, 20244, 20251, 20251, 20251, 20251, 20252]),
+    ("year", [2024, 2024, 2024, 2025, 2025, 2025, 2025, 2025]),
+])
+def test_calendar_keys(interval, expected):
+    assert bucket_keys(DATES, interval).tolist() == expected
+
+
+def test_labels():
+    assert bucket_label(20252, "quarter") == "2025Q2"
+    assert bucket_label(202504, "month") == "202504"
+    with pytest.raises(ValueError):
+        check_interval("hour")
+
+
+def bars(rows: list[tuple]) -> DailyBars:
+    return DailyBars.from_rows([(date, volume, 0, o, h, l, c, None, 1) for date, volume, o, h, l, c in rows])
+
+
+def test_resample_aggregates_ohlcv_per_bucket():
+    labels, columns = resample(bars([
+        (20250102, 1000, 10.0, 11.0, 9.0, 10.5),
+        (20250103, 2000, 10.5, 12.0, 10.0, 11.5),
+        (20250106, 3000, 11.5, 11.8, 11.0, 11.2),
+    ]), "week")
+
+    assert labels == ["20241230", "20250106"]
+    assert columns["open"].tolist() == [10.0, 11.5]
+    assert columns["high"].tolist() == [12.0, 11.8]
+    assert columns["low"].tolist() == [9.0, 11.0]
+    assert columns["close"].tolist() == [11.5, 11.2]
+    assert columns["volume"].tolist() == [3000, 3000]
+
+
+def test_resample_field_skips_missing_values():
+    daily = bars([
+        (20250102, 1000, 10.0, 11.0, 9.0, 10.5),
+        (20250103, 0, None, None, None, None),
+        (20250203, 0, None, None, None, None),
+    ])
+
+    labels, closes = resample_field(daily, "收盤價", "month")
+    assert labels == ["202501"]
+    assert closes.tolist() == [10.5]
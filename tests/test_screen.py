@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from crawler.screen import HISTORY_DAYS, Condition, MarketSnapshot, history_needed, screen
+
+
+def fill(store, days: int, stocks: dict[str, float]) -> list[str]:
+    """匯入 days 個交易日的收盤行情，每檔股票每天上漲 1%。"""
+    dates = []
+    day = date(2025, 1, 6)
+    while len(dates) < days:
+        if day.weekday() < 5:
+            dates.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+
+    for i, trading_day in enumerate(dates):
+        rows = []
+        for stock_no, base in stocks.items():
+            close = round(base * 1.01 ** i, 2)
+            change = round(close - base * 1.01 ** (i - 1), 2)
+            rows.append((stock_no, int(trading_day), 1_000_000, close * 1_000_000, close, close, close, close, change, 100))
+        store.put_market_bars(rows)
+        store.mark_day(trading_day, trading=True)
+    return dates
+
+
+def test_short_history_is_reported_instead_of_filtering_everything(store):
+    dates = fill(store, 5, {"2330": 100.0, "2317": 50.0})
+    snapshot = MarketSnapshot.build(store)
+
+    assert snapshot.date == dates[-1]
+    assert snapshot.history == 5
+    assert not np.isnan(snapshot["ma5"]).any()
+    assert np.isnan(snapshot["ma20"]).all()
+
+    condition = Condition.parse("close>ma20")
+    assert condition.fields == ["close", "ma20"]
+    assert history_needed(condition.fields) == 20 > snapshot.history
+
+
+def test_filters_and_sorts_with_full_history(store):
+    fill(store, HISTORY_DAYS, {"2330": 100.0, "2317": 50.0, "2454": 1000.0})
+    snapshot = MarketSnapshot.build(store)
+    assert snapshot.history == HISTORY_DAYS
+
+    matched, rows = screen(snapshot, [Condition.parse("close>ma20"), Condition.parse("收盤價<500")], sort_by="close")
+    assert matched == 2
+    assert [stock_no for stock_no, _ in rows] == ["2330", "2317"]
+
+
+def test_history_needed():
+    assert history_needed(["close", "change_pct"]) == 1
+    assert history_needed(["close", "ma5", "vol_ratio"]) == 20
+    assert history_needed(["ma60"]) == HISTORY_DAYS
+
+
+def test_empty_store_has_no_snapshot(store):
+    assert MarketSnapshot.build(store) is None
+
+
+def test_screen_controller_reports_short_history(store, monkeypatch):
+    from api.controllers import screen as controller
+    from crawler.screen import SnapshotCache
+
+    fill(store, 5, {"2330": 100.0})
+    backfills = []
+    monkeypatch.setattr(controller, "start_backfill", backfills.append)
+    monkeypatch.setattr(controller.TaiwanStockExchangeCrawler, "SNAPSHOTS", SnapshotCache(store))
+
+    messages = controller.controller("/screen close>ma20")
+
+    assert backfills == [HISTORY_DAYS]
+    assert "只有 5 個交易日" in messages[0].text
+    assert "20日均線" in messages[0].text
+
+
+def test_screen_controller_without_snapshot_does_not_fetch(store, monkeypatch):
+    from api.controllers import screen as controller
+    from crawler.screen import SnapshotCache
+
+    backfills = []
+    monkeypatch.setattr(controller, "start_backfill", backfills.append)
+    monkeypatch.setattr(controller.TaiwanStockExchangeCrawler, "SNAPSHOTS", SnapshotCache(store))
+    monkeypatch.setattr(controller.TaiwanStockExchangeCrawler, "fetch", classmethod(lambda cls, url, params=None: pytest.fail(url)))
+
+    messages = controller.controller("/screen change%>5")
+
+    assert backfills == [HISTORY_DAYS]
+    assert "資料更新中" in messages[0].text
+
+
+@pytest.mark.parametrize("text", ["close>>5", "foo>1"])
+def test_invalid_conditions(text):
+    with pytest.raises(ValueError):
+        Condition.parse(text)
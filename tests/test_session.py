@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from crawler.errors import RequestFailedError, RequestTimeoutError
+from crawler.session import HostSessions, HostStats
+
+URL = "https://www.twse.com.tw/exchangeReport/STOCK_DAY"
+
+
+def sessions_failing_with(errors: list[Exception], **kwargs) -> tuple[HostSessions, list[str]]:
+    """get() 依序引發 errors 中的錯誤，用完後回傳 "ok"；calls 記錄取得配額與請求的順序。"""
+    sessions = HostSessions(backoff_base=0.01, backoff_max=0.01, **kwargs)
+    calls = []
+
+    def get(url, params=None, headers=None, timeout=None):
+        calls.append("get")
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    sessions.get = get
+    return sessions, calls
+
+
+def test_every_attempt_acquires_a_token():
+    sessions, calls = sessions_failing_with([RequestTimeoutError("逾時"), RequestFailedError("502", 502)], max_retries=2)
+
+    assert sessions.request(URL, timeout=5, acquire=lambda remaining: calls.append("acquire")) == "ok"
+    assert calls == ["acquire", "get"] * 3
+
+
+def test_client_errors_are_not_retried():
+    sessions, calls = sessions_failing_with([RequestFailedError("404", 404)], max_retries=2)
+
+    with pytest.raises(RequestFailedError):
+        sessions.request(URL, timeout=5)
+    assert calls == ["get"]
+
+
+def test_retries_stop_at_the_deadline():
+    sessions, calls = sessions_failing_with([RequestTimeoutError("逾時")] * 5, max_retries=5)
+
+    def slow_acquire(remaining):
+        time.sleep(0.06)
+
+    start = time.monotonic()
+    with pytest.raises(RequestTimeoutError):
+        sessions.request(URL, timeout=0.1, acquire=slow_acquire)
+    assert time.monotonic() - start < 0.2
+    assert calls == ["get"]
+
+
+def test_token_timeout_ends_the_request():
+    sessions, calls = sessions_failing_with([RequestFailedError("503", 503)], max_retries=2)
+
+    def acquire(remaining):
+        if calls:
+            raise RequestTimeoutError("請求過於頻繁，請稍後再試")
+
+    with pytest.raises(RequestTimeoutError, match="請求過於頻繁"):
+        sessions.request(URL, timeout=5, acquire=acquire)
+    assert calls == ["get"]
+
+
+def test_host_stats_are_thread_safe():
+    stats = HostStats()
+
+    def work():
+        for _ in range(2000):
+            stats.record(0.01, new_connection=False)
+            stats.record_error()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stats.to_dict()["requests"] == 16000
+    assert stats.to_dict()["errors"] == 16000
@@ -0,0 +1,55 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from crawler.stock import Stock
+
+REAL_TIME = {"c": "2330", "n": "台積電", "z": "1000.0"}
+DAILY = {"fields": ["日期", "收盤價"], "data": [["20250401", "1,000.00"]]}
+
+
+def test_groups_are_loaded_on_first_access():
+    calls = []
+    stock = Stock("2330", loaders={
+        "real_time": lambda: calls.append("real_time") or REAL_TIME,
+        "daily": lambda: calls.append("daily") or DAILY,
+    })
+
+    assert calls == []
+    assert stock.get("股票簡稱") == ["台積電"]
+    assert calls == ["real_time"]
+    assert len(stock.bars()) == 1
+    stock.get("股票簡稱")
+    assert calls == ["real_time", "daily"]
+
+
+def test_concurrent_access_shares_one_load():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return REAL_TIME
+
+    stock = Stock("2330", loaders={"real_time": loader})
+    threads = [threading.Thread(target=stock.get, args=("股票簡稱",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+
+
+def test_prefetch_errors_surface_on_get():
+    def failing():
+        raise RuntimeError("TWSE 無回應")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        stock = Stock("2330", loaders={"daily": failing}, executor=executor)
+        stock.prefetch("daily")
+    assert not stock.is_loaded("daily")
+    with pytest.raises(RuntimeError, match="TWSE 無回應"):
+        stock.bars()
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+import pytest
+
+import utils
+from crawler.backend import MemoryBackend
+from crawler.cache import ReportCache
+from crawler.twse import TaiwanStockExchangeCrawler
+
+
+def backfill(store, start: date, end: date) -> list[str]:
+    """如同收盤行情的補齊工作，只匯入平日（週末不記錄）。"""
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            trading_day = day.strftime("%Y%m%d")
+            store.put_market_bars([("2330", int(trading_day), 1000, 100000, 100.0, 101.0, 99.0, 100.5, 0.5, 10)])
+            store.mark_day(trading_day, trading=True)
+            days.append(trading_day)
+        day += timedelta(days=1)
+    return days
+
+
+def test_covers_ignores_weekends(store):
+    backfill(store, date(2025, 4, 1), date(2025, 4, 17))
+    assert store.covers("20250401", "20250417")
+    assert store.covers("20250405", "20250406")  # 只有週末
+    assert not store.covers("20250401", "20250418")
+
+
+def test_backfilled_month_is_served_from_store(store, monkeypatch):
+    days = backfill(store, date(2025, 4, 1), date(2025, 4, 17))
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "STORE", store)
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "CACHE", ReportCache(MemoryBackend()))
+    monkeypatch.setattr(ReportCache, "is_closed", staticmethod(lambda month: month[:6] < "202504"))
+    monkeypatch.setattr(utils.date, "last_closed_date", lambda *args, **kwargs: "20250417")
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "fetch", classmethod(lambda cls, url, params=None: pytest.fail(f"不應發出請求：{url}")))
+
+    data = TaiwanStockExchangeCrawler.month_report("STOCK_DAY", "20250415", "2330")
+
+    assert len(data["data"]) == len(days)
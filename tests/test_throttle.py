@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pytest
+
+from crawler.throttle import RateLimiter
+
+
+def test_burst_then_refill():
+    limiter = RateLimiter(rate=50, burst=3)
+    assert [limiter.try_acquire() for _ in range(4)] == [True, True, True, False]
+    time.sleep(0.05)
+    assert limiter.try_acquire()
+
+
+def test_acquire_waits_for_tokens():
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire(timeout=1)
+    # 第一個令牌立即取得，其餘兩個各需等待 1/20 秒
+    assert time.monotonic() - start >= 0.09
+
+
+def test_acquire_times_out_without_waiting_in_vain():
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.acquire()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.1)
+    # 需要等待的時間超過 timeout 時立即放棄
+    assert time.monotonic() - start < 0.1
+
+
+def test_acquire_async_times_out():
+    limiter = RateLimiter(rate=1, burst=1)
+
+    async def main():
+        await limiter.acquire_async(timeout=1)
+        await limiter.acquire_async(timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(main())
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (1, 0), (-1, 1)])
+def test_rejects_non_positive_settings(rate, burst):
+    with pytest.raises(ValueError):
+        RateLimiter(rate=rate, burst=burst)
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from crawler.errors import RequestTimeoutError
+from crawler.quotes import QuoteCache
+from crawler.twse import TaiwanStockExchangeCrawler
+
+
+def test_real_time_requests_are_batched(monkeypatch):
+    requests = []
+
+    def fetch(cls, url, params=None):
+        requests.append(params["ex_ch"])
+        return {"rtmessage": "OK", "msgArray": [{"c": channel[4:-3], "n": channel} for channel in params["ex_ch"].split("|")] + [{"c": ""}]}
+
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "fetch", classmethod(fetch))
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "REAL_TIME_BATCH_SIZE", 2)
+
+    result = TaiwanStockExchangeCrawler.fetch_real_time(["2330", "2317", "2454"])
+
+    assert sorted(requests) == ["tse_2330.tw|tse_2317.tw", "tse_2454.tw"]
+    assert list(result) == ["2330", "2317", "2454"]
+
+
+def test_real_time_many_deduplicates_and_uses_quote_cache(monkeypatch):
+    requests = []
+
+    def fetch_real_time(cls, stock_nos):
+        requests.append(list(stock_nos))
+        return {stock_no: {"c": stock_no, "z": "100.0"} for stock_no in stock_nos if stock_no != "9999"}
+
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "fetch_real_time", classmethod(fetch_real_time))
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "QUOTES", QuoteCache())
+
+    first = TaiwanStockExchangeCrawler.real_time_many(["2330", "2317", "2330", "9999"])
+    second = TaiwanStockExchangeCrawler.real_time_many(["2317", "2454"])
+
+    assert set(first) == {"2330", "2317"}
+    assert set(second) == {"2317", "2454"}
+    assert requests == [["2330", "2317", "9999"], ["2454"]]
+
+
+def test_real_time_batches_time_out_when_the_pool_is_busy(monkeypatch):
+    release = threading.Event()
+    busy = ThreadPoolExecutor(max_workers=1)
+    busy.submit(release.wait, 5)
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "EXECUTOR", busy)
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "TIMEOUT", 0.1)
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "REAL_TIME_BATCH_SIZE", 1)
+    monkeypatch.setattr(TaiwanStockExchangeCrawler, "fetch", classmethod(lambda cls, url, params=None: {"msgArray": []}))
+
+    try:
+        with pytest.raises(RequestTimeoutError):
+            TaiwanStockExchangeCrawler.fetch_real_time(["2330", "2317"])
+        # 只有一批時不經過執行緒池
+        assert TaiwanStockExchangeCrawler.fetch_real_time(["2330"]) == {}
+    finally:
+        release.set()
+        busy.shutdown()
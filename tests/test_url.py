@@ -0,0 +1,60 @@
+import urllib.parse
+
+import pytest
+
+import utils
+from utils.url import MAX_URL_LENGTH, downsample, generate_plot_url, preview_url
+
+
+def query(url: str) -> dict[str, str]:
+    return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+
+
+def trend(days: int) -> list:
+    return [[f"2025{i:04d}", 100.0 + i * 0.37] for i in range(days)]
+
+
+def test_handles_skip_compression(monkeypatch):
+    monkeypatch.setattr(utils.url, "PLOT_SERIES_HANDLES", True)
+    monkeypatch.setattr(utils.data, "compress_data", lambda data: pytest.fail("不需要 token"))
+
+    url = generate_plot_url(type="trend", title="2330", series="abc", data=trend(2000))
+
+    assert query(url) == {"type": "trend", "title": "2330", "series": "abc"}
+
+
+def test_short_data_embeds_token(monkeypatch):
+    monkeypatch.setattr(utils.url, "PLOT_SERIES_HANDLES", False)
+    data = trend(20)
+
+    url = generate_plot_url(type="trend", title="2330", series="abc", data=data)
+
+    assert query(url)["series"] == "abc"
+    assert utils.data.decompress_data(query(url)["token"]) == data
+
+
+def test_long_data_is_downsampled_instead_of_failing(monkeypatch):
+    monkeypatch.setattr(utils.url, "PLOT_SERIES_HANDLES", False)
+    data = trend(3000)
+
+    url = generate_plot_url(type="trend", title="2330", series="abc", data=data)
+
+    params = query(url)
+    sampled = utils.data.decompress_data(params["token"])
+    assert len(preview_url(url)) <= MAX_URL_LENGTH
+    assert "series" not in params  # handle 指向未抽樣的資料
+    assert "每" in params["title"]
+    assert sampled[-1] == data[-1]
+    assert 2 < len(sampled) < len(data)
+
+
+def test_token_only_call_still_rejects_oversized_urls(monkeypatch):
+    monkeypatch.setattr(utils.url, "PLOT_SERIES_HANDLES", False)
+    with pytest.raises(ValueError):
+        generate_plot_url(type="trend", title="2330", token="x" * MAX_URL_LENGTH)
+
+
+def test_downsample_keeps_overlays_aligned():
+    data = {"data": list(range(10)), "overlays": {"ma5": list(range(10, 20))}}
+    assert downsample(data, 3) == {"data": [0, 3, 6, 9], "overlays": {"ma5": [10, 13, 16, 19]}}
+    assert downsample(list(range(5)), 2) == [0, 2, 4]
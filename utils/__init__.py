@@ -1,6 +1,7 @@
 from . import (
+    metrics,
     date,
     url,
     data
 )
-__all__ = ["date", "url", "data"]
\ No newline at end of file
+__all__ = ["date", "url", "data", "metrics"]
\ No newline at end of file
@@ -1,5 +1,5 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, time, timedelta, timezone
+from typing import Literal, Optional
 
 
 def today(fmt="%Y%m%d") -> str:
@@ -32,6 +32,20 @@ def last_month(fmt="%Y%m%d") -> str:
         # 例：5月31 改 4月31 會錯 → 改成 4月30
         last_month = today.replace(day=1) - timedelta(days=1)
         return last_month.strftime(fmt)
+
+
+def days_ago(days: int, fmt="%Y%m%d") -> str:
+    """
+    取得 N 天前的日期字串，格式為 YYYYMMDD。
+
+    參數:
+        days (int): 天數。
+        fmt (str): 輸出的日期格式（預設為 '%Y%m%d'）。
+
+    回傳:
+        str: N 天前的日期字串。
+    """
+    return (datetime.today() - timedelta(days=days)).strftime(fmt)
     
 
 def roc_to_ad(roc: str, output_format: str = "%Y%m%d") -> str:
@@ -115,4 +129,79 @@ def check_date_range(date_range: tuple[Optional[str], Optional[str]]) -> tuple[s
     if start > end:
         raise ValueError("起始日期不能大於結束日期")
 
-    return (start, end)
\ No newline at end of file
+    return (start, end)
+
+# 台灣不實施日光節約時間，直接使用固定時區
+TAIPEI_TZ = timezone(timedelta(hours=8))
+
+# 台股盤前試撮、開盤與收盤時間
+PRE_OPEN_TIME = time(8, 30)
+OPEN_TIME = time(9, 0)
+CLOSE_TIME = time(13, 30)
+
+
+def taipei_now() -> datetime:
+    """
+    取得目前的台北時間。
+
+    回傳:
+        datetime: 帶有台北時區的目前時間。
+    """
+    return datetime.now(TAIPEI_TZ)
+
+
+def market_session(dt: Optional[datetime] = None) -> Literal["pre_open", "trading", "closed"]:
+    """
+    判斷指定時間所在的台股交易時段（不考慮國定假日）。
+
+    參數:
+        dt (Optional[datetime]): 欲判斷的時間，預設為目前台北時間。
+
+    回傳:
+        str: "pre_open"（盤前試撮）、"trading"（盤中）或 "closed"（收盤後或非交易日）。
+    """
+    dt = (dt or taipei_now()).astimezone(TAIPEI_TZ)
+    if dt.weekday() >= 5:
+        return "closed"
+    t = dt.time()
+    if PRE_OPEN_TIME <= t < OPEN_TIME:
+        return "pre_open"
+    if OPEN_TIME <= t < CLOSE_TIME:
+        return "trading"
+    return "closed"
+
+
+def next_market_open(dt: Optional[datetime] = None) -> datetime:
+    """
+    取得下一次盤前試撮開始的時間（不考慮國定假日）。
+
+    參數:
+        dt (Optional[datetime]): 基準時間，預設為目前台北時間。
+
+    回傳:
+        datetime: 下一個交易日 08:30 的台北時間。
+    """
+    dt = (dt or taipei_now()).astimezone(TAIPEI_TZ)
+    candidate = datetime.combine(dt.date(), PRE_OPEN_TIME, tzinfo=TAIPEI_TZ)
+    if candidate <= dt:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def last_closed_date(dt: Optional[datetime] = None, fmt: str = "%Y%m%d") -> str:
+    """
+    取得最近一個已收盤的日期：平日收盤後為當天，否則為前一天（不考慮週末與國定假日）。
+
+    參數:
+        dt (Optional[datetime]): 基準時間，預設為目前台北時間。
+        fmt (str): 輸出的日期格式（預設為 '%Y%m%d'）。
+
+    回傳:
+        str: 日期字串。
+    """
+    dt = (dt or taipei_now()).astimezone(TAIPEI_TZ)
+    if dt.weekday() < 5 and dt.time() >= CLOSE_TIME:
+        return dt.strftime(fmt)
+    return (dt - timedelta(days=1)).strftime(fmt)
@@ -0,0 +1,236 @@
+"""
+處理階段的計時與 Prometheus 指標
+
+以 `span()` 記錄各處理階段（簽章驗證、指令處理、TWSE 請求、網址壓縮與縮短、圖表解壓縮與繪製）的耗時，
+彙整為直方圖與計數器，並以 Prometheus 文字格式輸出（見 api.webhook 的 /metrics）。
+
+指令名稱以 contextvars 傳遞，同一執行緒（或 asyncio 工作）中的 span 會自動標上目前處理的指令。
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# 預設的直方圖區間（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 目前處理的指令（如 "/daily"），未設定時為 "-"
+CURRENT_COMMAND: contextvars.ContextVar[str] = contextvars.ContextVar("current_command", default="-")
+
+
+def escape(value: str) -> str:
+    """跳脫 Prometheus 標籤值中的特殊字元。"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """只增不減的計數器"""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.__values: dict[tuple[str, ...], float] = {}
+        self.__lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self.__lock:
+            self.__values[key] = self.__values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.__lock:
+            for key, value in sorted(self.__values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, key)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """依標籤分組的延遲直方圖"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self.__series: dict[tuple[str, ...], list] = {}  # 標籤 -> [各區間計數, 總和, 次數]
+        self.__lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.__lock:
+            series = self.__series.get(key)
+            if series is None:
+                series = self.__series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.__lock:
+            for key, (counts, total, count) in sorted(self.__series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                    cumulative += bucket_count
+                    le = f'le="{format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{format_labels(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(total)}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    指標登錄表
+
+    除了直接記錄的計數器與直方圖，也可以登錄 collector：在輸出時才讀取各快取或佇列的統計資料，
+    產生 (名稱, 類型, 說明, [(標籤, 值)]) 的指標，平時不需額外記錄。
+    """
+
+    def __init__(self):
+        self.__metrics: list[Counter | Histogram] = []
+        self.__collectors: list[Callable[[], list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]]] = []
+        self.__lock = threading.Lock()
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, description, labels)
+        with self.__lock:
+            self.__metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, description, labels, buckets)
+        with self.__lock:
+            self.__metrics.append(metric)
+        return metric
+
+    def collector(self, func: Callable[[], list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]]) -> Callable:
+        """登錄 collector（可作為裝飾器使用）。"""
+        with self.__lock:
+            self.__collectors.append(func)
+        return func
+
+    def render(self) -> str:
+        """
+        以 Prometheus 文字格式輸出所有指標。
+
+        回傳:
+            str: 指標內容。
+        """
+        with self.__lock:
+            metrics = list(self.__metrics)
+            collectors = list(self.__collectors)
+
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collect in collectors:
+            try:
+                samples = collect()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {escape(str(e))}")
+                continue
+            for name, kind, description, values in samples:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values:
+                    names = tuple(labels)
+                    lines.append(f"{name}{format_labels(names, tuple(labels[n] for n in names))} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "dobujio_stage_seconds",
+    "各處理階段的耗時（秒）",
+    ("stage", "command"),
+)
+COMMAND_SECONDS = REGISTRY.histogram(
+    "dobujio_command_seconds",
+    "各指令產生回覆的耗時（秒）",
+    ("command", "status"),
+)
+FETCH_SECONDS = REGISTRY.histogram(
+    "dobujio_twse_fetch_seconds",
+    "取得 TWSE 資料的耗時（秒），cache 為 hit（快取或本地資料庫）、miss（實際請求）或 replay（cassette）",
+    ("endpoint", "cache"),
+)
+FETCH_ERRORS = REGISTRY.counter(
+    "dobujio_twse_fetch_errors_total",
+    "TWSE 請求失敗的次數",
+    ("endpoint", "error"),
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "dobujio_http_request_seconds",
+    "HTTP 請求的處理時間（秒）",
+    ("route", "method", "status"),
+)
+
+
+@contextmanager
+def span(stage: str, command: Optional[str] = None) -> Iterator[None]:
+    """
+    記錄一個處理階段的耗時（發生例外時同樣記錄）。
+
+    參數:
+        stage (str): 階段名稱，如 "signature"、"compress"、"render"。
+        command (Optional[str]): 指令名稱，預設為目前處理的指令。
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, command=command or CURRENT_COMMAND.get())
+
+
+@contextmanager
+def command_context(command: str) -> Iterator[None]:
+    """在區塊內將目前處理的指令設為 command，並記錄整個指令的耗時與結果。"""
+    token = CURRENT_COMMAND.set(command)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        COMMAND_SECONDS.observe(time.perf_counter() - start, command=command, status=status)
+        CURRENT_COMMAND.reset(token)
+
+
+def observe_fetch(endpoint: str, cache: str, seconds: float) -> None:
+    """記錄一次取得 TWSE 資料的耗時。"""
+    FETCH_SECONDS.observe(seconds, endpoint=endpoint, cache=cache)
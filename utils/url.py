@@ -1,7 +1,25 @@
+import math
+import os
 from typing import Optional
 import requests
 import urllib.parse
 
+from . import data as data_utils
+from . import metrics
+
+# 繪圖服務的網址，自行架設時設為本服務的 /plot（如 https://example.onrender.com/plot）
+PLOT_URL = os.getenv("PLOT_URL") or "https://dobujio.vercel.app/plot"
+# 只有處理 /plot 的主機與產生網址的行程共用同一個圖表資料庫時，網址才能只帶 series handle：
+# 需設定 PLOT_URL 指向本服務，且圖表資料庫可跨實例共用——不在 Vercel（各實例的暫存資料夾互不共用），
+# 或以 PLOT_SERIES_PATH 指定了共用的資料庫位置；可用 PLOT_SERIES_HANDLES=0/1 覆寫
+PLOT_SERIES_HANDLES = (
+    os.getenv("PLOT_SERIES_HANDLES") == "1"
+    if os.getenv("PLOT_SERIES_HANDLES") in ("0", "1")
+    else bool(os.getenv("PLOT_URL")) and (not os.getenv("VERCEL") or bool(os.getenv("PLOT_SERIES_PATH")))
+)
+# LINE 圖片訊息網址（original_content_url / preview_image_url）的長度上限
+MAX_URL_LENGTH = 2000
+
 def shorten_url(url: str) -> str:
     """
     使用 TinyURL API 縮短網址。
@@ -12,7 +30,8 @@ def shorten_url(url: str) -> str:
         str: 縮短後的網址。
     """
     
-    response = requests.get("https://tinyurl.com/api-create.php", params={"url": url})
+    with metrics.span("shorten"):
+        response = requests.get("https://tinyurl.com/api-create.php", params={"url": url})
     return response.text  # 短網址
 
 
@@ -20,32 +39,114 @@ def shorten_url(url: str) -> str:
 def generate_plot_url(
     type: str,
     title: str,
-    token: str,
+    token: Optional[str] = None,
     x_label: Optional[str] = None,
     y_label: Optional[str] = None,
+    series: Optional[str] = None,
+    data: Optional[dict | list] = None,
 ) -> str:
     """
     根據提供的圖表資訊產生 URL，該網址可用於請求遠端圖表圖片。
 
+    PLOT_SERIES_HANDLES 啟用且指定 series 時，網址只帶 handle，不壓縮資料；否則附上自含資料的 token，
+    token 只在需要時才由 data 壓縮產生。網址（含縮圖參數）超過 MAX_URL_LENGTH 時，
+    將 data 等間隔抽樣至網址長度允許為止，並於標題註明抽樣間隔。
+
     參數:
         type (str): 圖表類型（如 "trend", "bar", "kline" 等）。
         title (str): 圖表標題。
+        token (Optional[str]): 已壓縮的圖表資料（`utils.data.compress_data` 的輸出），提供 data 時不需要。
         x_label (Optional[str]): X 軸標籤，若為 None 則省略。
         y_label (Optional[str]): Y 軸標籤，若為 None 則省略。
-        token (str): 身分驗證或資料辨識用的 Token。
+        series (Optional[str]): 伺服器端保存的圖表資料 handle（見 visualize.SERIES）。
+        data (Optional[dict | list]): 圖表資料，需要 token 時才壓縮。
 
     回傳:
         str: 已編碼的完整圖表請求網址。
+
+    引發:
+        ValueError: 若只提供 token 且網址超過 MAX_URL_LENGTH，或抽樣至最少的資料點仍然超過。
     """
+    url = plot_url(type, title, x_label, y_label, series)
+    if series is not None and PLOT_SERIES_HANDLES:
+        return url
+    if data is None:
+        if token is None:
+            return url
+        with_token = f"{url}&{urllib.parse.urlencode({'token': token}, quote_via=urllib.parse.quote)}"
+        if len(preview_url(with_token)) <= MAX_URL_LENGTH:
+            return with_token
+        raise ValueError("❗資料量過大，超過圖表產生限制，請縮短日期範圍或區間方式再試一次 🙏")
+
+    step = 1
+    while True:
+        sampled = data if step == 1 else downsample(data, step)
+        sampled_title = title if step == 1 else f"{title}（每{step}筆取1筆）"
+        # 抽樣後的資料與 handle 不同，只附上 token
+        url = plot_url(type, sampled_title, x_label, y_label, series if step == 1 else None)
+        with_token = f"{url}&{urllib.parse.urlencode({'token': data_utils.compress_data(sampled)}, quote_via=urllib.parse.quote)}"
+        length = len(preview_url(with_token))
+        if length <= MAX_URL_LENGTH:
+            return with_token
+        if points(sampled) <= 2:
+            raise ValueError("❗資料量過大，超過圖表產生限制，請縮短日期範圍或區間方式再試一次 🙏")
+        # token 長度大致與資料點數成正比，依超出的比例估計下一個抽樣間隔
+        step = max(step + 1, math.ceil(step * length / MAX_URL_LENGTH))
+
+def plot_url(
+    type: str,
+    title: str,
+    x_label: Optional[str] = None,
+    y_label: Optional[str] = None,
+    series: Optional[str] = None,
+) -> str:
+    """產生不含 token 的圖表網址。"""
     params = {
         "type": type,
         "title": title,
-        "token": token
     }
+    if series is not None:
+        params["series"] = series
     if x_label is not None:
         params["x_label"] = x_label
     if y_label is not None:
         params["y_label"] = y_label
+    return f"{PLOT_URL}?{urllib.parse.urlencode(params, quote_via=urllib.parse.quote)}"
+
+def points(data: dict | list) -> int:
+    """圖表資料的資料點數。"""
+    return len(data.get("data", [])) if isinstance(data, dict) else len(data)
+
+def downsample(data: dict | list, step: int) -> dict | list:
+    """
+    每 step 筆取 1 筆（一定保留最新的一筆）；帶有指標線時，overlays 與 secondary 的各條線同步抽樣。
 
-    query_string = urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
-    return f"https://dobujio.vercel.app/plot?{query_string}"
\ No newline at end of file
+    參數:
+        data (dict | list): 圖表資料，資料列表或 {"data": ..., "overlays": ..., "secondary": ...}。
+        step (int): 抽樣間隔。
+
+    回傳:
+        dict | list: 抽樣後的圖表資料。
+    """
+    def take(values: list) -> list:
+        return values[(len(values) - 1) % step::step]
+
+    if not isinstance(data, dict):
+        return take(data)
+    return {
+        key: {name: take(line) for name, line in value.items()} if isinstance(value, dict)
+        else take(value) if isinstance(value, list) else value
+        for key, value in data.items()
+    }
+
+def preview_url(url: str) -> str:
+    """
+    由圖表網址產生縮圖網址（LINE 的 preview_image_url 使用），縮圖以較小的尺寸與解析度繪製。
+
+    參數:
+        url (str): `generate_plot_url` 產生的圖表網址。
+
+    回傳:
+        str: 加上 variant=preview 參數的網址。
+    """
+    return f"{url}&variant=preview"
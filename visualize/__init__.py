@@ -1,2 +1,4 @@
+from .cache import RENDERS, RenderCache
 from .chart import Chart
-__all__ = ["Chart"]
\ No newline at end of file
+from .series import SERIES, SeriesStore
+__all__ = ["Chart", "RENDERS", "RenderCache", "SERIES", "SeriesStore"]
\ No newline at end of file
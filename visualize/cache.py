@@ -0,0 +1,110 @@
+"""
+圖表圖片的快取
+
+同一組繪圖參數（類型、標題、軸標籤與資料 token）一定會畫出相同的圖片，因此以參數的雜湊為鍵，
+保存繪製好的 JPEG 位元資料；同一張圖被 LINE 與各個使用者重複讀取時不必重新解壓縮與繪圖。
+雜湊同時作為 HTTP 的 ETag，讓用戶端與 CDN 可以長期快取。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class RenderCache:
+    """
+    以總位元組數為上限的 LRU 圖片快取
+
+    超過上限時由最久未使用的圖片開始淘汰；單張超過上限的圖片不會保存。
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        建立 RenderCache 物件。
+
+        參數:
+            max_bytes (int): 快取圖片的總位元組數上限，0 表示不快取。
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__images: OrderedDict[str, bytes] = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts: Optional[str]) -> str:
+        """
+        由繪圖參數產生快取鍵（也作為 ETag）。
+
+        參數:
+            *parts (Optional[str]): 繪圖參數，未提供的參數以 None 表示。
+
+        回傳:
+            str: 參數的 SHA-256 雜湊（前 32 個十六進位字元）。
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            # 以長度為前綴，避免 ("ab", "c") 與 ("a", "bc") 產生相同的雜湊；None 與空字串也不相同
+            value = b"" if part is None else part.encode("utf-8")
+            digest.update(b"-" if part is None else str(len(value)).encode("ascii"))
+            digest.update(b":" + value)
+        return digest.hexdigest()[:32]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        取得快取的圖片。
+
+        回傳:
+            Optional[bytes]: 圖片的位元資料，未快取時回傳 None。
+        """
+        with self.__lock:
+            image = self.__images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.__images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: bytes) -> None:
+        """保存圖片，並淘汰最久未使用的圖片直到總大小不超過上限。"""
+        if len(image) > self.max_bytes:
+            return
+        with self.__lock:
+            previous = self.__images.pop(key, None)
+            if previous is not None:
+                self.__bytes -= len(previous)
+            self.__images[key] = image
+            self.__bytes += len(image)
+            while self.__bytes > self.max_bytes:
+                _, evicted = self.__images.popitem(last=False)
+                self.__bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__images.clear()
+            self.__bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        取得快取統計資料。
+
+        回傳:
+            dict: 包含 hits/misses/evictions/entries/bytes/max_bytes。
+        """
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.__images),
+                "bytes": self.__bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+RENDERS = RenderCache(int(os.getenv("PLOT_CACHE_BYTES", str(32 * 1024 * 1024))))
@@ -2,6 +2,7 @@ from io import BytesIO
 from typing import Literal, Optional
 import matplotlib
 from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 from matplotlib import font_manager
@@ -17,21 +18,40 @@ class Chart:
     PAD = 1.5
     TITLE_FONT_SIZE=16
     LABEL_FONT_SIZE=14
+    # 縮圖（LINE 的 preview_image_url）：固定的小尺寸、低解析度與較低的 JPEG 品質，省略逐日刻度標籤與圖例
+    PREVIEW_WIDTH = 4.0
+    PREVIEW_HEIGHT = 2.5
+    PREVIEW_DPI = 60
+    PREVIEW_QUALITY = 60
+    PREVIEW_TITLE_FONT_SIZE = 10
     FONT_PROP = font_manager.FontProperties(fname="assets/fonts/NotoSansTC-Regular.ttf")
     def __init__(self):
         pass
     
     @classmethod
-    def setup(cls, width: float= WIDTH, height: float= HEIGHT)->tuple[Figure, Axes]:
+    def setup(cls, width: float= WIDTH, height: float= HEIGHT, preview: bool = False)->tuple[Figure, Axes]:
         """
-        初始化設定一個 matplotlib 圖表元件。
+        初始化設定一個 matplotlib 圖表元件（縮圖一律使用固定的小尺寸）。
         """
+        if preview:
+            return plt.subplots(figsize=(cls.PREVIEW_WIDTH, cls.PREVIEW_HEIGHT))
         return plt.subplots(figsize=(width, height))
     @classmethod
-    def generate(cls, fig: Figure, ax: Axes, title: str)->bytes:
+    def generate(cls, fig: Figure, ax: Axes, title: str, preview: bool = False)->bytes:
         """
         設定標題與資料來源文字，並生成輸出為 JPEG 格式的位元資料。
+        縮圖只保留標題，以較低的解析度與品質輸出。
         """
+        if preview:
+            ax.set_title(title, fontproperties=cls.FONT_PROP,
+                         fontdict={"fontsize": cls.PREVIEW_TITLE_FONT_SIZE}, pad=4)
+            fig.subplots_adjust(left=0.1, right=0.97, bottom=0.12, top=0.86)
+            buf = BytesIO()
+            fig.savefig(buf, format='jpeg', dpi=cls.PREVIEW_DPI, pil_kwargs={"quality": cls.PREVIEW_QUALITY})
+            plt.close(fig)
+            buf.seek(0)
+            return buf.read()
+
         ax.set_title(title, fontproperties=cls.FONT_PROP,
                      fontdict={"fontsize": cls.TITLE_FONT_SIZE}, pad=10)
         
@@ -46,7 +66,49 @@ class Chart:
         plt.close(fig)
         buf.seek(0)
         return buf.read()
+
+    @classmethod
+    def ticks(cls, ax: Axes, labels: list[str], offset: float, preview: bool = False) -> None:
+        """
+        設定橫軸的刻度與範圍：完整圖表標示每個日期，縮圖只標示頭尾兩個日期。
+        """
+        ax.set_xlim(-offset, len(labels) - offset)
+        if preview:
+            ends = [0, len(labels) - 1] if len(labels) > 1 else [0]
+            ax.set_xticks(ends)
+            ax.set_xticklabels([labels[i] for i in ends], fontsize=7)
+            ax.tick_params(axis="y", labelsize=7)
+            return
+        ax.set_xticks(range(len(labels)))
+        ax.set_xticklabels(labels, rotation=75, ha='right', fontproperties=cls.FONT_PROP)
     
+    @classmethod
+    def overlay(
+        cls,
+        ax: Axes,
+        overlays: Optional[dict[str, list[Optional[float]]]] = None,
+        secondary: Optional[dict[str, list[Optional[float]]]] = None,
+        legend: bool = True,
+    ) -> None:
+        """
+        於圖表上疊加指標線（None 表示該點無值，不會連線），並加上圖例（縮圖不加圖例）。
+        價格類指標畫在主軸，震盪類指標畫在右側副軸。
+        """
+        def plot(target: Axes, lines: dict[str, list[Optional[float]]], style: str) -> None:
+            for name, values in lines.items():
+                target.plot(
+                    range(len(values)),
+                    [float("nan") if value is None else value for value in values],
+                    linestyle=style, linewidth=1.2, label=name,
+                )
+            if legend:
+                target.legend(loc="upper left" if target is ax else "upper right", prop=cls.FONT_PROP)
+
+        if overlays:
+            plot(ax, overlays, "-")
+        if secondary:
+            plot(ax.twinx(), secondary, "--")
+
     @classmethod     
     def trend(
         cls,
@@ -55,16 +117,22 @@ class Chart:
         y_label: str,
         x_data: list[str],
         y_data: list[float|int],
+        overlays: Optional[dict[str, list[Optional[float]]]] = None,
+        secondary: Optional[dict[str, list[Optional[float]]]] = None,
+        preview: bool = False,
     ) -> Optional[bytes]:
         """
         根據提供的資料繪製折線圖，並依照漲跌變化以紅綠線段標示，輸出為 JPEG 圖片的位元資料。
 
         參數:
             title (str): 圖表標題。
-            x_label (str): Y 軸標籤（注意：參數名是 x_label，但實際作用於 Y 軸）。
-            y_label (str): X 軸標籤（注意：參數名是 y_label，但實際作用於 X 軸）。
+            x_label (str): X 軸標籤。
+            y_label (str): Y 軸標籤。
             x_data (list[str]): 橫軸資料，通常為日期。
             y_data (list[float | int]): 縱軸資料，通常為數值，如股價或交易量。
+            overlays (Optional[dict[str, list[Optional[float]]]]): 疊加於同一軸的指標線，如均線。
+            secondary (Optional[dict[str, list[Optional[float]]]]): 疊加於右側副軸的指標線，如 RSI、MACD。
+            preview (bool): 是否繪製低解析度的縮圖。
 
         回傳:
             Optional[bytes]: 圖片的位元資料（JPEG 格式），可供儲存或回傳至前端。若資料無效則回傳 None。
@@ -72,7 +140,8 @@ class Chart:
         if not x_data or not y_data or len(x_data) != len(y_data):
             return None
 
-        fig, ax = cls.setup(width=max(cls.WIDTH, len(x_data) * 0.3))
+        fig, ax = cls.setup(width=max(cls.WIDTH, len(x_data) * 0.3), preview=preview)
+        cls.overlay(ax, overlays, secondary, legend=not preview)
         
         # 建立漲跌分組
         up_segments: list[tuple[list[float|int]]] = []
@@ -87,30 +156,38 @@ class Chart:
             else:
                 down_segments.append(segment)
 
-        # 畫紅色上漲線段
-        for x, y in up_segments:
-            ax.plot(x, y, color='red', marker='o', linestyle='-')
+        if preview:
+            # 縮圖將同色線段合併為一個 LineCollection，不畫資料點
+            ax.add_collection(LineCollection([list(zip(*x_y)) for x_y in up_segments], colors='red'))
+            ax.add_collection(LineCollection([list(zip(*x_y)) for x_y in down_segments], colors='green'))
+            ax.autoscale_view()
+        else:
+            # 畫紅色上漲線段
+            for x, y in up_segments:
+                ax.plot(x, y, color='red', marker='o', linestyle='-')
 
-        # 畫綠色下跌線段
-        for x, y in down_segments:
-            ax.plot(x, y, color='green', marker='o', linestyle='-')
+            # 畫綠色下跌線段
+            for x, y in down_segments:
+                ax.plot(x, y, color='green', marker='o', linestyle='-')
 
 
-        ax.set_xticks(range(len(x_data)))
-        ax.set_xlim(-0.4, len(x_data) - 0.4)
-        ax.set_xticklabels(x_data, rotation=75, ha='right', fontproperties=cls.FONT_PROP)
+        cls.ticks(ax, x_data, 0.4, preview)
 
-        ax.set_xlabel(y_label, fontproperties=cls.FONT_PROP)
-        ax.set_ylabel(x_label, fontproperties=cls.FONT_PROP)
+        if not preview:
+            ax.set_xlabel(x_label, fontproperties=cls.FONT_PROP)
+            ax.set_ylabel(y_label, fontproperties=cls.FONT_PROP)
         ax.grid(True)
 
-        return cls.generate(fig, ax, title)
+        return cls.generate(fig, ax, title, preview)
     
     @classmethod
     def kline(
         cls,
         title: str,
         data: list[dict[Literal["open","high","low","close","date"],str|float|int]],
+        overlays: Optional[dict[str, list[Optional[float]]]] = None,
+        secondary: Optional[dict[str, list[Optional[float]]]] = None,
+        preview: bool = False,
     ) -> Optional[bytes]:
         """
         根據提供的資料繪製 K 線圖，並輸出為 JPEG 圖片的位元資料。
@@ -118,6 +195,9 @@ class Chart:
         參數:
             title (str): 圖表標題。
             data (list[dict]): 每筆資料需包含 open/high/low/close/date (開/高/低/收/日期) 的欄位。
+            overlays (Optional[dict[str, list[Optional[float]]]]): 疊加於價格軸的指標線，如均線、布林通道。
+            secondary (Optional[dict[str, list[Optional[float]]]]): 疊加於右側副軸的指標線，如 RSI、MACD。
+            preview (bool): 是否繪製低解析度的縮圖。
 
         回傳:
             Optional[bytes]: 圖片的位元資料（JPEG 格式），可供儲存或回傳至前端。若資料無效則回傳 None。
@@ -128,38 +208,53 @@ class Chart:
         x_labels = [item["date"] for item in data]
         x_indices = list(range(len(x_labels)))
 
-        fig, ax = cls.setup(width=max(cls.WIDTH, len(data) * 0.3))
-
-        for i, item in enumerate(data):
-            open = item["open"]
-            close = item["close"]
-            high = item["high"]
-            low = item["low"]
-
-            color = "red" if close > open else "black" if close == open else "green"
-
-            # 畫影線 （最高價到最低價）
-            ax.plot([x_indices[i], x_indices[i]], [low, high], color=color)
-
-            # 畫實體 （開盤價到收盤價）
-            rect_y = min(open, close)
-            height = abs(open - close)
-            ax.add_patch(plt.Rectangle(
-                xy=(x_indices[i] - 0.3, rect_y),
+        fig, ax = cls.setup(width=max(cls.WIDTH, len(data) * 0.3), preview=preview)
+        cls.overlay(ax, overlays, secondary, legend=not preview)
+
+        if preview:
+            # 縮圖以一次 vlines 與 bar 畫出所有影線與實體
+            colors = [
+                "red" if item["close"] > item["open"] else "black" if item["close"] == item["open"] else "green"
+                for item in data
+            ]
+            ax.vlines(x_indices, [item["low"] for item in data], [item["high"] for item in data], colors=colors)
+            ax.bar(
+                x_indices,
+                [abs(item["open"] - item["close"]) or 0.1 for item in data],
+                bottom=[min(item["open"], item["close"]) for item in data],
                 width=0.6,
-                height=height or 0.1,  # 如果漲跌幅是0，畫個小高度
-                color=color
-            ))
-
-        ax.set_xticks(x_indices)
-        ax.set_xlim(-0.3, len(x_indices) - 0.3)
-        ax.set_xticklabels(x_labels, rotation=75, ha='right', fontproperties=cls.FONT_PROP)
-
-        ax.set_xlabel("日期", fontproperties=cls.FONT_PROP)
-        ax.set_ylabel("價格", fontproperties=cls.FONT_PROP)
+                color=colors,
+            )
+        else:
+            for i, item in enumerate(data):
+                open = item["open"]
+                close = item["close"]
+                high = item["high"]
+                low = item["low"]
+
+                color = "red" if close > open else "black" if close == open else "green"
+
+                # 畫影線 （最高價到最低價）
+                ax.plot([x_indices[i], x_indices[i]], [low, high], color=color)
+
+                # 畫實體 （開盤價到收盤價）
+                rect_y = min(open, close)
+                height = abs(open - close)
+                ax.add_patch(plt.Rectangle(
+                    xy=(x_indices[i] - 0.3, rect_y),
+                    width=0.6,
+                    height=height or 0.1,  # 如果漲跌幅是0，畫個小高度
+                    color=color
+                ))
+
+        cls.ticks(ax, x_labels, 0.3, preview)
+
+        if not preview:
+            ax.set_xlabel("日期", fontproperties=cls.FONT_PROP)
+            ax.set_ylabel("價格", fontproperties=cls.FONT_PROP)
         ax.grid(True)
         
-        return cls.generate(fig, ax, title)
+        return cls.generate(fig, ax, title, preview)
     @classmethod
     def bar(
         cls,
@@ -168,6 +263,7 @@ class Chart:
         y_label: str,
         x_data: list[str],
         y_data: list[float | int],
+        preview: bool = False,
     ) -> Optional[bytes]:
         """
         根據提供的資料繪製長條圖（Bar Chart），輸出為 JPEG 圖片的位元資料。
@@ -178,6 +274,7 @@ class Chart:
             y_label (str): Y 軸標籤。
             x_data (list[str]): 橫軸資料（通常為日期）。
             y_data (list[float | int]): 對應的數值資料（例如成交量）。
+            preview (bool): 是否繪製低解析度的縮圖。
 
         回傳:
             Optional[bytes]: 圖片的位元資料（JPEG 格式），若資料無效則回傳 None。
@@ -186,7 +283,7 @@ class Chart:
             return None
 
 
-        fig, ax = cls.setup(width=max(cls.WIDTH, len(x_data) * 0.3))
+        fig, ax = cls.setup(width=max(cls.WIDTH, len(x_data) * 0.3), preview=preview)
         
         x_indices = list(range(len(x_data)))
 
@@ -197,15 +294,14 @@ class Chart:
             width=0.6,
         )
 
-        ax.set_xticks(x_indices)
-        ax.set_xlim(-0.4, len(x_data) - 0.4)
-        ax.set_xticklabels(x_data, rotation=75, ha="right", fontproperties=cls.FONT_PROP)
+        cls.ticks(ax, x_data, 0.4, preview)
 
-        ax.set_xlabel(x_label, fontproperties=cls.FONT_PROP, fontsize=12)
-        ax.set_ylabel(y_label, fontproperties=cls.FONT_PROP, fontsize=12)
+        if not preview:
+            ax.set_xlabel(x_label, fontproperties=cls.FONT_PROP, fontsize=12)
+            ax.set_ylabel(y_label, fontproperties=cls.FONT_PROP, fontsize=12)
         ax.grid(True, axis='y', linestyle='--', alpha=0.4)
 
-        return cls.generate(fig ,ax, title)
+        return cls.generate(fig ,ax, title, preview)
 
 
 
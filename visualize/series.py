@@ -0,0 +1,104 @@
+"""
+圖表資料的伺服器端保存
+
+指令產生圖表時，將資料保存於伺服器並以內容的短雜湊（handle）放入 /plot 網址，handle 命中時繪圖不需要解壓縮網址中的資料。
+資料於 ttl 秒後或超過項目數上限時淘汰。確定 /plot 由共用資料庫的主機處理時網址只帶 handle；
+否則另附自含資料的 token，handle 不存在（由沒有共用資料庫的其他主機處理請求）時以 token 繪圖
+（見 utils.url.generate_plot_url）。
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from crawler.backend import CacheBackend, LazyBackend, MemoryBackend, SQLiteBackend, data_path
+
+
+class SeriesStore:
+    """
+    以內容雜湊為鍵的圖表資料存放區
+
+    相同的資料一定得到相同的 handle，因此重複查詢不會重複保存，也不影響圖片快取與 ETag。
+    """
+
+    KIND = "series"
+
+    def __init__(self, backend: CacheBackend, ttl: Optional[float] = None):
+        """
+        建立 SeriesStore 物件。
+
+        參數:
+            backend (CacheBackend): 保存資料的快取後端，多個 worker 需共用時使用 SQLiteBackend。
+            ttl (Optional[float]): 資料的存活秒數，未指定時使用後端對 "series" 種類的預設值。
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def handle(data: dict | list) -> str:
+        """
+        產生資料的 handle：正規化 JSON 的 SHA-256 雜湊前 12 位元組，以 base64-url 編碼為 16 個字元。
+        """
+        payload = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(payload.encode("utf-8")).digest()[:12]
+        return base64.urlsafe_b64encode(digest).decode("ascii")
+
+    def put(self, data: dict | list) -> Optional[str]:
+        """
+        保存圖表資料。
+
+        參數:
+            data (dict | list): 圖表資料（與 `utils.data.compress_data` 接受的格式相同）。
+
+        回傳:
+            Optional[str]: 資料的 handle；後端無法跨行程共用（如資料庫無法開啟而改用記憶體快取）時不保存，回傳 None。
+        """
+        if not self.backend.cross_process:
+            return None
+        handle = self.handle(data)
+        self.backend.put(self.KIND, handle, data, self.ttl)
+        return handle
+
+    def get(self, handle: str) -> Optional[dict | list]:
+        """
+        取得圖表資料。
+
+        回傳:
+            Optional[dict | list]: 圖表資料，已過期或不存在時回傳 None。
+        """
+        data = self.backend.get(self.KIND, handle)
+        with self.__lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def stats(self) -> dict[str, int]:
+        """
+        取得統計資料。
+
+        回傳:
+            dict: 包含 hits/misses/entries。
+        """
+        entries = self.backend.count(self.KIND)
+        with self.__lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+# 資料庫於第一次使用時才開啟，無法開啟時改用行程內的記憶體快取
+SERIES = SeriesStore(
+    LazyBackend(
+        lambda: SQLiteBackend(
+            os.getenv("PLOT_SERIES_PATH") or data_path("series.sqlite3"),
+            limits={SeriesStore.KIND: int(os.getenv("PLOT_SERIES_MAX_ENTRIES", "20000"))},
+        ),
+        fallback=lambda: MemoryBackend(max_entries=int(os.getenv("PLOT_SERIES_MAX_ENTRIES", "20000"))),
+        ttls={SeriesStore.KIND: float(os.getenv("PLOT_SERIES_TTL", str(7 * 86400)))},
+    )
+)